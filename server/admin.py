@@ -0,0 +1,103 @@
+"""Bulk operations on the players table.
+
+Each operation is a single SQL statement over every matching player, or a
+batched executemany for imports, instead of one query and one commit per
+player. They take a SQLAlchemy engine and know nothing about the live game;
+the caller passes the players it has seated as keep, so their rows are left
+to the game, which saves them itself, and applies the change to them there.
+"""
+import csv
+
+IMPORT_BATCH_SIZE = 500  # Rows sent to the database per executemany
+
+PLAYER_COLUMNS = ('username', 'chips', 'current_bet', 'total_bet', 'folded', 'total_won',
+                  'total_lost', 'hands_played', 'hands_won', 'position', 'is_active', 'archived')
+
+
+def parse_players(lines, default_chips):
+    """Players of a CSV file with a username and an optional chips column.
+
+    A username listed twice keeps its last row. Raises ValueError naming the
+    line of the first invalid row.
+    """
+    players = {}
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or 'username' not in reader.fieldnames:
+        raise ValueError('Missing username column')
+
+    for row in reader:
+        username = (row.get('username') or '').strip()
+        if not username:
+            continue
+        chips = (row.get('chips') or '').strip()
+        try:
+            chips = int(chips) if chips else default_chips
+        except ValueError:
+            raise ValueError(f'Invalid chips on line {reader.line_num}')
+        if chips < 0:
+            raise ValueError(f'Invalid chips on line {reader.line_num}')
+        players[username] = chips
+    return players
+
+
+def import_players(engine, players, update_chips=False, batch_size=IMPORT_BATCH_SIZE):
+    """Create the given players, a batch at a time.
+
+    Existing players are left alone, or get the imported chips (and are
+    restored if archived) with update_chips. Returns the number of rows
+    inserted or updated.
+    """
+    columns = ', '.join(PLAYER_COLUMNS)
+    statement = (f'INSERT INTO players ({columns}) VALUES (?, ?, 0, 0, 0, 0, 0, 0, 0, -1, 0, 0) '
+                 'ON CONFLICT(username) DO ')
+    statement += 'UPDATE SET chips = excluded.chips, archived = 0' if update_chips else 'NOTHING'
+
+    rows = list(players.items())
+    changed = 0
+    with engine.begin() as conn:
+        for start in range(0, len(rows), batch_size):
+            changed += conn.exec_driver_sql(statement, rows[start:start + batch_size]).rowcount
+    return changed
+
+
+def _placeholders(keep):
+    return ', '.join('?' for _ in keep) or 'NULL'
+
+
+def reset_chips(engine, chips, keep=()):
+    """Set every player who is not archived or in keep to the same stack and return how many changed"""
+    keep = list(keep)
+    with engine.begin() as conn:
+        return conn.exec_driver_sql(
+            f'UPDATE players SET chips = ? WHERE archived = 0 AND chips != ? AND username NOT IN ({_placeholders(keep)})',
+            (chips, chips, *keep)
+        ).rowcount
+
+
+def rebuy_busted(engine, chips, keep=()):
+    """Give every busted player who is not archived or in keep a new stack and return how many got one"""
+    keep = list(keep)
+    with engine.begin() as conn:
+        return conn.exec_driver_sql(
+            f'UPDATE players SET chips = ? WHERE archived = 0 AND chips <= 0 AND username NOT IN ({_placeholders(keep)})',
+            (chips, *keep)
+        ).rowcount
+
+
+def archive_inactive(engine, cutoff, keep=()):
+    """Archive players without a game or a log entry since the cutoff date.
+
+    Players in keep, e.g. the ones seated at a live table, are never archived.
+    Returns the number of players archived.
+    """
+    keep = list(keep)
+    placeholders = _placeholders(keep)
+    with engine.begin() as conn:
+        return conn.exec_driver_sql(
+            'UPDATE players SET archived = 1 WHERE archived = 0 '
+            'AND username NOT IN (SELECT username FROM game_summaries WHERE day >= ?) '
+            'AND username NOT IN (SELECT username FROM game_logs WHERE username IS NOT NULL AND timestamp >= ?) '
+            f'AND username NOT IN ({placeholders})',
+            (cutoff.isoformat(), cutoff.isoformat(), *keep)
+        ).rowcount
+
@@ -0,0 +1,46 @@
+"""Read-only database access for history, stats and exports.
+
+The database runs in WAL mode, where readers never wait for the writer and
+the writer never waits for readers. Reports go through their own engine and
+connection pool, opened read-only, so a long query cannot take the write
+lock or hold a connection the game needs. Each read transaction starts with
+an explicit BEGIN, so every query of a report sees the same snapshot of the
+database even while hands are being saved.
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+
+POOL_SIZE = 4  # Read connections kept open
+BUSY_TIMEOUT = 5000  # Milliseconds a reader waits for a checkpoint to finish
+
+
+def enable_wal(dbapi_conn):
+    """Switch the database to WAL mode, run on every connection of the writer"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute('PRAGMA journal_mode = WAL')
+    cursor.execute('PRAGMA synchronous = NORMAL')  # Durable at checkpoints, safe against corruption
+    cursor.close()
+
+
+def create_reader(path, pool_size=POOL_SIZE):
+    """Engine of read-only connections to the database file"""
+    engine = create_engine(
+        f'sqlite:///file:{path}?mode=ro&uri=true',
+        poolclass=QueuePool, pool_size=pool_size, max_overflow=0,
+        connect_args={'check_same_thread': False, 'timeout': BUSY_TIMEOUT / 1000}
+    )
+
+    @event.listens_for(engine, 'connect')
+    def connect(dbapi_conn, record):
+        # Leave transactions to SQLAlchemy instead of the driver, which only begins them before writes
+        dbapi_conn.isolation_level = None
+        cursor = dbapi_conn.cursor()
+        cursor.execute('PRAGMA query_only = ON')
+        cursor.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT}')
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def begin(conn):
+        conn.exec_driver_sql('BEGIN')
+
+    return engine
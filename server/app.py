@@ -1,16 +1,129 @@
-from flask import Flask, render_template, request, session, redirect, url_for, jsonify
-from flask_socketio import SocketIO, emit, join_room, leave_room
+from flask import Flask, render_template, request, session, redirect, url_for, jsonify, send_from_directory, Response, stream_with_context, g, has_request_context
+from flask_socketio import SocketIO, emit
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, exc
+from sqlalchemy.orm import scoped_session, sessionmaker
+import click
 import uuid
+import gzip
+import hmac
 import json
 import os
-from datetime import datetime
+import mimetypes
+import itertools
+import threading
+import time
+from functools import lru_cache, wraps
+from datetime import datetime, date, timedelta, timezone
+
+import admin
+import analytics
+import archive
+import build_assets
+import equity
+import evaluator
+import export
+import maintenance
+import ratelimit
+import series
+import shards
+import workers
+from broadcast import ThrottledFeed, Outbound
+from timers import TimerWheel
+from game import Game, LOG_TAIL_SIZE
+from player import Player
+from tournament import Tournament
 
 app = Flask(__name__, static_folder='../static', template_folder='../templates')
 app.config['SECRET_KEY'] = 'texas-holdem-tracker-secret-key'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///poker_tracker.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Most log entries of the current game a client can page in at once
+LOG_PAGE_LIMIT = 200
+
+# Built assets have content-hashed names, so they can be cached forever
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
+# Players get every frame, read-only spectators get state at most this many times per second
+app.config['SPECTATOR_MAX_RATE'] = 2
+
+# Spectators see the whole table and its log, so /watch needs a login, or the WATCH_TOKEN
+# (from POKER_WATCH_TOKEN) as ?token= for screens without one. At most MAX_SPECTATORS at once.
+app.config['WATCH_TOKEN'] = os.environ.get('POKER_WATCH_TOKEN')
+app.config['MAX_SPECTATORS'] = 20
+
+# Every connection has a bounded outbound queue, one frame in flight until the client acks it.
+# Connections that stay saturated past these timeouts (seconds) are disconnected.
+app.config['OUTBOUND_MAX_DEPTH'] = 32
+app.config['OUTBOUND_ACK_TIMEOUT'] = 10
+app.config['OUTBOUND_SATURATION_TIMEOUT'] = 15
+
+# Timers (blind levels, action clocks) fire on ticks of this many seconds.
+# With nothing pending the timer task sleeps at most TIMER_MAX_SLEEP before looking again.
+app.config['TIMER_TICK'] = 0.1
+app.config['TIMER_MAX_SLEEP'] = 1
+
+# Processes running the engine of tournament tables, spread over them by table id.
+# 0 runs the tables in the server process.
+app.config['TABLE_WORKERS'] = 0
+
+# Finished games are moved out of the database into compressed files, one folder per day
+app.config['ARCHIVE_DIR'] = os.path.join(app.instance_path, 'archive')
+
+# Every club runs its own server process on its own database and archive under CLUBS_DIR/<club>,
+# except the default club, which keeps the files above. The catalog of clubs and members is shared.
+app.config['CLUB'] = os.environ.get('POKER_CLUB', shards.DEFAULT_CLUB)
+app.config['CLUBS_DIR'] = os.path.join(app.instance_path, 'clubs')
+app.config['CATALOG'] = os.path.join(app.instance_path, 'catalog.db')
+app.config['LEADERBOARD_WORKERS'] = 8  # Club databases queried at once
+
+if app.config['CLUB'] != shards.DEFAULT_CLUB:
+    club_dir = shards.club_dir(app.config['CLUBS_DIR'], app.config['CLUB'])
+    os.makedirs(club_dir, exist_ok=True)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(club_dir, 'poker_tracker.db')
+    app.config['ARCHIVE_DIR'] = os.path.join(club_dir, 'archive')
+
+# Database maintenance runs in the background every MAINTENANCE_INTERVAL seconds.
+# Full game logs are kept in the archive for ARCHIVE_RETENTION_DAYS (None keeps them forever),
+# the per-player summary of each game is kept in the database for good.
+app.config['MAINTENANCE_INTERVAL'] = 60 * 60
+app.config['ARCHIVE_RETENTION_DAYS'] = None
+app.config['MAINTENANCE_BATCH_SIZE'] = 500  # Rows deleted per transaction
+app.config['MAINTENANCE_VACUUM_PAGES'] = 256  # Pages released per incremental vacuum step
+app.config['MAINTENANCE_PAUSE'] = 0.05  # Seconds between steps, so requests get the database in between
+
+# Exports stream rows from the database this many at a time
+app.config['EXPORT_CHUNK_SIZE'] = 500
+
+# All-in equity: runouts sampled when there are too many to enumerate, processes to sample them on,
+# and where the preflop table of starting hand matchups is kept
+app.config['EQUITY_SAMPLES'] = 20000
+app.config['EQUITY_WORKERS'] = os.cpu_count() or 1
+app.config['EQUITY_TABLE'] = os.path.join(app.instance_path, 'preflop_equity.json')
+
+# Stack charts: points returned when a request does not ask for a number, and the most it may ask for
+app.config['CHIP_SERIES_POINTS'] = 200
+app.config['CHIP_SERIES_MAX_POINTS'] = 2000
+
+# Read-only connections for history, stats and exports, apart from the connections that save the game
+app.config['ANALYTICS_POOL_SIZE'] = 4
+
+# Polled JSON responses larger than this many bytes are gzipped for clients that accept it
+app.config['GZIP_MIN_SIZE'] = 1024
+app.config['GZIP_LEVEL'] = 6
+
+# Socket events a connection may send, as (events per second, burst), the others share 'default'.
+# Events repeating an idempotency key the connection sent within DEDUP_WINDOW seconds are dropped.
+app.config['RATE_LIMITS'] = {
+    ratelimit.DEFAULT: (5, 10),
+    'place_bet': (4, 8),
+    'adjust_chips': (2, 5),
+    'reorder_players': (1, 3),
+    'calculate_equity': (1, 3)
+}
+app.config['DEDUP_WINDOW'] = 2
+
 socketio = SocketIO(app, cors_allowed_origins="*")
 db = SQLAlchemy(app)
 
@@ -30,6 +143,8 @@ class PlayerModel(db.Model):
     hands_won = db.Column(db.Integer, default=0)
     position = db.Column(db.Integer, default=-1)
     is_active = db.Column(db.Boolean, default=False)
+    sitting_out = db.Column(db.Boolean, default=False)
+    archived = db.Column(db.Boolean, default=False)  # Hidden from the login list until they log in again
     
     def to_dict(self):
         return {
@@ -43,7 +158,9 @@ class PlayerModel(db.Model):
             'hands_played': self.hands_played,
             'hands_won': self.hands_won,
             'position': self.position,
-            'is_active': self.is_active
+            'is_active': self.is_active,
+            'sitting_out': bool(self.sitting_out),
+            'archived': bool(self.archived)
         }
 
 class GameStateModel(db.Model):
@@ -57,6 +174,9 @@ class GameStateModel(db.Model):
     big_blind = db.Column(db.Integer, default=10)
     dealer_position = db.Column(db.Integer, default=0)
     player_order = db.Column(db.Text, default='[]')  # JSON-encoded list of usernames
+    version = db.Column(db.Integer, default=0)  # Incremented on every saved change
+    small_blind_player = db.Column(db.String(80))  # Blinds of the current hand, seats dealt out are skipped
+    big_blind_player = db.Column(db.String(80))
     
     def to_dict(self):
         return {
@@ -66,159 +186,185 @@ class GameStateModel(db.Model):
             'small_blind': self.small_blind,
             'big_blind': self.big_blind,
             'dealer_position': self.dealer_position,
-            'player_order': json.loads(self.player_order)
+            'player_order': json.loads(self.player_order),
+            'version': self.version,
+            'small_blind_player': self.small_blind_player,
+            'big_blind_player': self.big_blind_player
         }
 
 class GameLogModel(db.Model):
     __tablename__ = 'game_logs'
+    # Ids of archived and deleted rows are never handed out again, game ids and archive files depend on it
+    __table_args__ = {'sqlite_autoincrement': True}
     
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.now)
     type = db.Column(db.String(20), nullable=False)
-    message = db.Column(db.Text, nullable=False)
     username = db.Column(db.String(80))
     amount = db.Column(db.Integer)
     round = db.Column(db.String(20))
+    pot = db.Column(db.Integer)  # Pot after the action
     
     def to_dict(self):
-        return {
+        # Only send the fields that are set, the client renders the text
+        entry = {
+            'id': self.id,
             'timestamp': self.timestamp.isoformat(),
             'type': self.type,
-            'message': self.message,
             'username': self.username,
             'amount': self.amount,
-            'round': self.round
+            'round': self.round,
+            'pot': self.pot
         }
+        return {key: value for key, value in entry.items() if value is not None}
 
-# Create database tables if they don't exist
-with app.app_context():
-    db.create_all()
+class GameSummaryModel(db.Model):
+    __tablename__ = 'game_summaries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, nullable=False, index=True)  # Id of the game's gameStart entry
+    started_at = db.Column(db.String(32))  # Timestamp of the gameStart entry, tells games with the same id apart
+    day = db.Column(db.Date, nullable=False, index=True)  # Archive partition of the game
+    username = db.Column(db.String(80), nullable=False)
+    bet = db.Column(db.Integer, default=0)
+    won = db.Column(db.Integer, default=0)
+    net = db.Column(db.Integer, default=0)
+    chips = db.Column(db.Integer)  # Final stack, if known
 
-# Player class
-class Player:
-    def __init__(self, username, chips=1000):
-        self.username = username
-        self.chips = chips
-        self.current_bet = 0
-        self.total_bet = 0
-        self.folded = False
-        self.total_won = 0
-        self.total_lost = 0
-        self.hands_played = 0
-        self.hands_won = 0
-        self.position = -1  # Position at the table
-        self.is_active = False  # Player is actively in the current game
-    
-    def place_bet(self, amount):
-        """Place a bet of the specified amount"""
-        if amount <= 0 or amount > self.chips:
-            return False
+class ChipSnapshotModel(db.Model):
+    __tablename__ = 'chip_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    taken_at = db.Column(db.DateTime, default=datetime.now, index=True)
+    usernames = db.Column(db.Text, nullable=False)  # JSON-encoded list of the players seated, in seat order
+    chips = db.Column(db.LargeBinary, nullable=False)  # Their stacks in the same order, packed by series.pack
+
+def upgrade_schema():
+    """Bring tables created by older versions up to date with the models"""
+    inspector = db.inspect(db.engine)
+    columns = {column['name'] for column in inspector.get_columns('game_logs')}
+    state_columns = {column['name'] for column in inspector.get_columns('game_state')}
+    player_columns = {column['name'] for column in inspector.get_columns('players')}
+    summary_columns = {column['name'] for column in inspector.get_columns('game_summaries')}
+    
+    with db.engine.begin() as conn:
+        if 'archived' not in player_columns:
+            conn.execute(db.text('ALTER TABLE players ADD COLUMN archived BOOLEAN DEFAULT 0'))
         
-        self.chips -= amount
-        self.current_bet += amount
-        self.total_bet += amount
-        self.total_lost += amount
-        return True
-    
-    def collect_winnings(self, amount):
-        """Collect winnings of the specified amount"""
-        if amount <= 0:
-            return False
+        if 'started_at' not in summary_columns:
+            conn.execute(db.text('ALTER TABLE game_summaries ADD COLUMN started_at VARCHAR(32)'))
         
-        self.chips += amount
-        self.total_won += amount
-        self.hands_won += 1
-        return True
-    
-    def fold(self):
-        """Fold the current hand"""
-        self.folded = True
-        return True
-    
-    def unfold(self):
-        """Return to the game (for the next hand)"""
-        self.folded = False
-        return True
-    
-    def reset_bets(self):
-        """Reset current bet (between rounds)"""
-        self.current_bet = 0
-    
-    def new_hand(self):
-        """Reset player for a new hand"""
-        self.current_bet = 0
-        self.total_bet = 0
-        self.folded = False
-        self.hands_played += 1
-    
-    def adjust_chips(self, amount):
-        """Manually adjust player chips (add or remove)"""
-        if self.chips + amount < 0:
-            amount = -self.chips  # Don't allow negative chip count
+        if 'sitting_out' not in player_columns:
+            conn.execute(db.text('ALTER TABLE players ADD COLUMN sitting_out BOOLEAN DEFAULT 0'))
         
-        self.chips += amount
+        for column in ('small_blind_player', 'big_blind_player'):
+            if column not in state_columns:
+                conn.execute(db.text(f'ALTER TABLE game_state ADD COLUMN {column} VARCHAR(80)'))
         
-        if amount > 0:
-            self.total_won += amount
-        else:
-            self.total_lost -= amount
+        if 'version' not in state_columns:
+            conn.execute(db.text('ALTER TABLE game_state ADD COLUMN version INTEGER DEFAULT 0'))
+        
+        if 'pot' not in columns:
+            conn.execute(db.text('ALTER TABLE game_logs ADD COLUMN pot INTEGER'))
+        
+        if 'message' in columns:
+            # Recover the structured type from old English messages before dropping them
+            conn.execute(db.text(
+                "UPDATE game_logs SET type = 'playerJoined', username = substr(message, 8, length(message) - 23) "
+                "WHERE type = 'system' AND message LIKE 'Player % joined the game'"
+            ))
+            conn.execute(db.text(
+                "UPDATE game_logs SET type = 'playerLeft', username = substr(message, 8, length(message) - 21) "
+                "WHERE type = 'system' AND message LIKE 'Player % left the game'"
+            ))
+            conn.execute(db.text(
+                "UPDATE game_logs SET type = CASE WHEN message LIKE '%small blind%' THEN 'smallBlind' ELSE 'bigBlind' END "
+                "WHERE type = 'blinds'"
+            ))
+            conn.execute(db.text(
+                "UPDATE game_logs SET type = 'unfold' WHERE type = 'fold' AND message LIKE '% returned to game'"
+            ))
+            # Pot sizes were only written into the text of bets, payouts and game ends
+            for marker in ('Total pot: $', 'Remaining pot: $', 'Game ended with pot: $'):
+                conn.execute(db.text(
+                    "UPDATE game_logs SET pot = CAST(substr(message, instr(message, :marker) + length(:marker)) AS INTEGER) "
+                    "WHERE pot IS NULL AND instr(message, :marker) > 0"
+                ), {'marker': marker})
+            conn.execute(db.text('ALTER TABLE game_logs DROP COLUMN message'))
+        
+        table_sql = conn.execute(db.text("SELECT sql FROM sqlite_master WHERE name = 'game_logs'")).scalar()
+        if 'AUTOINCREMENT' not in table_sql.upper():
+            # SQLite cannot add AUTOINCREMENT to a table, it is copied into a new one
+            conn.execute(db.text('ALTER TABLE game_logs RENAME TO game_logs_old'))
+            GameLogModel.__table__.create(conn)
+            conn.execute(db.text(
+                'INSERT INTO game_logs (id, timestamp, type, username, amount, round, pot) '
+                'SELECT id, timestamp, type, username, amount, round, pot FROM game_logs_old'
+            ))
+            conn.execute(db.text('DROP TABLE game_logs_old'))
+        
+        # New ids start above every archived game, even if the rows were deleted before this
+        archived = archive.max_game_id(app.config['ARCHIVE_DIR'])
+        sequence = conn.execute(db.text("SELECT seq FROM sqlite_sequence WHERE name = 'game_logs'")).scalar()
+        if sequence is None:
+            conn.execute(db.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('game_logs', :seq)"), {'seq': archived})
+        elif sequence < archived:
+            conn.execute(db.text("UPDATE sqlite_sequence SET seq = :seq WHERE name = 'game_logs'"), {'seq': archived})
+
+# Moves on with every commit, so polled player lists can be validated without a query.
+# The boot id keeps a counter restarted with the server from matching an older one.
+BOOT_ID = uuid.uuid4().hex[:8]
+players_version = 0
+players_modified_at = datetime.now(timezone.utc)
+
+def data_changed(conn):
+    global players_version, players_modified_at
+    players_version += 1
+    players_modified_at = datetime.now(timezone.utc)
+
+# Create database tables if they don't exist
+with app.app_context():
+    # Only takes effect on a new database, existing ones are switched over by `flask maintain-db`
+    event.listen(db.engine, 'connect', lambda conn, record: conn.execute('PRAGMA auto_vacuum = INCREMENTAL'))
+    event.listen(db.engine, 'connect', lambda conn, record: analytics.enable_wal(conn))
+    event.listen(db.engine, 'commit', data_changed)
+    db.create_all()
+    upgrade_schema()
     
-    def to_dict(self):
-        """Convert player object to dictionary for JSON serialization"""
-        return {
-            'username': self.username,
-            'chips': self.chips,
-            'current_bet': self.current_bet,
-            'total_bet': self.total_bet,
-            'folded': self.folded,
-            'total_won': self.total_won,
-            'total_lost': self.total_lost,
-            'hands_played': self.hands_played,
-            'hands_won': self.hands_won,
-            'position': self.position,
-            'is_active': self.is_active
-        }
+    # History, stats and exports read through their own read-only pool, never the game's session
+    reader = analytics.create_reader(db.engine.url.database, app.config['ANALYTICS_POOL_SIZE'])
+    reports = scoped_session(sessionmaker(bind=reader))
+    
+    os.makedirs(app.instance_path, exist_ok=True)
+    catalog = shards.Catalog(app.config['CATALOG'])
+    catalog.register_club(app.config['CLUB'], db.engine.url.database)
 
-# Game state management
-class Game:
-    def __init__(self):
-        self.players = {}  # map of username -> Player
-        self.player_order = []  # list of usernames in order
-        self.active = False
-        self.pot = 0
-        self.game_log = []
-        self.current_round = "preflop"
-        self.small_blind = 5
-        self.big_blind = 10
-        self.dealer_position = 0  # Index in player_order
-        self.initialized = False
-    
-    def initialize(self):
-        """Initialize game from database if not already initialized"""
-        if self.initialized:
-            return
-        
-        try:
-            with app.app_context():
-                self.load_from_db()
-            self.initialized = True
-        except Exception as e:
-            print(f"Error initializing game: {e}")
-    
-    def load_from_db(self):
-        """Load game state from database"""
-        game_state = GameStateModel.query.first()
-        if game_state:
-            self.active = game_state.active
-            self.pot = game_state.pot
-            self.current_round = game_state.current_round
-            self.small_blind = game_state.small_blind
-            self.big_blind = game_state.big_blind
-            self.dealer_position = game_state.dealer_position
-            self.player_order = json.loads(game_state.player_order)
+@app.teardown_appcontext
+def end_report(exception=None):
+    reports.remove()
+
+class DatabaseStore:
+    """Keeps the live table in the database, loaded and saved by the game engine"""
+    
+    def load(self, game):
+        with app.app_context():
+            game_state = GameStateModel.query.first()
+            if not game_state:
+                return
+            
+            game.active = game_state.active
+            game.pot = game_state.pot
+            game.current_round = game_state.current_round
+            game.small_blind = game_state.small_blind
+            game.big_blind = game_state.big_blind
+            game.dealer_position = game_state.dealer_position
+            game.small_blind_player = game_state.small_blind_player
+            game.big_blind_player = game_state.big_blind_player
+            game.version = game_state.version or 0
+            game.player_order = json.loads(game_state.player_order)
             
             # Load players
-            for username in self.player_order:
+            for username in game.player_order:
                 player_model = PlayerModel.query.filter_by(username=username).first()
                 if player_model:
                     player = Player(username, player_model.chips)
@@ -231,33 +377,42 @@ class Game:
                     player.hands_won = player_model.hands_won
                     player.position = player_model.position
                     player.is_active = player_model.is_active
-                    self.players[username] = player
+                    player.sitting_out = bool(player_model.sitting_out)
+                    game.players[username] = player
             
-            # Load game logs
-            logs = GameLogModel.query.order_by(GameLogModel.timestamp).all()
-            for log in logs:
-                self.game_log.append(log.to_dict())
-    
-    def save_to_db(self):
-        """Save game state to database"""
+            # Load the tail of the current game's log, older entries are paged on demand
+            game_start = GameLogModel.query.filter_by(type='gameStart').order_by(GameLogModel.id.desc()).first()
+            game.log_start_id = game_start.id if game_start else 0
+            
+            current_logs = GameLogModel.query.filter(GameLogModel.id >= game.log_start_id)
+            game.log_count = current_logs.count()
+            logs = current_logs.order_by(GameLogModel.id.desc()).limit(LOG_TAIL_SIZE).all()
+            for log in reversed(logs):
+                game.game_log.append(log.to_dict())
+    
+    def save(self, game, log_entries, chips):
+        """Write the state, the new log entries (setting their ids) and a chip snapshot in one transaction"""
         with app.app_context():
             # Save game state
             game_state = GameStateModel.query.first()
             if not game_state:
                 game_state = GameStateModel()
             
-            game_state.active = self.active
-            game_state.pot = self.pot
-            game_state.current_round = self.current_round
-            game_state.small_blind = self.small_blind
-            game_state.big_blind = self.big_blind
-            game_state.dealer_position = self.dealer_position
-            game_state.player_order = json.dumps(self.player_order)
+            game_state.active = game.active
+            game_state.pot = game.pot
+            game_state.current_round = game.current_round
+            game_state.small_blind = game.small_blind
+            game_state.big_blind = game.big_blind
+            game_state.dealer_position = game.dealer_position
+            game_state.small_blind_player = game.small_blind_player
+            game_state.big_blind_player = game.big_blind_player
+            game_state.player_order = json.dumps(game.player_order)
+            game_state.version = game.version
             
             db.session.add(game_state)
             
             # Save players
-            for username, player in self.players.items():
+            for username, player in game.players.items():
                 player_model = PlayerModel.query.filter_by(username=username).first()
                 if not player_model:
                     player_model = PlayerModel(username=username)
@@ -272,346 +427,459 @@ class Game:
                 player_model.hands_won = player.hands_won
                 player_model.position = player.position
                 player_model.is_active = player.is_active
+                player_model.sitting_out = player.sitting_out
                 
                 db.session.add(player_model)
             
-            db.session.commit()
-    
-    def add_player(self, player):
-        """Add a player to the game"""
-        self.initialize()  # Ensure game is initialized
-        
-        if player.username not in self.players:
-            self.players[player.username] = player
-            self.player_order.append(player.username)
-            player.position = len(self.player_order) - 1
-            player.is_active = True
-            self.add_to_log({
-                'type': 'system',
-                'message': f'Player {player.username} joined the game'
-            })
-            self.save_to_db()
-            return True
-        return False
-    
-    def remove_player(self, username):
-        """Remove a player from the game"""
-        self.initialize()  # Ensure game is initialized
-        
-        if username in self.players:
-            self.player_order.remove(username)
-            del self.players[username]
+            log_models = [
+                GameLogModel(
+                    timestamp=datetime.fromisoformat(entry['timestamp']),
+                    type=entry.get('type', 'system'),
+                    username=entry.get('username'),
+                    amount=entry.get('amount'),
+                    round=entry.get('round'),
+                    pot=entry.get('pot')
+                )
+                for entry in log_entries
+            ]
+            db.session.add_all(log_models)
             
-            self.add_to_log({
-                'type': 'system',
-                'message': f'Player {username} left the game'
-            })
+            if chips:
+                usernames, stacks = chips
+                db.session.add(ChipSnapshotModel(usernames=json.dumps(usernames), chips=series.pack(stacks)))
+            db.session.flush()
+            for entry, log_model in zip(log_entries, log_models):
+                entry['id'] = log_model.id
             
-            # Update positions for remaining players
-            self._update_positions()
-            self.save_to_db()
-            return True
-        return False
-    
-    def _update_positions(self):
-        """Update position values for all players"""
-        for i, username in enumerate(self.player_order):
-            if username in self.players:
-                self.players[username].position = i
-    
-    def reorder_players(self, new_order):
-        """Reorder players based on the new order list"""
-        self.initialize()  # Ensure game is initialized
-        
-        if set(new_order) != set(self.player_order):
-            return False  # New order must contain the same players
-        
-        self.player_order = new_order.copy()
-        self._update_positions()
-        self.save_to_db()
-        return True
-    
-    def start_game(self, small_blind=5, big_blind=10):
-        """Start a new game"""
-        self.initialize()  # Ensure game is initialized
-        
-        if len(self.players) < 2:
-            return False
-        
-        self.active = True
-        self.pot = 0
-        self.current_round = "preflop"
-        self.small_blind = small_blind
-        self.big_blind = big_blind
-        self.game_log = []
-        
-        # Reset players for new game
-        for username in self.players:
-            player = self.players[username]
-            player.new_hand()
-        
-        self.add_to_log({
-            'type': 'gameStart',
-            'message': 'Game started'
-        })
-        
-        # Post blinds
-        self.post_blinds()
-        self.save_to_db()
-        
-        return True
+            db.session.commit()
     
-    def post_blinds(self):
-        """Post small and big blinds"""
-        if len(self.player_order) < 2:
-            return False
-        
-        # Small blind is next player after dealer
-        sb_pos = (self.dealer_position + 1) % len(self.player_order)
-        small_blind_username = self.player_order[sb_pos]
-        small_blind_player = self.players[small_blind_username]
-        
-        # Big blind is next player after small blind
-        bb_pos = (self.dealer_position + 2) % len(self.player_order)
-        big_blind_username = self.player_order[bb_pos]
-        big_blind_player = self.players[big_blind_username]
-        
-        # Post small blind
-        if small_blind_player.chips >= self.small_blind:
-            small_blind_amount = min(self.small_blind, small_blind_player.chips)
-            small_blind_player.place_bet(small_blind_amount)
-            self.pot += small_blind_amount
-            
-            self.add_to_log({
-                'type': 'blinds',
-                'username': small_blind_username,
-                'amount': small_blind_amount,
-                'message': f'{small_blind_username} posted small blind: ${small_blind_amount}'
-            })
-        
-        # Post big blind
-        if big_blind_player.chips >= self.big_blind:
-            big_blind_amount = min(self.big_blind, big_blind_player.chips)
-            big_blind_player.place_bet(big_blind_amount)
-            self.pot += big_blind_amount
-            
-            self.add_to_log({
-                'type': 'blinds',
-                'username': big_blind_username,
-                'amount': big_blind_amount,
-                'message': f'{big_blind_username} posted big blind: ${big_blind_amount}'
-            })
-        
-        return True
+    def log_page(self, start_id, before, limit):
+        with app.app_context():
+            logs = GameLogModel.query.filter(
+                GameLogModel.id >= start_id,
+                GameLogModel.id < before
+            ).order_by(GameLogModel.id.desc()).limit(limit).all()
+            return [log.to_dict() for log in reversed(logs)]
+
+# Create a singleton game instance
+game = Game(DatabaseStore())
+
+# Active users tracking
+active_players = {}  # Map of session_id -> username
+player_sids = set()  # Socket ids of seated players' connections
+spectator_sids = set()  # Socket ids of read-only spectators
+
+outbound = Outbound(
+    socketio,
+    app.config['OUTBOUND_MAX_DEPTH'],
+    app.config['OUTBOUND_ACK_TIMEOUT'],
+    app.config['OUTBOUND_SATURATION_TIMEOUT']
+)
+
+spectator_feed = ThrottledFeed(
+    socketio,
+    lambda state: outbound.broadcast(spectator_sids, 'game_state_update', state, state=True),
+    app.config['SPECTATOR_MAX_RATE']
+)
+
+def broadcast_state():
+    """Send the current state to every player and queue it for the spectators"""
+    state = game.snapshot()
+    seq = g.get('action_seq') if has_request_context() else None
+    if seq is None:
+        outbound.broadcast(player_sids, 'game_state_update', state, state=True)
+    else:
+        # The sender of a predicted action learns that this state includes it
+        outbound.broadcast(player_sids - {request.sid}, 'game_state_update', state, state=True)
+        outbound.send(request.sid, 'game_state_update', {**state, 'seq': seq}, state=True)
+    spectator_feed.publish(state)
     
-    def place_bet(self, username, amount):
-        """Place a bet for a player"""
-        self.initialize()  # Ensure game is initialized
-        
-        if not self.active or username not in self.players:
-            return False
-        
-        player = self.players[username]
-        
-        if player.folded:
-            return False
-        
-        if player.place_bet(amount):
-            self.pot += amount
-            
-            self.add_to_log({
-                'type': 'bet',
-                'username': username,
-                'amount': amount,
-                'round': self.current_round,
-                'message': f'{username} bet ${amount} in {self.get_round_name()}. Total pot: ${self.pot}.'
-            })
-            
-            self.save_to_db()
-            return True
-        
-        return False
+    # Every change to the table is broadcast, so this is where the clock follows the action
+    sync_action_clock()
+
+def broadcast_delta(delta):
+    """Send a change to the players as a delta, spectators get the state through their feed"""
+    if 'game_log' in delta:
+        # Too large for a delta, the engine handed back the full state
+        broadcast_state()
+        return
     
-    def fold_player(self, username):
-        """Fold a player's hand"""
-        self.initialize()  # Ensure game is initialized
-        
-        if not self.active or username not in self.players:
-            return False
-        
-        player = self.players[username]
+    outbound.broadcast(player_sids, 'game_state_delta', delta)
+    spectator_feed.publish(game.snapshot())
+    sync_action_clock()
+
+def broadcast_event(event, data):
+    """Send a discrete event to every player"""
+    outbound.broadcast(player_sids, event, data)
+
+event_guard = ratelimit.EventGuard(app.config['RATE_LIMITS'], app.config['DEDUP_WINDOW'])
+
+def guarded(handler):
+    """Drop events over the connection's rate limit and resubmissions of an idempotency key"""
+    @wraps(handler)
+    def handle(*args):
+        data = args[0] if args and isinstance(args[0], dict) else {}
+        key = data.get('key')
+        verdict = event_guard.check(request.sid, request.event['message'], key if isinstance(key, str) else None)
+        if verdict == 'limited':
+            emit('error', {'message': 'Too many requests, slow down'})
+            return
+        if verdict == 'duplicate':
+            return  # The first submission was handled, its outcome stands
+        handler(*args)
+    return handle
+
+def acknowledged(handler):
+    """Tell the sender of an action it predicted locally (tagged with a seq) whether it was applied.
+    
+    The state the action leads to is sent to the sender with the seq, and an answer
+    follows with the version that includes the action, so the client drops its
+    prediction once that state is shown, or right away if the action was refused.
+    """
+    @wraps(handler)
+    def handle(data=None):
+        version = game.version
+        seq = (data or {}).get('seq')
+        g.action_seq = seq if isinstance(seq, int) else None
+        handler(data)
         
-        if player.fold():
-            self.add_to_log({
-                'type': 'fold',
-                'username': username,
-                'folded': True,
-                'message': f'{username} folded'
+        if g.action_seq is not None and request.sid in player_sids:
+            outbound.send(request.sid, 'action_processed', {
+                'seq': seq,
+                'applied': game.version != version,
+                'version': game.version
             })
-            
-            self.save_to_db()
-            return True
-        
-        return False
+    return handle
+
+# Every timer of the process (blind levels, action clocks) on one wheel, run by one background task
+timer_wheel = TimerWheel(app.config['TIMER_TICK'])
+
+# Tournaments are kept in memory for as long as the server runs
+tournaments = {}  # Map of tournament id -> Tournament
+tournament_ids = itertools.count(1)
+table_pool = workers.TablePool(app.config['TABLE_WORKERS']) if app.config['TABLE_WORKERS'] else None
+
+def notify_tournament(event, data):
+    """Tell every player about a tournament event and send the new summary along"""
+    broadcast_event(event, data)
+    broadcast_event('tournament_update', tournaments[data['tournament_id']].to_dict())
+
+def broadcast_tournament_table(tournament, table_id, moves=None):
+    """Send the state of a tournament table, plus the summary and moved-to tables if seats changed"""
+    changed = {table_id}
+    if moves is not None:
+        changed.update(move['to_table'] for move in moves)
+        broadcast_event('tournament_update', tournament.to_dict())
+    
+    for changed_id in sorted(changed):
+        if changed_id in tournament.tables:
+            broadcast_event('tournament_table_update', tournament.table_to_dict(changed_id))
+
+action_clock_timer = None  # Timer of the running action clock
+action_clock_turn = None  # Turn the action clock was last synced to
+
+def sync_live_chips(chips):
+    """Apply a bulk change to the seated players through the game, which saves them, and notify the table once.
+    
+    The bulk statements leave the rows of seated players alone, so the game is their only writer.
+    Returns the number of seated players changed.
+    """
+    changed = game.refresh_chips(chips)
+    if changed:
+        broadcast_state()
+    return changed
+
+def sync_action_clock():
+    """Restart the action clock when the action moved to another turn.
     
-    def unfold_player(self, username):
-        """Unfold a player (for the next hand)"""
-        self.initialize()  # Ensure game is initialized
-        
-        if not self.active or username not in self.players:
-            return False
-        
-        player = self.players[username]
-        
-        if player.unfold():
-            self.add_to_log({
-                'type': 'fold',
-                'username': username,
-                'folded': False,
-                'message': f'{username} returned to game'
-            })
-            
-            self.save_to_db()
-            return True
-        
-        return False
+    Clients are only told when a clock starts, they animate the countdown themselves.
+    """
+    global action_clock_timer, action_clock_turn
+    if action_clock_turn == game.turn:
+        return
+    action_clock_turn = game.turn
     
-    def next_round(self):
-        """Move to the next round"""
-        self.initialize()  # Ensure game is initialized
-        
-        rounds = ['preflop', 'flop', 'turn', 'river']
-        current_index = rounds.index(self.current_round)
-        
-        if current_index < len(rounds) - 1:
-            self.current_round = rounds[current_index + 1]
-            
-            # Reset current bets for new round
-            for username in self.players:
-                self.players[username].reset_bets()
-            
-            self.add_to_log({
-                'type': 'roundChange',
-                'round': self.current_round,
-                'message': f'Round changed to {self.get_round_name()}'
-            })
-            
-            self.save_to_db()
-            return True
-        
-        return False
+    if action_clock_timer:
+        timer_wheel.cancel(action_clock_timer)
+        action_clock_timer = None
     
-    def distribute_pot(self, username, amount):
-        """Distribute pot to a player"""
-        self.initialize()  # Ensure game is initialized
-        
-        if not self.active or username not in self.players:
-            return False
-        
-        if amount <= 0 or amount > self.pot:
-            return False
-        
-        player = self.players[username]
-        
-        if player.collect_winnings(amount):
-            self.pot -= amount
-            
-            self.add_to_log({
-                'type': 'distribution',
-                'username': username,
-                'amount': amount,
-                'message': f'{username} received ${amount} from the pot. Remaining pot: ${self.pot}'
-            })
-            
-            self.save_to_db()
-            return True
-        
-        return False
+    if game.action_ends_at is None:
+        return
     
-    def end_game(self):
-        """End the current game"""
-        self.initialize()  # Ensure game is initialized
-        
-        if not self.active:
-            return False
-        
-        self.active = False
-        
-        self.add_to_log({
-            'type': 'gameEnd',
-            'message': f'Game ended with pot: ${self.pot}'
-        })
+    action_clock_timer = timer_wheel.schedule(game.action_ends_at - time.time(), expire_action_clock, game.turn)
+    broadcast_event('action_clock_started', {
+        'username': game.to_act,
+        'seconds': game.action_clock,
+        'ends_at': game.action_ends_at
+    })
+
+def expire_action_clock(turn):
+    """Check or fold for the player whose clock ran out"""
+    username = game.to_act
+    action = game.expire_action(turn)
+    if action:
+        broadcast_event('action_clock_expired', {'username': username, 'action': action})
+        broadcast_state()
+
+preflop_table = equity.PreflopTable(app.config['EQUITY_TABLE'])
+
+def send_equity(hands, board):
+    """Work out the equity of the hands shown and send it to the whole table"""
+    usernames = list(hands)
+    cards = [hands[username] for username in usernames]
+    results, exact = None, False
+    if not board and len(cards) == 2:
+        # Looked up once `flask build-equity-table` filled in the matchup, sampled below until then
+        results = preflop_table.calculate(cards)
+    if results is None:
+        results, exact = equity.calculate(cards, board, samples=app.config['EQUITY_SAMPLES'],
+                                          workers=app.config['EQUITY_WORKERS'])
+    
+    broadcast_event('equity_update', {
+        'board': [evaluator.card_name(card) for card in board],
+        'exact': exact,
+        'players': {
+            username: {
+                'cards': [evaluator.card_name(card) for card in hands[username]],
+                'win': round(result['win'], 4),
+                'tie': round(result['tie'], 4),
+                'equity': round(result['equity'], 4)
+            }
+            for username, result in zip(usernames, results)
+        }
+    })
+
+archive_lock = threading.Lock()  # Keeps the end of game archiving and maintenance apart
+
+def archive_finished_games(chips=None):
+    """Move every finished game from the database into the archive.
+    
+    chips holds the final stacks of the game that just ended, if known.
+    """
+    with archive_lock, app.app_context():
+        last_start = GameLogModel.query.filter_by(type='gameStart').order_by(GameLogModel.id.desc()).first()
+        last_end = GameLogModel.query.filter_by(type='gameEnd').order_by(GameLogModel.id.desc()).first()
+        if not last_start:
+            return 0
         
-        # Advance dealer position for next game
-        if len(self.player_order) > 0:
-            self.dealer_position = (self.dealer_position + 1) % len(self.player_order)
+        if last_end and last_end.id > last_start.id:
+            boundary = last_end.id
+        else:
+            # The game in progress stays, along with what was logged between the end of the game
+            # before it and its start (players joining or leaving), which goes with it.
+            # Games that were never ended are finished once the next one started.
+            previous_start = GameLogModel.query.filter(
+                GameLogModel.type == 'gameStart', GameLogModel.id < last_start.id
+            ).order_by(GameLogModel.id.desc()).first()
+            if last_end and previous_start and last_end.id > previous_start.id:
+                boundary = last_end.id
+            else:
+                boundary = last_start.id - 1
         
-        self.save_to_db()
-        return True
-    
-    def add_to_log(self, entry):
-        """Add an entry to the game log"""
-        log_entry = {
-            **entry,
-            'timestamp': datetime.now().isoformat()
-        }
-        self.game_log.append(log_entry)
+        finished = [log.to_dict() for log in GameLogModel.query.filter(GameLogModel.id <= boundary).order_by(GameLogModel.id)]
+        # Entries without a game are kept for the next one, never archived as a game of their own
+        if not any(entry['type'] == 'gameStart' for entry in finished):
+            return 0
+        games = archive.split_games(finished)
+        for i, logs in enumerate(games):
+            game_chips = chips if i == len(games) - 1 else None
+            path = archive.write_game(app.config['ARCHIVE_DIR'], logs, game_chips)
+            save_game_summary(archive.summarize(logs, game_chips), date.fromisoformat(os.path.basename(os.path.dirname(path))))
+        db.session.commit()
         
-        # Save to database
-        with app.app_context():
-            log_model = GameLogModel(
-                type=entry.get('type', 'system'),
-                message=entry.get('message', ''),
-                username=entry.get('username'),
-                amount=entry.get('amount'),
-                round=entry.get('round')
-            )
-            db.session.add(log_model)
-            db.session.commit()
+        # Rows are only deleted once all of their games are safely on disk
+        maintenance.delete_in_batches(db.engine, 'game_logs', 'id <= ?', (boundary,),
+                                      app.config['MAINTENANCE_BATCH_SIZE'], maintenance_pause)
+        return len(games)
+
+def save_game_summary(summary, day):
+    """Store the per-player results of a game, replacing any earlier summary of the same game.
+    
+    Raises ValueError if the game id is already summarized for another game.
+    """
+    earlier = GameSummaryModel.query.filter_by(game_id=summary['game_id'])
+    # Summaries from before started_at was stored cannot be told apart and count as the same game
+    if any(started_at not in (None, summary['started_at'])
+           for (started_at,) in earlier.with_entities(GameSummaryModel.started_at).distinct()):
+        raise ValueError(f'Game {summary["game_id"]} is already summarized for another game')
+    earlier.delete()
+    
+    for result in summary['results']:
+        db.session.add(GameSummaryModel(
+            game_id=summary['game_id'],
+            started_at=summary['started_at'],
+            day=day,
+            username=result['username'],
+            bet=result['bet'],
+            won=result['won'],
+            net=result['net'],
+            chips=result.get('chips')
+        ))
+
+def rollup_archived_games():
+    """Summarize archived games that have no summary yet, e.g. archived by an older version"""
+    with archive_lock, app.app_context():
+        summarized = {game_id for (game_id,) in db.session.query(GameSummaryModel.game_id).distinct()}
+        added = 0
+        for day in archive.partitions(app.config['ARCHIVE_DIR']):
+            for game_id in archive.partition_game_ids(app.config['ARCHIVE_DIR'], day):
+                if game_id in summarized:
+                    continue
+                archived = archive.read_game(archive.game_path(app.config['ARCHIVE_DIR'], game_id, day.isoformat()),
+                                             with_logs=False)
+                save_game_summary(archived, day)
+                added += 1
+        db.session.commit()
+        return added
+
+def maintenance_pause():
+    socketio.sleep(app.config['MAINTENANCE_PAUSE'])
+
+last_maintenance = None  # Report of the last maintenance run
+
+def maintain_database():
+    """Archive, summarize and expire old games, then compact the database and refresh its statistics"""
+    global last_maintenance
+    started = time.monotonic()
+    report = {
+        'archived_games': archive_finished_games(),
+        'summarized_games': rollup_archived_games(),
+        'expired_partitions': 0
+    }
+    
+    retention_days = app.config['ARCHIVE_RETENTION_DAYS']
+    if retention_days is not None:
+        report['expired_partitions'] = archive.delete_partitions_before(
+            app.config['ARCHIVE_DIR'], date.today() - timedelta(days=retention_days))
     
-    def get_round_name(self):
-        """Get the display name for the current round"""
-        round_names = {
-            'preflop': 'Pre-Flop',
-            'flop': 'Flop',
-            'turn': 'Turn',
-            'river': 'River'
-        }
-        return round_names.get(self.current_round, self.current_round)
+    with app.app_context():
+        report['vacuumed_pages'] = maintenance.incremental_vacuum(
+            db.engine, app.config['MAINTENANCE_VACUUM_PAGES'], maintenance_pause)
+        maintenance.analyze(db.engine)
+    
+    report['finished_at'] = datetime.now().isoformat()
+    report['duration'] = round(time.monotonic() - started, 3)
+    last_maintenance = report
+    return report
+
+def hot_games():
+    """Games still in the database, in the same shape as archived games"""
+    logs = [log.to_dict() for log in reports.query(GameLogModel).order_by(GameLogModel.id)]
+    
+    chips = {username: player.chips for username, player in game.players.items()}
+    return [{**archive.summarize(game_logs, chips), 'logs': game_logs}
+            for game_logs in archive.split_games(logs)
+            if any(entry['type'] == 'gameStart' for entry in game_logs)]
+
+background_tasks_started = False
+
+def start_background_tasks():
+    """Start the server's periodic tasks once the first client connects"""
+    global background_tasks_started
+    if background_tasks_started:
+        return
+    background_tasks_started = True
+    socketio.start_background_task(disconnect_saturated_clients)
+    socketio.start_background_task(run_timers)
+    socketio.start_background_task(run_maintenance)
+
+def disconnect_saturated_clients():
+    """Drop connections that cannot keep up, so they stop holding frames for the table"""
+    while True:
+        socketio.sleep(1)
+        for sid in outbound.saturated():
+            outbound.unregister(sid)
+            outbound.disconnected += 1
+            socketio.server.disconnect(sid, namespace='/')
+
+def run_maintenance():
+    """Maintain the database periodically, in small steps so handlers are never held up for long"""
+    while True:
+        socketio.sleep(app.config['MAINTENANCE_INTERVAL'])
+        try:
+            maintain_database()
+        except Exception as e:
+            print(f"Error maintaining database: {e}")
+
+def run_timers():
+    """Run due timers, a single task no matter how many tables and tournaments are running"""
+    while True:
+        socketio.sleep(timer_wheel.time_until_next(app.config['TIMER_MAX_SLEEP']))
+        timer_wheel.run_due()
+
+asset_manifest = build_assets.load_manifest()
+
+@app.context_processor
+def inject_asset_url():
+    def asset_url(filename):
+        """URL of the built, fingerprinted asset, or the plain static file if not built"""
+        if filename in asset_manifest:
+            return url_for('asset', filename=asset_manifest[filename])
+        return url_for('static', filename=filename)
+    return {'asset_url': asset_url}
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    # Serve the best precompressed variant the client accepts
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(build_assets.DIST_DIR, filename + suffix)):
+            response = send_from_directory(build_assets.DIST_DIR, filename + suffix, max_age=ASSET_MAX_AGE,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(build_assets.DIST_DIR, filename, max_age=ASSET_MAX_AGE)
     
-    def to_dict(self):
-        """Convert game object to dictionary for JSON serialization"""
-        self.initialize()  # Ensure game is initialized
-        
-        player_data = []
-        for username in self.player_order:
-            if username in self.players:
-                player_data.append(self.players[username].to_dict())
-        
-        return {
-            'players': player_data,
-            'player_order': self.player_order,
-            'active': self.active,
-            'pot': self.pot,
-            'game_log': self.game_log,
-            'current_round': self.current_round,
-            'round_name': self.get_round_name(),
-            'small_blind': self.small_blind,
-            'big_blind': self.big_blind,
-            'dealer_position': self.dealer_position
-        }
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
 
-# Create a singleton game instance
-game = Game()
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify, fingerprint and precompress the static assets"""
+    build_assets.build()
 
-# Active users tracking
-active_players = {}  # Map of session_id -> username
+@app.cli.command('archive-games')
+def archive_games_command():
+    """Move all finished games from the database into the archive"""
+    print(f'Archived {archive_finished_games()} games to {app.config["ARCHIVE_DIR"]}')
+
+@app.cli.command('build-equity-table')
+def build_equity_table_command():
+    """Work out every preflop matchup ahead of time instead of on first use"""
+    progress = lambda done, total: print(f'{done}/{total} matchups')
+    count = preflop_table.fill(app.config['EQUITY_WORKERS'], progress)
+    print(f'Computed {count} matchups into {app.config["EQUITY_TABLE"]}')
+
+@app.cli.command('maintain-db')
+def maintain_db_command():
+    """Switch the database to incremental vacuum if needed and run maintenance once"""
+    with app.app_context():
+        if maintenance.auto_vacuum_mode(db.engine) != maintenance.INCREMENTAL:
+            print('Switching to incremental auto vacuum (full VACUUM)')
+            maintenance.enable_incremental_vacuum(db.engine)
+    print(json.dumps(maintain_database(), indent=2))
 
 @app.route('/')
 def index():
     if 'user_id' not in session:
         return redirect(url_for('login'))
-    return render_template('index.html')
+    
+    # Embed the current state so the page can paint before the socket connects
+    return render_template('index.html', initial_state=game.snapshot())
+
+@app.route('/watch')
+def watch():
+    # Read-only view for lounge screens and phones, no seat needed
+    token = app.config['WATCH_TOKEN']
+    if token and hmac.compare_digest(request.args.get('token', ''), token):
+        # Lets the page's socket in as a spectator without a login
+        session['watcher'] = True
+    
+    if 'user_id' not in session and not session.get('watcher'):
+        return redirect(url_for('login'))
+    
+    return render_template('index.html', initial_state=game.snapshot(), spectator=True)
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -626,6 +894,10 @@ def login():
                 player_model = PlayerModel(username=username, chips=initial_chips)
                 db.session.add(player_model)
                 db.session.commit()
+            elif player_model.archived:
+                player_model.archived = False
+                db.session.commit()
+        catalog.add_member(username, app.config['CLUB'])
         
         # Create session
         session['user_id'] = str(uuid.uuid4())
@@ -636,7 +908,7 @@ def login():
     
     # Get all player names for the dropdown
     with app.app_context():
-        players = PlayerModel.query.all()
+        players = PlayerModel.query.filter_by(archived=False).all()
         existing_players = [player.username for player in players]
     
     return render_template('login.html', existing_players=existing_players)
@@ -649,7 +921,7 @@ def logout():
             username = active_players[user_id]
             del active_players[user_id]
             game.remove_player(username)
-            socketio.emit('player_left', {'username': username})
+            broadcast_event('player_left', {'username': username})
         session.clear()
     return redirect(url_for('login'))
 
@@ -673,38 +945,514 @@ def delete_player(username):
                 if user == username:
                     del active_players[sid]
             
-            socketio.emit('player_removed', {'username': username}, broadcast=True)
+            broadcast_event('player_removed', {'username': username})
             return jsonify({'success': True})
     
     return jsonify({'error': 'Player not found'}), 404
 
 # RESTful API endpoints
+def conditional_json(etag, modified_at, build):
+    """JSON response of build(), or 304 without calling it if the client already has this version"""
+    if request.if_none_match:
+        unchanged = request.if_none_match.contains_weak(etag)
+    else:
+        unchanged = bool(request.if_modified_since) and modified_at.replace(microsecond=0) <= request.if_modified_since
+    
+    if unchanged:
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+        if request.accept_encodings['gzip'] and response.content_length >= app.config['GZIP_MIN_SIZE']:
+            response.set_data(gzip.compress(response.get_data(), app.config['GZIP_LEVEL']))
+            response.headers['Content-Encoding'] = 'gzip'
+    
+    # Weak, since the gzipped and plain bodies of a version differ byte for byte
+    response.set_etag(etag, weak=True)
+    response.last_modified = modified_at
+    response.cache_control.no_cache = True
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/api/players', methods=['GET'])
 def get_players():
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    with app.app_context():
-        players = PlayerModel.query.all()
-        result = [player.to_dict() for player in players]
+    def build():
+        with app.app_context():
+            players = PlayerModel.query.all()
+            return [player.to_dict() for player in players]
+    
+    return conditional_json(f'players-{BOOT_ID}-{players_version}', players_modified_at, build)
+
+def import_players(lines, default_chips, update_chips):
+    players = admin.parse_players(lines, default_chips)
+    game.initialize()  # Ensure game is initialized
+    # Seated players already exist, their chips are only changed through the game
+    seated = {username: chips for username, chips in players.items() if username in game.players}
+    changed = admin.import_players(db.engine, {username: chips for username, chips in players.items()
+                                               if username not in seated}, update_chips)
+    if update_chips:
+        changed += sync_live_chips(seated)
+    # Members of the club like players who logged in, for the catalog's counts and fan-out
+    catalog.add_members(players, app.config['CLUB'])
+    return {'players': len(players), 'changed': changed}
+
+def reset_chips(chips):
+    game.initialize()  # Ensure game is initialized
+    changed = admin.reset_chips(db.engine, chips, keep=game.players)
+    changed += sync_live_chips({username: chips for username in game.players})
+    return {'changed': changed}
+
+def rebuy_busted(chips):
+    game.initialize()  # Ensure game is initialized
+    changed = admin.rebuy_busted(db.engine, chips, keep=game.players)
+    changed += sync_live_chips({username: chips for username, player in game.players.items() if player.chips <= 0})
+    return {'changed': changed}
+
+def archive_inactive(days):
+    game.initialize()  # Ensure game is initialized
+    cutoff = date.today() - timedelta(days=days)
+    # Players at the table are playing right now, whatever the log says
+    return {'changed': admin.archive_inactive(db.engine, cutoff, keep=game.players)}
+
+ADMIN_OPERATIONS = {
+    'reset': (reset_chips, 'chips'),
+    'rebuy': (rebuy_busted, 'chips'),
+    'archive-inactive': (archive_inactive, 'days')
+}
+
+@app.route('/api/admin/players/import', methods=['POST'])
+def import_players_route():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    upload = request.files.get('file')
+    text = upload.read() if upload else request.get_data()
+    try:
+        result = import_players(text.decode('utf-8-sig').splitlines(),
+                                request.args.get('chips', 1000, type=int),
+                                request.args.get('update') in ('1', 'true'))
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify(result)
 
+@app.route('/api/admin/players/<operation>', methods=['POST'])
+def admin_players_route(operation):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    if operation not in ADMIN_OPERATIONS:
+        return jsonify({'error': 'Unknown operation'}), 404
+    
+    run, argument = ADMIN_OPERATIONS[operation]
+    value = (request.get_json(silent=True) or {}).get(argument)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        return jsonify({'error': f'Invalid {argument}'}), 400
+    
+    return jsonify(run(value))
+
+@app.cli.group('admin')
+def admin_cli():
+    """Bulk operations on the registered players"""
+
+@admin_cli.command('import-players')
+@click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--chips', default=1000, help='Chips of players listed without any')
+@click.option('--update-chips', is_flag=True, help='Also set the chips of players who already exist')
+def import_players_command(csv_file, chips, update_chips):
+    """Create the players of a CSV file with a username and an optional chips column"""
+    try:
+        result = import_players(csv_file, chips, update_chips)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(f'Imported {result["players"]} players, {result["changed"]} created or updated')
+
+@admin_cli.command('reset-chips')
+@click.option('--chips', default=1000, type=click.IntRange(0), help='Stack every player gets')
+def reset_chips_command(chips):
+    """Set every player to the same stack"""
+    print(f'Reset {reset_chips(chips)["changed"]} players to {chips} chips')
+
+@admin_cli.command('rebuy')
+@click.option('--chips', default=1000, type=click.IntRange(0), help='Stack every busted player gets')
+def rebuy_command(chips):
+    """Give every player without chips a new stack"""
+    print(f'Rebought {rebuy_busted(chips)["changed"]} players for {chips} chips')
+
+@admin_cli.command('archive-inactive')
+@click.option('--days', default=90, type=click.IntRange(0), help='Days without a game after which a player is archived')
+def archive_inactive_command(days):
+    """Hide players who have not played for a while from the login list"""
+    print(f'Archived {archive_inactive(days)["changed"]} players')
+
+@lru_cache(maxsize=256)
+def chip_series(username, since, until, points, latest_id):
+    """A player's stack over time as (unix time, chips) points, at most the given number.
+    
+    latest_id is the newest snapshot, so a cached series is only reused until the next hand.
+    """
+    query = reports.query(ChipSnapshotModel).filter(
+        ChipSnapshotModel.id <= latest_id,
+        ChipSnapshotModel.usernames.contains(json.dumps(username), autoescape=True)
+    ).order_by(ChipSnapshotModel.id)
+    if since:
+        query = query.filter(ChipSnapshotModel.taken_at >= datetime.combine(since, datetime.min.time()))
+    if until:
+        query = query.filter(ChipSnapshotModel.taken_at < datetime.combine(until + timedelta(days=1), datetime.min.time()))
+    
+    stacks = []
+    for snapshot in query.yield_per(app.config['EXPORT_CHUNK_SIZE']):
+        usernames = json.loads(snapshot.usernames)
+        if username in usernames:
+            chips = series.unpack(snapshot.chips, len(usernames))[usernames.index(username)]
+            stacks.append((round(snapshot.taken_at.timestamp(), 3), chips))
+    
+    return len(stacks), tuple(series.lttb(stacks, points))
+
+@app.route('/api/players/<username>/chips', methods=['GET'])
+def get_chip_series(username):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        since, until = parse_date_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+    
+    points = request.args.get('points', app.config['CHIP_SERIES_POINTS'], type=int)
+    points = max(3, min(points, app.config['CHIP_SERIES_MAX_POINTS']))
+    
+    latest_id = reports.query(func.max(ChipSnapshotModel.id)).scalar() or 0
+    total, sampled = chip_series(username, since, until, points, latest_id)
+    return jsonify({'username': username, 'total': total, 'points': sampled})
+
 @app.route('/api/game', methods=['GET'])
 def get_game_state():
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    return jsonify(game.to_dict())
+    game.initialize()  # Ensure game is initialized
+    return conditional_json(f'game-{game.version}', game.modified_at, game.snapshot)
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    return jsonify({
+        'outbound': outbound.stats(),
+        'events': event_guard.stats(),
+        'maintenance': last_maintenance
+    })
+
+@app.route('/api/game/log', methods=['GET'])
+def get_game_log():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    before = request.args.get('before', type=int)
+    limit = min(request.args.get('limit', 100, type=int), LOG_PAGE_LIMIT)
+    if before is None or limit <= 0:
+        return jsonify({'error': 'Invalid log range'}), 400
+    
+    game.initialize()  # Ensure game is initialized
+    return jsonify(game.get_log_page(before, limit))
+
+def parse_date_range():
+    """Optional since/until dates (YYYY-MM-DD) of a history query"""
+    since = request.args.get('since')
+    until = request.args.get('until')
+    return (date.fromisoformat(since) if since else None,
+            date.fromisoformat(until) if until else None)
+
+def history_games(since, until, with_logs=False):
+    """Archived games followed by the games still in the database"""
+    yield from archive.iter_games(app.config['ARCHIVE_DIR'], since, until, with_logs)
+    yield from hot_history_games(since, until, with_logs)
+
+def hot_history_games(since, until, with_logs=False):
+    """Games still in the database within the date range"""
+    for hot_game in hot_games():
+        day = date.fromisoformat((hot_game['ended_at'] or hot_game['started_at'])[:10])
+        if (since and day < since) or (until and day > until):
+            continue
+        if not with_logs:
+            del hot_game['logs']
+        yield hot_game
+
+@app.route('/api/history', methods=['GET'])
+def get_history():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        since, until = parse_date_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+    
+    return jsonify(list(history_games(since, until)))
+
+@app.route('/api/history/<int:game_id>', methods=['GET'])
+def get_history_game(game_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    archived = archive.find_game(app.config['ARCHIVE_DIR'], game_id)
+    if archived:
+        return jsonify(archived)
+    
+    for hot_game in hot_games():
+        if hot_game['game_id'] == game_id:
+            return jsonify(hot_game)
+    
+    return jsonify({'error': 'Game not found'}), 404
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        since, until = parse_date_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+    
+    # Finished games come from their summaries, only the games still in the database are read in full
+    query = reports.query(
+        GameSummaryModel.username,
+        func.count(GameSummaryModel.id),
+        func.sum(GameSummaryModel.bet),
+        func.sum(GameSummaryModel.won),
+        func.sum(GameSummaryModel.net)
+    ).group_by(GameSummaryModel.username)
+    if since:
+        query = query.filter(GameSummaryModel.day >= since)
+    if until:
+        query = query.filter(GameSummaryModel.day <= until)
+    totals = [{'username': username, 'games': games, 'bet': bet, 'won': won, 'net': net}
+              for username, games, bet, won, net in query]
+    
+    return jsonify(archive.player_stats(hot_history_games(since, until), totals))
+
+club_readers = {}  # Map of club -> read-only engine of its database, opened on first use
+
+def club_reader(club, path):
+    if club == app.config['CLUB']:
+        return reader
+    if club not in club_readers:
+        club_readers[club] = analytics.create_reader(path, 1)
+    return club_readers[club]
+
+def club_totals(engine, since, until):
+    """(username, games, bet, won, net) of every player over a club's finished games, None if unreadable"""
+    since = since.isoformat() if since else None
+    until = until.isoformat() if until else None
+    try:
+        with engine.connect() as conn:
+            return conn.exec_driver_sql(
+                'SELECT username, COUNT(*), SUM(bet), SUM(won), SUM(net) FROM game_summaries '
+                'WHERE (? IS NULL OR day >= ?) AND (? IS NULL OR day <= ?) GROUP BY username',
+                (since, since, until, until)
+            ).fetchall()
+    except exc.OperationalError:
+        return None
+
+@app.route('/api/leaderboard', methods=['GET'])
+def get_leaderboard():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        since, until = parse_date_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+    
+    # Every club's database is read at once, so the slowest club sets the pace rather than their sum
+    engines = {club: club_reader(club, path) for club, path in catalog.clubs().items()}
+    results = shards.fan_out(lambda club: club_totals(engines[club], since, until),
+                             engines, app.config['LEADERBOARD_WORKERS'])
+    
+    return jsonify({
+        'clubs': sorted(club for club, rows in results.items() if rows is not None),
+        'unavailable': sorted(club for club, rows in results.items() if rows is None),
+        'players': shards.merge_totals({club: rows for club, rows in results.items() if rows is not None})
+    })
+
+@app.route('/api/clubs', methods=['GET'])
+def get_clubs():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    members = catalog.member_counts()
+    return jsonify({
+        'club': app.config['CLUB'],
+        'clubs': [{'name': club, 'members': members.get(club, 0)} for club in catalog.clubs()]
+    })
+
+EXPORT_COLUMNS = {
+    'logs': ['game_id'] + archive.LOG_COLUMNS,
+    'results': ['game_id', 'day'] + archive.RESULT_COLUMNS
+}
+
+def export_log_rows(since=None, until=None, game_id=None, username=None):
+    """Log entries of the archive and the database, oldest first, without loading more than one game at a time"""
+    def wanted(entry):
+        day = entry['timestamp'][:10]
+        return ((not username or entry.get('username') == username)
+                and (not since or day >= since.isoformat())
+                and (not until or day <= until.isoformat()))
+    
+    # A game can end the day after its first entries, so look one partition further
+    archive_until = until + timedelta(days=1) if until else None
+    for archived in archive.iter_games(app.config['ARCHIVE_DIR'], since, archive_until, with_logs=True):
+        if game_id and archived['game_id'] != game_id:
+            continue
+        for entry in archived['logs']:
+            if wanted(entry):
+                yield {'game_id': archived['game_id'], **entry}
+    
+    # Rows in the database belong to the game of the last gameStart before them,
+    # rows from before the first gameStart to the first game, as in archive.split_games
+    starts = db.aliased(GameLogModel)
+    row_game_id = func.coalesce(
+        reports.query(func.max(starts.id)).filter(
+            starts.type == 'gameStart', starts.id <= GameLogModel.id
+        ).scalar_subquery(),
+        reports.query(func.min(starts.id)).filter(starts.type == 'gameStart').scalar_subquery()
+    )
+    
+    query = reports.query(GameLogModel, row_game_id).order_by(GameLogModel.id)
+    if username:
+        query = query.filter(GameLogModel.username == username)
+    if since:
+        query = query.filter(GameLogModel.timestamp >= datetime.combine(since, datetime.min.time()))
+    if until:
+        query = query.filter(GameLogModel.timestamp < datetime.combine(until + timedelta(days=1), datetime.min.time()))
+    if game_id:
+        query = query.filter(row_game_id == game_id)
+    
+    for log, log_game_id in query.execution_options(stream_results=True).yield_per(app.config['EXPORT_CHUNK_SIZE']):
+        yield {'game_id': log_game_id, **log.to_dict()}
+
+def export_result_rows(since=None, until=None, game_id=None, username=None):
+    """Per-player results of every game, from the summaries and the games still in the database"""
+    query = reports.query(GameSummaryModel).order_by(GameSummaryModel.game_id, GameSummaryModel.id)
+    if since:
+        query = query.filter(GameSummaryModel.day >= since)
+    if until:
+        query = query.filter(GameSummaryModel.day <= until)
+    if game_id:
+        query = query.filter(GameSummaryModel.game_id == game_id)
+    if username:
+        query = query.filter(GameSummaryModel.username == username)
+    
+    for summary in query.execution_options(stream_results=True).yield_per(app.config['EXPORT_CHUNK_SIZE']):
+        yield {
+            'game_id': summary.game_id,
+            'day': summary.day.isoformat(),
+            'username': summary.username,
+            'bet': summary.bet,
+            'won': summary.won,
+            'net': summary.net,
+            'chips': summary.chips
+        }
+    
+    for hot_game in hot_history_games(since, until):
+        if game_id and hot_game['game_id'] != game_id:
+            continue
+        for result in hot_game['results']:
+            if not username or result['username'] == username:
+                yield {'game_id': hot_game['game_id'], 'day': (hot_game['ended_at'] or hot_game['started_at'])[:10], **result}
+
+EXPORT_ROWS = {
+    'logs': export_log_rows,
+    'results': export_result_rows
+}
+
+@app.route('/api/export/<kind>', methods=['GET'])
+def export_data(kind):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    fmt = request.args.get('format', 'csv')
+    compress = request.args.get('gzip') in ('1', 'true')
+    if kind not in EXPORT_ROWS or fmt not in export.FORMATS:
+        return jsonify({'error': 'Unknown export'}), 404
+    
+    try:
+        since, until = parse_date_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+    
+    rows = EXPORT_ROWS[kind](since, until, request.args.get('game', type=int), request.args.get('player'))
+    filename = f'{kind}.{fmt}' + ('.gz' if compress else '')
+    
+    # Rows are pulled from the database as the response is written, never all at once
+    return Response(
+        stream_with_context(export.stream(rows, EXPORT_COLUMNS[kind], fmt, compress)),
+        mimetype='application/gzip' if compress else export.FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@app.cli.command('export')
+@click.argument('kind', type=click.Choice(list(EXPORT_ROWS)))
+@click.option('--format', 'fmt', type=click.Choice(list(export.FORMATS)), default='csv')
+@click.option('--gzip', 'compress', is_flag=True, help='Compress the output with gzip')
+@click.option('--since', type=click.DateTime(['%Y-%m-%d']), help='First day to include')
+@click.option('--until', type=click.DateTime(['%Y-%m-%d']), help='Last day to include')
+@click.option('--game', 'game_id', type=int, help='Only this game')
+@click.option('--player', 'username', help='Only this player')
+@click.option('--output', type=click.File('wb'), default='-', help='File to write, standard output by default')
+def export_command(kind, fmt, compress, since, until, game_id, username, output):
+    """Export game logs or player results as CSV or JSON lines"""
+    rows = EXPORT_ROWS[kind](since.date() if since else None, until.date() if until else None, game_id, username)
+    for chunk in export.stream(rows, EXPORT_COLUMNS[kind], fmt, compress):
+        output.write(chunk)
+
+@app.route('/api/tournaments', methods=['GET'])
+def get_tournaments():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    return jsonify([tournament.to_dict() for tournament in tournaments.values()])
+
+@app.route('/api/tournaments/<int:tournament_id>/tables/<int:table_id>', methods=['GET'])
+def get_tournament_table(tournament_id, table_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    tournament = tournaments.get(tournament_id)
+    if not tournament or table_id not in tournament.tables:
+        return jsonify({'error': 'Table not found'}), 404
+    
+    return jsonify(tournament.table_to_dict(table_id))
 
 # Socket events
 @socketio.on('connect')
 def on_connect():
+    start_background_tasks()
+    
+    if request.args.get('role') == 'spectator':
+        if 'user_id' not in session and not session.get('watcher'):
+            return False
+        if len(spectator_sids) >= app.config['MAX_SPECTATORS']:
+            return False
+        
+        # Spectators never touch the game, they only follow the throttled feed
+        spectator_sids.add(request.sid)
+        outbound.register(request.sid)
+        outbound.send(request.sid, 'game_state_update', game.snapshot(), state=True)
+        return
+    
     if 'user_id' not in session:
         return False
     
     user_id = session['user_id']
     username = session['username']
+    player_sids.add(request.sid)
+    outbound.register(request.sid)
     
     # Add player to the game
     with app.app_context():
@@ -716,29 +1464,39 @@ def on_connect():
             player.hands_played = player_model.hands_played
             player.hands_won = player_model.hands_won
             
-            game.add_player(player)
-            emit('game_state_update', game.to_dict(), broadcast=True)
-            emit('player_joined', {'username': username}, broadcast=True)
+            if game.add_player(player):
+                broadcast_state()
+                broadcast_event('player_joined', {'username': username})
         else:
             emit('error', {'message': f'Player {username} not found in database'})
 
 @socketio.on('disconnect')
 def on_disconnect():
+    outbound.unregister(request.sid)
+    event_guard.forget(request.sid)
+    player_sids.discard(request.sid)
+    
+    if request.sid in spectator_sids:
+        spectator_sids.discard(request.sid)
+        return
+    
     if 'user_id' in session:
         user_id = session['user_id']
         if user_id in active_players:
             username = active_players[user_id]
             game.remove_player(username)
-            emit('game_state_update', game.to_dict(), broadcast=True)
-            emit('player_left', {'username': username}, broadcast=True)
+            broadcast_state()
+            broadcast_event('player_left', {'username': username})
 
 @socketio.on('join_game')
 def on_join_game(data=None):
-    if 'user_id' not in session:
+    if 'user_id' not in session or request.sid in spectator_sids:
         emit('error', {'message': 'Not authenticated'})
         return
     
     username = session['username']
+    # Version of the state the client already rendered, e.g. from the page bootstrap
+    client_version = (data or {}).get('version')
     
     # Check if player exists in database
     with app.app_context():
@@ -754,12 +1512,15 @@ def on_join_game(data=None):
         player.hands_played = player_model.hands_played
         player.hands_won = player_model.hands_won
         
-        game.add_player(player)
-        emit('game_state_update', game.to_dict(), broadcast=True)
+        if game.add_player(player):
+            broadcast_state()
+        elif client_version != game.version:
+            # Only this client is behind, catch it up without a broadcast
+            outbound.send(request.sid, 'game_state_update', game.snapshot(), state=True)
 
 @socketio.on('leave_game')
 def on_leave_game():
-    if 'user_id' not in session:
+    if 'user_id' not in session or request.sid in spectator_sids:
         emit('error', {'message': 'Not authenticated'})
         return
     
@@ -771,16 +1532,18 @@ def on_leave_game():
         return
     
     game.remove_player(username)
-    emit('game_state_update', game.to_dict(), broadcast=True)
+    broadcast_state()
 
 @socketio.on('start_game')
+@guarded
 def on_start_game(data):
-    if 'user_id' not in session:
+    if 'user_id' not in session or request.sid in spectator_sids:
         emit('error', {'message': 'Not authenticated'})
         return
     
     small_blind = data.get('small_blind', 5)
     big_blind = data.get('big_blind', 10)
+    action_clock = data.get('action_clock') or 0
     
     game.initialize()  # Ensure game is initialized
     
@@ -788,13 +1551,19 @@ def on_start_game(data):
         emit('error', {'message': 'Need at least 2 players to start a game'})
         return
     
-    game.start_game(small_blind, big_blind)
-    emit('game_state_update', game.to_dict(), broadcast=True)
-    emit('game_started', {}, broadcast=True)
+    if action_clock < 0:
+        emit('error', {'message': 'Invalid action clock'})
+        return
+    
+    game.start_game(small_blind, big_blind, action_clock)
+    broadcast_state()
+    broadcast_event('game_started', {})
 
 @socketio.on('place_bet')
+@acknowledged
+@guarded
 def on_place_bet(data):
-    if 'user_id' not in session:
+    if 'user_id' not in session or request.sid in spectator_sids:
         emit('error', {'message': 'Not authenticated'})
         return
     
@@ -817,14 +1586,16 @@ def on_place_bet(data):
     
     success = game.place_bet(username, amount)
     if success:
-        emit('game_state_update', game.to_dict(), broadcast=True)
-        emit('bet_placed', {'username': username, 'amount': amount}, broadcast=True)
+        broadcast_state()
+        broadcast_event('bet_placed', {'username': username, 'amount': amount})
     else:
         emit('error', {'message': f'Failed to place bet for {username}'})
 
 @socketio.on('fold')
+@acknowledged
+@guarded
 def on_fold(data):
-    if 'user_id' not in session:
+    if 'user_id' not in session or request.sid in spectator_sids:
         emit('error', {'message': 'Not authenticated'})
         return
     
@@ -842,14 +1613,90 @@ def on_fold(data):
     
     success = game.fold_player(username)
     if success:
-        emit('game_state_update', game.to_dict(), broadcast=True)
-        emit('player_folded', {'username': username}, broadcast=True)
+        broadcast_state()
+        broadcast_event('player_folded', {'username': username})
     else:
         emit('error', {'message': f'Failed to fold {username}'})
 
+@socketio.on('check')
+@acknowledged
+@guarded
+def on_check(data):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    username = data.get('username')
+    
+    if not username:
+        emit('error', {'message': 'No player selected'})
+        return
+    
+    game.initialize()  # Ensure game is initialized
+    
+    if username not in game.players:
+        emit('error', {'message': f'Player {username} not in game'})
+        return
+    
+    success = game.check_player(username)
+    if success:
+        broadcast_state()
+        broadcast_event('player_checked', {'username': username})
+    else:
+        emit('error', {'message': f'{username} cannot check'})
+
+@socketio.on('undo')
+@guarded
+def on_undo(data=None):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    try:
+        count = int((data or {}).get('count', 1))
+    except (TypeError, ValueError):
+        count = 0
+    
+    if count < 1:
+        emit('error', {'message': 'Invalid count'})
+        return
+    
+    game.initialize()  # Ensure game is initialized
+    
+    delta = game.undo(count)
+    if delta:
+        broadcast_delta(delta)
+    else:
+        emit('error', {'message': 'Nothing to undo'})
+
+@socketio.on('redo')
+@guarded
+def on_redo(data=None):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    try:
+        count = int((data or {}).get('count', 1))
+    except (TypeError, ValueError):
+        count = 0
+    
+    if count < 1:
+        emit('error', {'message': 'Invalid count'})
+        return
+    
+    game.initialize()  # Ensure game is initialized
+    
+    delta = game.redo(count)
+    if delta:
+        broadcast_delta(delta)
+    else:
+        emit('error', {'message': 'Nothing to redo'})
+
 @socketio.on('next_round')
-def on_next_round():
-    if 'user_id' not in session:
+@guarded
+def on_next_round(data=None):
+    if 'user_id' not in session or request.sid in spectator_sids:
         emit('error', {'message': 'Not authenticated'})
         return
     
@@ -857,14 +1704,55 @@ def on_next_round():
     
     success = game.next_round()
     if success:
-        emit('game_state_update', game.to_dict(), broadcast=True)
-        emit('round_changed', {'round': game.current_round}, broadcast=True)
+        broadcast_state()
+        broadcast_event('round_changed', {'round': game.current_round})
     else:
         emit('error', {'message': 'Failed to advance to next round'})
 
+@socketio.on('next_hand')
+@guarded
+def on_next_hand(data=None):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    game.initialize()  # Ensure game is initialized
+    
+    if game.active and game.pot:
+        emit('error', {'message': 'Distribute the pot before the next hand'})
+        return
+    
+    # The whole transition goes out as one state frame
+    if game.next_hand():
+        broadcast_state()
+    else:
+        emit('error', {'message': 'Failed to start next hand'})
+
+@socketio.on('sit_out')
+@guarded
+def on_sit_out(data):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    username = data.get('username')
+    
+    if not username:
+        emit('error', {'message': 'No player selected'})
+        return
+    
+    game.initialize()  # Ensure game is initialized
+    
+    if game.sit_out(username, bool(data.get('sitting_out', True))):
+        broadcast_event('player_updated', game.players[username].to_dict())
+        broadcast_state()
+    else:
+        emit('error', {'message': f'Player {username} not in game'})
+
 @socketio.on('distribute_pot')
+@guarded
 def on_distribute_pot(data):
-    if 'user_id' not in session:
+    if 'user_id' not in session or request.sid in spectator_sids:
         emit('error', {'message': 'Not authenticated'})
         return
     
@@ -887,14 +1775,72 @@ def on_distribute_pot(data):
     
     success = game.distribute_pot(username, amount)
     if success:
-        emit('game_state_update', game.to_dict(), broadcast=True)
-        emit('pot_distributed', {'username': username, 'amount': amount}, broadcast=True)
+        broadcast_state()
+        broadcast_event('pot_distributed', {'username': username, 'amount': amount})
     else:
         emit('error', {'message': f'Failed to distribute pot to {username}'})
 
+@socketio.on('showdown')
+@guarded
+def on_showdown(data):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    game.initialize()  # Ensure game is initialized
+    
+    try:
+        board = evaluator.parse_cards(data.get('board') or [])
+        hole_cards = {username: evaluator.parse_cards(cards) for username, cards in (data.get('hands') or {}).items()}
+    except ValueError as e:
+        emit('error', {'message': str(e)})
+        return
+    
+    cards = board + [card for hand in hole_cards.values() for card in hand]
+    if len(board) != 5 or any(len(hand) != 2 for hand in hole_cards.values()):
+        emit('error', {'message': 'Enter the five board cards and two cards for each player shown'})
+        return
+    if len(set(cards)) != len(cards):
+        emit('error', {'message': 'The same card was entered twice'})
+        return
+    
+    result = game.showdown(board, hole_cards)
+    if result is None:
+        emit('error', {'message': 'Failed to settle the pot from the cards'})
+        return
+    
+    broadcast_state()
+    broadcast_event('showdown_result', {'board': [evaluator.card_name(card) for card in board], 'hands': result})
+
+@socketio.on('calculate_equity')
+@guarded
+def on_calculate_equity(data):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    try:
+        board = evaluator.parse_cards(data.get('board') or [])
+        hands = {username: evaluator.parse_cards(cards) for username, cards in (data.get('hands') or {}).items()}
+    except ValueError as e:
+        emit('error', {'message': str(e)})
+        return
+    
+    cards = board + [card for hand in hands.values() for card in hand]
+    if len(board) > 5 or len(hands) < 2 or any(len(hand) != 2 for hand in hands.values()):
+        emit('error', {'message': 'Enter two cards for at least two players and up to five board cards'})
+        return
+    if len(set(cards)) != len(cards):
+        emit('error', {'message': 'The same card was entered twice'})
+        return
+    
+    # Sampling can take a moment, it runs off the event handler
+    socketio.start_background_task(send_equity, hands, board)
+
 @socketio.on('end_game')
-def on_end_game():
-    if 'user_id' not in session:
+@guarded
+def on_end_game(data=None):
+    if 'user_id' not in session or request.sid in spectator_sids:
         emit('error', {'message': 'Not authenticated'})
         return
     
@@ -902,14 +1848,19 @@ def on_end_game():
     
     success = game.end_game()
     if success:
-        emit('game_state_update', game.to_dict(), broadcast=True)
-        emit('game_ended', {}, broadcast=True)
+        broadcast_state()
+        broadcast_event('game_ended', {})
+        
+        # Move the finished game to the archive off the request path
+        chips = {username: player.chips for username, player in game.players.items()}
+        socketio.start_background_task(archive_finished_games, chips)
     else:
         emit('error', {'message': 'Failed to end game'})
 
 @socketio.on('reorder_players')
+@guarded
 def on_reorder_players(data):
-    if 'user_id' not in session:
+    if 'user_id' not in session or request.sid in spectator_sids:
         emit('error', {'message': 'Not authenticated'})
         return
     
@@ -923,13 +1874,14 @@ def on_reorder_players(data):
     
     success = game.reorder_players(player_order)
     if success:
-        emit('game_state_update', game.to_dict(), broadcast=True)
+        broadcast_state()
     else:
         emit('error', {'message': 'Failed to reorder players'})
 
 @socketio.on('adjust_chips')
+@guarded
 def on_adjust_chips(data):
-    if 'user_id' not in session:
+    if 'user_id' not in session or request.sid in spectator_sids:
         emit('error', {'message': 'Not authenticated'})
         return
     
@@ -950,20 +1902,148 @@ def on_adjust_chips(data):
         emit('error', {'message': 'Invalid amount'})
         return
     
-    player = game.players[username]
-    player.adjust_chips(amount)
+    game.adjust_chips(username, amount)
+    
+    broadcast_event('player_updated', game.players[username].to_dict())
+    broadcast_state()
+
+@socketio.on('create_tournament')
+@guarded
+def on_create_tournament(data):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    usernames = data.get('players', [])
+    starting_chips = data.get('starting_chips', 1000)
+    table_size = data.get('table_size', 9)
+    levels = data.get('levels')
+    
+    if len(set(usernames)) != len(usernames) or len(usernames) < 2:
+        emit('error', {'message': 'Need at least 2 different players for a tournament'})
+        return
+    
+    # Tables of two could leave a lone player at a table that cannot be broken up
+    if not starting_chips or starting_chips <= 0 or not table_size or table_size < 3:
+        emit('error', {'message': 'Invalid tournament settings'})
+        return
+    
+    if levels is not None and (not levels or any(
+            level.get('small_blind', 0) <= 0 or level.get('big_blind', 0) <= 0 or level.get('duration', 0) <= 0
+            for level in levels)):
+        emit('error', {'message': 'Invalid blind levels'})
+        return
     
-    # Update player in database
     with app.app_context():
-        player_model = PlayerModel.query.filter_by(username=username).first()
-        if player_model:
-            player_model.chips = player.chips
-            player_model.total_won = player.total_won
-            player_model.total_lost = player.total_lost
-            db.session.commit()
+        known = {player.username for player in PlayerModel.query.filter(PlayerModel.username.in_(usernames))}
+    missing = [username for username in usernames if username not in known]
+    if missing:
+        emit('error', {'message': f'Players not found: {", ".join(missing)}'})
+        return
+    
+    tournament_id = next(tournament_ids)
+    tournament = Tournament(tournament_id, data.get('name') or f'Tournament {tournament_id}', usernames,
+                            timer_wheel, notify_tournament, starting_chips, table_size, levels,
+                            new_table=table_pool.table if table_pool else Game)
+    tournaments[tournament_id] = tournament
+    broadcast_event('tournament_update', tournament.to_dict())
+
+@socketio.on('start_tournament')
+@guarded
+def on_start_tournament(data):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    tournament = tournaments.get(data.get('tournament_id'))
+    if not tournament:
+        emit('error', {'message': 'Tournament not found'})
+        return
+    
+    if not tournament.start():
+        emit('error', {'message': 'Tournament already started'})
+        return
+    
+    broadcast_event('tournament_update', tournament.to_dict())
+
+TOURNAMENT_ACTIONS = {'start_hand', 'end_hand', 'next_round', 'place_bet', 'fold', 'distribute_pot'}
+
+@socketio.on('tournament_action')
+@guarded
+def on_tournament_action(data):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    tournament = tournaments.get(data.get('tournament_id'))
+    table_id = data.get('table_id')
+    action = data.get('action')
+    username = data.get('username')
+    amount = data.get('amount')
+    
+    if not tournament or table_id not in tournament.tables:
+        emit('error', {'message': 'Tournament table not found'})
+        return
+    
+    if action not in TOURNAMENT_ACTIONS:
+        emit('error', {'message': f'Unknown tournament action {action}'})
+        return
+    
+    if action in ('place_bet', 'distribute_pot') and (
+            not isinstance(amount, int) or isinstance(amount, bool) or amount <= 0):
+        emit('error', {'message': 'Invalid amount'})
+        return
+    
+    table = tournament.tables[table_id]
+    moves = None
+    
+    if action == 'end_hand' and table.pot:
+        emit('error', {'message': 'Distribute the pot before ending the hand'})
+        return
+    
+    if action == 'start_hand':
+        success = tournament.start_hand(table_id)
+    elif action == 'end_hand':
+        moves = tournament.finish_hand(table_id)
+        success = moves is not None
+    elif action == 'next_round':
+        success = table.next_round()
+    elif username not in table.players:
+        emit('error', {'message': f'Player {username} not at this table'})
+        return
+    elif action == 'place_bet':
+        success = table.place_bet(username, amount)
+    elif action == 'distribute_pot':
+        success = table.distribute_pot(username, amount)
+    else:  # fold
+        success = table.fold_player(username)
+    
+    if success:
+        broadcast_tournament_table(tournament, table_id, moves)
+    else:
+        emit('error', {'message': f'Failed to {action.replace("_", " ")}'})
+
+@socketio.on('eliminate_player')
+@guarded
+def on_eliminate_player(data):
+    if 'user_id' not in session or request.sid in spectator_sids:
+        emit('error', {'message': 'Not authenticated'})
+        return
+    
+    tournament = tournaments.get(data.get('tournament_id'))
+    username = data.get('username')
+    
+    if not tournament or username not in tournament.seats:
+        emit('error', {'message': f'Player {username} not in tournament'})
+        return
+    
+    table_id = tournament.seats[username]
+    moves = tournament.eliminate(username)
+    if moves is None:
+        emit('error', {'message': f'Cannot eliminate {username} during a hand'})
+        return
     
-    emit('player_updated', player.to_dict(), broadcast=True)
-    emit('game_state_update', game.to_dict(), broadcast=True)
+    broadcast_tournament_table(tournament, table_id, moves)
 
 if __name__ == '__main__':
     socketio.run(app, debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
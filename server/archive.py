@@ -0,0 +1,201 @@
+"""Cold storage for finished games.
+
+Every finished game is written to its own gzip-compressed file, partitioned
+into one directory per day the game ended. Inside a file the log and the
+per-player results are stored column by column, which keeps similar values
+together so they compress well. Once a game is archived its rows are deleted
+from the hot database, which then only holds the game in progress.
+"""
+import glob
+import gzip
+import json
+import os
+import shutil
+from datetime import date
+
+LOG_COLUMNS = ['id', 'timestamp', 'type', 'username', 'amount', 'round', 'pot']
+RESULT_COLUMNS = ['username', 'bet', 'won', 'net', 'chips']
+
+# Log entries that move chips from a player into the pot
+BET_TYPES = {'bet', 'smallBlind', 'bigBlind'}
+
+
+def to_columns(rows, columns):
+    """Turn a list of dicts into a dict of equally long lists"""
+    return {column: [row.get(column) for row in rows] for column in columns}
+
+
+def from_columns(table):
+    """Turn a dict of equally long lists back into a list of dicts, leaving out unset values"""
+    names = list(table)
+    return [{name: value for name, value in zip(names, values) if value is not None}
+            for values in zip(*table.values())]
+
+
+def split_games(logs):
+    """Split log entries ordered by id into one list per game.
+
+    A game runs from its gameStart entry up to the next one. Entries logged
+    before the first gameStart, e.g. players joining, go with the first game.
+    """
+    games = []
+    started = False  # Whether the last list already has its gameStart
+    for entry in logs:
+        if not games or (entry['type'] == 'gameStart' and started):
+            games.append([])
+            started = False
+        if entry['type'] == 'gameStart':
+            started = True
+        games[-1].append(entry)
+    return games
+
+
+def game_results(logs, chips=None):
+    """Chips each player put in and took out of the pot during one game"""
+    results = {}
+    for entry in logs:
+        username = entry.get('username')
+        if not username:
+            continue
+
+        result = results.setdefault(username, {'username': username, 'bet': 0, 'won': 0})
+        if entry['type'] in BET_TYPES:
+            result['bet'] += entry.get('amount', 0)
+        elif entry['type'] == 'refund':
+            result['bet'] -= entry.get('amount', 0)
+        elif entry['type'] == 'distribution':
+            result['won'] += entry.get('amount', 0)
+        elif entry['type'] == 'reclaim':
+            result['won'] -= entry.get('amount', 0)
+
+    for result in results.values():
+        result['net'] = result['won'] - result['bet']
+        # Final stacks are only known for the game that just ended
+        result['chips'] = (chips or {}).get(result['username'])
+    return list(results.values())
+
+
+def summarize(logs, chips=None):
+    """Game record without its log, as listed in the history"""
+    start = next((entry for entry in logs if entry['type'] == 'gameStart'), logs[0])
+    end = next((entry for entry in reversed(logs) if entry['type'] == 'gameEnd'), None)
+    return {
+        'game_id': start['id'],
+        'started_at': start['timestamp'],
+        'ended_at': end['timestamp'] if end else None,
+        'results': game_results(logs, chips)
+    }
+
+
+def game_path(archive_dir, game_id, ended_at):
+    return os.path.join(archive_dir, ended_at[:10], f'game-{game_id}.json.gz')
+
+
+def write_game(archive_dir, logs, chips=None):
+    """Archive one game and return the path of its file.
+
+    Archiving the same game again replaces its file. Raises FileExistsError if
+    the file belongs to another game with the same id, which is never overwritten.
+    """
+    summary = summarize(logs, chips)
+    ended_at = summary['ended_at'] or logs[-1]['timestamp']
+    record = {
+        'game_id': summary['game_id'],
+        'started_at': summary['started_at'],
+        'ended_at': summary['ended_at'],
+        'results': to_columns(summary['results'], RESULT_COLUMNS),
+        'logs': to_columns(logs, LOG_COLUMNS)
+    }
+
+    path = game_path(archive_dir, summary['game_id'], ended_at)
+    if os.path.exists(path) and read_game(path, with_logs=False)['started_at'] != summary['started_at']:
+        raise FileExistsError(f'{path} already holds another game')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write under a temporary name first, so a crash never leaves a truncated archive behind
+    temp_path = path + '.tmp'
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+        json.dump(record, f, separators=(',', ':'))
+    os.replace(temp_path, path)
+    return path
+
+
+def read_game(path, with_logs=True):
+    """Load an archived game, with its results and optionally its log as lists of dicts"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        record = json.load(f)
+
+    record['results'] = from_columns(record['results'])
+    if with_logs:
+        record['logs'] = from_columns(record['logs'])
+    else:
+        del record['logs']
+    return record
+
+
+def iter_games(archive_dir, since=None, until=None, with_logs=False):
+    """Archived games that ended between the given dates, oldest first.
+
+    Whole partitions outside the range are skipped without being opened.
+    """
+    for day in partitions(archive_dir):
+        if (since and day < since) or (until and day > until):
+            continue
+
+        for game_id in partition_game_ids(archive_dir, day):
+            yield read_game(game_path(archive_dir, game_id, day.isoformat()), with_logs)
+
+
+def partitions(archive_dir):
+    """Dates of the partitions in the archive, oldest first"""
+    if not os.path.isdir(archive_dir):
+        return []
+
+    days = []
+    for partition in os.listdir(archive_dir):
+        try:
+            days.append(date.fromisoformat(partition))
+        except ValueError:
+            continue
+    return sorted(days)
+
+
+def partition_game_ids(archive_dir, day):
+    """Ids of the games archived in one partition, read from the file names"""
+    paths = glob.glob(os.path.join(archive_dir, day.isoformat(), 'game-*.json.gz'))
+    return sorted(int(os.path.basename(path)[5:-8]) for path in paths)
+
+
+def max_game_id(archive_dir):
+    """Highest id of an archived game, 0 for an empty archive"""
+    return max((game_id for day in partitions(archive_dir) for game_id in partition_game_ids(archive_dir, day)),
+               default=0)
+
+
+def delete_partitions_before(archive_dir, day):
+    """Delete every partition older than the given date and return how many were deleted"""
+    expired = [partition for partition in partitions(archive_dir) if partition < day]
+    for partition in expired:
+        shutil.rmtree(os.path.join(archive_dir, partition.isoformat()))
+    return len(expired)
+
+
+def find_game(archive_dir, game_id):
+    """Load one archived game with its log, or None if it is not archived"""
+    paths = glob.glob(os.path.join(archive_dir, '*', f'game-{game_id}.json.gz'))
+    return read_game(paths[0]) if paths else None
+
+
+def player_stats(games, totals=()):
+    """Totals per player over the results of the given games, added to already known totals"""
+    stats = {player['username']: dict(player) for player in totals}
+    for game in games:
+        for result in game['results']:
+            player = stats.setdefault(result['username'], {
+                'username': result['username'], 'games': 0, 'bet': 0, 'won': 0, 'net': 0
+            })
+            player['games'] += 1
+            player['bet'] += result['bet']
+            player['won'] += result['won']
+            player['net'] += result['net']
+    return sorted(stats.values(), key=lambda player: player['net'], reverse=True)
@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import deque
+
+
+class ThrottledFeed:
+    """Forward published frames at most max_rate times per second.
+
+    Frames published while a send is pending replace each other, so receivers
+    always get the latest state and never a backlog of stale ones.
+    """
+
+    def __init__(self, socketio, send, max_rate):
+        self.socketio = socketio
+        self.send = send
+        self.interval = 1.0 / max_rate
+        self._latest = None
+        self._scheduled = False
+        self._last_sent = 0.0
+        self._lock = threading.Lock()
+
+    def publish(self, frame):
+        """Queue a frame, replacing any frame that has not been sent yet"""
+        with self._lock:
+            self._latest = frame
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        self.socketio.start_background_task(self._flush)
+
+    def _flush(self):
+        delay = self._last_sent + self.interval - time.monotonic()
+        if delay > 0:
+            self.socketio.sleep(delay)
+
+        with self._lock:
+            frame = self._latest
+            self._latest = None
+            self._scheduled = False
+            self._last_sent = time.monotonic()
+
+        self.send(frame)
+
+
+class OutboundQueue:
+    """Frames waiting to be sent to one connection.
+
+    Only one frame is in flight at a time and the next one goes out when the
+    client acknowledges it, so a slow link backs up here instead of in the
+    socket buffers. Queued state frames collapse to the newest one, discrete
+    events are kept in order.
+    """
+
+    def __init__(self, socketio, sid, max_depth):
+        self.socketio = socketio
+        self.sid = sid
+        self.max_depth = max_depth
+        self.frames = deque()  # (event, data, is_state)
+        self.in_flight_since = None
+        self.saturated_since = None
+        self.sent = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def push(self, event, data, state=False):
+        """Queue a frame and send it right away if nothing is in flight"""
+        with self._lock:
+            if state:
+                # Latest state wins, a queued older state is never worth sending
+                for i, frame in enumerate(self.frames):
+                    if frame[2]:
+                        del self.frames[i]
+                        self.dropped += 1
+                        break
+
+            self.frames.append((event, data, state))
+
+            # Past the bound, give up the oldest events, the next state covers them
+            while len(self.frames) > self.max_depth:
+                oldest = next((i for i, frame in enumerate(self.frames) if not frame[2]), 0)
+                del self.frames[oldest]
+                self.dropped += 1
+
+            self._update_saturation()
+            frame = self._take_next()
+
+        if frame:
+            self._send(frame)
+
+    def depth(self):
+        return len(self.frames)
+
+    def is_saturated(self, now, ack_timeout, saturation_timeout):
+        """Whether the queue has been full or stuck on an unacknowledged frame for too long"""
+        with self._lock:
+            if self.in_flight_since is not None and now - self.in_flight_since > ack_timeout:
+                return True
+            return self.saturated_since is not None and now - self.saturated_since > saturation_timeout
+
+    def _take_next(self):
+        # Must be called with the lock held
+        if self.in_flight_since is not None or not self.frames:
+            return None
+        self.in_flight_since = time.monotonic()
+        return self.frames.popleft()
+
+    def _update_saturation(self):
+        # Must be called with the lock held
+        if len(self.frames) >= self.max_depth:
+            if self.saturated_since is None:
+                self.saturated_since = time.monotonic()
+        else:
+            self.saturated_since = None
+
+    def _send(self, frame):
+        event, data, _ = frame
+        self.sent += 1
+        self.socketio.emit(event, data, to=self.sid, callback=self._on_ack)
+
+    def _on_ack(self, *args):
+        with self._lock:
+            self.in_flight_since = None
+            self._update_saturation()
+            frame = self._take_next()
+
+        if frame:
+            self._send(frame)
+
+
+class Outbound:
+    """Outbound queues of all connections, so a slow client only delays itself"""
+
+    def __init__(self, socketio, max_depth, ack_timeout, saturation_timeout):
+        self.socketio = socketio
+        self.max_depth = max_depth
+        self.ack_timeout = ack_timeout
+        self.saturation_timeout = saturation_timeout
+        self.queues = {}  # Map of socket id -> OutboundQueue
+        self.disconnected = 0  # Connections dropped for staying saturated
+
+    def register(self, sid):
+        self.queues[sid] = OutboundQueue(self.socketio, sid, self.max_depth)
+
+    def unregister(self, sid):
+        self.queues.pop(sid, None)
+
+    def send(self, sid, event, data, state=False):
+        """Queue a frame for one connection"""
+        queue = self.queues.get(sid)
+        if queue:
+            queue.push(event, data, state)
+
+    def broadcast(self, sids, event, data, state=False):
+        """Queue a frame for each of the given connections"""
+        for sid in list(sids):
+            self.send(sid, event, data, state)
+
+    def saturated(self):
+        """Socket ids whose queues stayed saturated past the configured timeouts"""
+        now = time.monotonic()
+        return [sid for sid, queue in list(self.queues.items())
+                if queue.is_saturated(now, self.ack_timeout, self.saturation_timeout)]
+
+    def stats(self):
+        """Queue depths and counters for instrumentation"""
+        queues = list(self.queues.values())
+        return {
+            'connections': len(queues),
+            'max_depth': max((queue.depth() for queue in queues), default=0),
+            'total_depth': sum(queue.depth() for queue in queues),
+            'sent': sum(queue.sent for queue in queues),
+            'dropped': sum(queue.dropped for queue in queues),
+            'disconnected': self.disconnected,
+            'depths': {queue.sid: queue.depth() for queue in queues}
+        }
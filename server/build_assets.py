@@ -0,0 +1,170 @@
+"""Build minified, fingerprinted and precompressed static assets.
+
+Run with `flask build-assets` (or `python build_assets.py`) before starting the
+server. Output goes to static/dist together with a manifest that maps source
+paths to their hashed names, which the templates resolve through `asset_url`.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:  # Brotli variants are only written when the module is available
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+
+# Source files relative to the static folder
+ASSETS = ['css/styles.css', 'js/client.js', 'js/ui.js']
+
+
+def _split_strings(source, quotes):
+    """Split source into (is_literal, text) chunks with comments removed.
+
+    Minifiers only rewrite the code chunks, so string contents are never touched.
+    """
+    chunks = []
+    code = []
+    code_start = 0
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char in quotes:
+            end = _skip_literal(source, i)
+            code.append(source[code_start:i])
+            chunks.append((False, ''.join(code)))
+            chunks.append((True, source[i:end]))
+            code = []
+            code_start = i = end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            code.append(source[code_start:i])
+            code_start = i = len(source) if end == -1 else end + 2
+        elif '`' in quotes and source.startswith('//', i):
+            end = source.find('\n', i)
+            code.append(source[code_start:i])
+            code_start = i = len(source) if end == -1 else end
+        else:
+            i += 1
+    code.append(source[code_start:])
+    chunks.append((False, ''.join(code)))
+    return chunks
+
+
+def _skip_literal(source, start):
+    """Return the index just past the string or template literal starting at start"""
+    quote = source[start]
+    i = start + 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote:
+            return i + 1
+        if quote == '`' and source.startswith('${', i):
+            # Skip the embedded expression, which may itself contain literals
+            depth = 1
+            i += 2
+            while i < len(source) and depth:
+                if source[i] in '\'"`':
+                    i = _skip_literal(source, i)
+                    continue
+                if source[i] == '{':
+                    depth += 1
+                elif source[i] == '}':
+                    depth -= 1
+                i += 1
+            continue
+        i += 1
+    return i
+
+
+def minify_js(source):
+    """Strip comments, indentation and blank lines.
+
+    Line breaks are kept so automatic semicolon insertion behaves exactly as in
+    the source. Regular expression literals are not recognised, so they must not
+    contain quotes or comment markers.
+    """
+    parts = []
+    for is_literal, text in _split_strings(source, '\'"`'):
+        if not is_literal:
+            text = re.sub(r'[ \t]*\n\s*', '\n', text)
+        parts.append(text)
+    return ''.join(parts).strip() + '\n'
+
+
+def minify_css(source):
+    """Strip comments and whitespace that does not affect the stylesheet"""
+    parts = []
+    for is_literal, text in _split_strings(source, '\'"'):
+        if not is_literal:
+            text = re.sub(r'\s+', ' ', text)
+            text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+            text = re.sub(r':\s+', ':', text)
+            text = text.replace(';}', '}')
+        parts.append(text)
+    return ''.join(parts).strip()
+
+
+MINIFIERS = {
+    '.js': minify_js,
+    '.css': minify_css
+}
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Build all assets into dist_dir and return the manifest"""
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+
+    manifest = {}
+    for asset in ASSETS:
+        with open(os.path.join(static_dir, asset), encoding='utf-8') as f:
+            source = f.read()
+
+        base, ext = os.path.splitext(asset)
+        data = MINIFIERS[ext](source).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed_name = f'{base}.{digest}{ext}'
+
+        target = os.path.join(dist_dir, hashed_name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        _write(target, data)
+        # mtime=0 keeps the compressed output reproducible
+        _write(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(target + '.br', brotli.compress(data, quality=11))
+
+        manifest[asset] = hashed_name
+        print(f'{asset} -> dist/{hashed_name} ({len(source)} -> {len(data)} bytes)')
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def load_manifest(dist_dir=DIST_DIR):
+    """Load the manifest written by build(), or an empty one if assets were not built"""
+    try:
+        with open(os.path.join(dist_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+if __name__ == '__main__':
+    build()
@@ -0,0 +1,248 @@
+"""All-in equity: how often each hand wins or ties once the board is dealt out.
+
+With few cards left to come every runout is enumerated and the result is
+exact. Otherwise runouts are sampled at random, split into batches that run
+in parallel on a process pool when there are enough of them to be worth it.
+Results are kept in an LRU cache, since the same spot is asked for again by
+every client that shows it. Heads-up hands before the flop are looked up in
+a 169x169 table of starting hand classes, filled in ahead of time and kept on
+disk.
+"""
+import itertools
+import json
+import os
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import evaluator
+
+EXACT_LIMIT = 20000  # Most runouts enumerated instead of sampled
+SAMPLES = 20000  # Runouts sampled when there are more
+BATCH_SIZE = 5000  # Sampled runouts per process pool task
+PREFLOP_SAMPLES = 50000  # Runouts sampled for one entry of the preflop table
+CACHE_SIZE = 1024  # Spots remembered by the LRU cache
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _tally(hands, board, runouts):
+    """Wins, ties and pot shares of each hand over the given runouts of the board"""
+    evaluate7 = evaluator.evaluate7
+    count = len(hands)
+    wins = [0] * count
+    ties = [0] * count
+    shares = [0.0] * count
+    total = 0
+
+    for runout in runouts:
+        cards = board + runout
+        values = [evaluate7(first, second, *cards) for first, second in hands]
+        best = max(values)
+        winners = [i for i, value in enumerate(values) if value == best]
+        if len(winners) == 1:
+            wins[winners[0]] += 1
+            shares[winners[0]] += 1
+        else:
+            for i in winners:
+                ties[i] += 1
+                shares[i] += 1 / len(winners)
+        total += 1
+    return wins, ties, shares, total
+
+
+def _sample(hands, board, deck, samples, seed):
+    """Tally a batch of random runouts, run in a pool worker"""
+    rng = random.Random(seed)
+    need = 5 - len(board)
+    return _tally(hands, board, (tuple(rng.sample(deck, need)) for _ in range(samples)))
+
+
+def _merge(results):
+    wins, ties, shares, total = results[0]
+    for more_wins, more_ties, more_shares, more_total in results[1:]:
+        wins = [a + b for a, b in zip(wins, more_wins)]
+        ties = [a + b for a, b in zip(ties, more_ties)]
+        shares = [a + b for a, b in zip(shares, more_shares)]
+        total += more_total
+    return wins, ties, shares, total
+
+
+def get_pool(workers):
+    """Process pool shared by all calculations, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def runout_count(hands, board, dead=()):
+    """Number of ways the rest of the board can come"""
+    left = 52 - len(board) - 2 * len(hands) - len(dead)
+    return _combinations(left, 5 - len(board))
+
+
+def _combinations(n, k):
+    count = 1
+    for i in range(k):
+        count = count * (n - i) // (i + 1)
+    return count
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _calculate(hands, board, dead, samples, workers):
+    used = set(board) | set(dead) | {card for hand in hands for card in hand}
+    deck = [card for card in range(52) if card not in used]
+
+    if runout_count(hands, board, dead) <= EXACT_LIMIT:
+        return _tally(hands, board, itertools.combinations(deck, 5 - len(board))), True
+
+    batches = [min(BATCH_SIZE, samples - start) for start in range(0, samples, BATCH_SIZE)]
+    seeds = [random.getrandbits(64) for _ in batches]
+    if workers > 1 and len(batches) > 1 and len(hands) > 2:
+        # Multi-way spots cost an evaluation per hand and runout, spread them over processes
+        futures = [get_pool(workers).submit(_sample, hands, board, deck, size, seed)
+                   for size, seed in zip(batches, seeds)]
+        return _merge([future.result() for future in futures]), False
+    return _merge([_sample(hands, board, deck, size, seed) for size, seed in zip(batches, seeds)]), False
+
+
+def calculate(hands, board=(), dead=(), samples=SAMPLES, workers=1):
+    """Win, tie and equity (share of the pot) of each hand, in the order given.
+
+    hands are pairs of cards, board holds up to five cards and dead cards are
+    known to be out of the deck. Returns (results, exact).
+    """
+    # Sorted cards, so the same spot entered in another order hits the cache
+    hands = tuple(tuple(sorted(hand)) for hand in hands)
+    (wins, ties, shares, total), exact = _calculate(hands, tuple(sorted(board)), tuple(sorted(dead)), samples, workers)
+    return [{'win': wins[i] / total, 'tie': ties[i] / total, 'equity': shares[i] / total}
+            for i in range(len(hands))], exact
+
+
+def hand_class(first, second):
+    """Starting hand class of two cards, like 'AA', 'AKs' or 'T9o'"""
+    high, low = sorted((first >> 2, second >> 2), reverse=True)
+    name = evaluator.RANKS[high] + evaluator.RANKS[low]
+    if high == low:
+        return name
+    return name + ('s' if first & 3 == second & 3 else 'o')
+
+
+# The 169 classes: 13 pairs, 78 suited and 78 offsuit hands
+HAND_CLASSES = [evaluator.RANKS[high] + evaluator.RANKS[low] + suffix
+                for high in range(12, -1, -1) for low in range(high, -1, -1)
+                for suffix in ([''] if high == low else ['s', 'o'])]
+CLASS_INDEX = {name: i for i, name in enumerate(HAND_CLASSES)}
+
+
+def _class_hands(name, used):
+    """Every two cards of a class that do not use the given cards"""
+    high, low = evaluator.RANKS.index(name[0]), evaluator.RANKS.index(name[1])
+    hands = []
+    for first_suit in range(4):
+        for second_suit in range(4):
+            first, second = high * 4 + first_suit, low * 4 + second_suit
+            if first in used or second in used or first == second:
+                continue
+            if (high == low and first_suit >= second_suit) or \
+                    (len(name) == 3 and (first_suit == second_suit) != (name[2] == 's')):
+                continue
+            hands.append((first, second))
+    return hands
+
+
+def class_matchup(first_class, second_class, samples=PREFLOP_SAMPLES, seed=None):
+    """Win and tie of one class against another before the flop, over all suits they can have"""
+    rng = random.Random(seed)
+    firsts = _class_hands(first_class, ())
+    wins = ties = total = 0
+    # Suits are drawn again for every batch of runouts, so each suit combination counts as often as it occurs
+    batch = 200
+    for _ in range(0, samples, batch):
+        first = rng.choice(firsts)
+        seconds = _class_hands(second_class, set(first))
+        if not seconds:
+            continue
+        second = rng.choice(seconds)
+        hand_wins, hand_ties, _, count = _sample((first, second), (), [
+            card for card in range(52) if card not in first and card not in second
+        ], batch, rng.getrandbits(64))
+        wins += hand_wins[0]
+        ties += hand_ties[0]
+        total += count
+    return wins / total, ties / total
+
+
+class PreflopTable:
+    """Equity of every starting hand class against every other, filled in by fill() and saved to disk"""
+
+    def __init__(self, path, samples=PREFLOP_SAMPLES):
+        self.path = path
+        self.samples = samples
+        self.lock = threading.Lock()
+        self.table = [[None] * len(HAND_CLASSES) for _ in HAND_CLASSES]
+        if os.path.exists(path):
+            with open(path) as f:
+                self.table = json.load(f)
+
+    def __len__(self):
+        """Number of matchups known"""
+        return sum(entry is not None for row in self.table for entry in row)
+
+    def lookup(self, first_class, second_class):
+        """(win, tie) of the first class, or None if the matchup has not been filled in.
+
+        A missing entry is never computed here: it takes a large sample and a
+        rewrite of the whole file, far too slow for a request.
+        """
+        entry = self.table[CLASS_INDEX[first_class]][CLASS_INDEX[second_class]]
+        return tuple(entry) if entry is not None else None
+
+    def store(self, i, j, result):
+        win, tie = result
+        with self.lock:
+            self.table[i][j] = [win, tie]
+            if i != j:
+                self.table[j][i] = [1 - win - tie, tie]
+
+    def missing(self):
+        """Matchups not computed yet, each pair of classes once"""
+        return [(i, j) for i in range(len(HAND_CLASSES)) for j in range(i, len(HAND_CLASSES))
+                if self.table[i][j] is None]
+
+    def save(self):
+        # Write under a temporary name first, so a crash never leaves a truncated table behind
+        with self.lock:
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(self.table, f, separators=(',', ':'))
+            os.replace(temp_path, self.path)
+
+    def fill(self, workers=1, progress=None):
+        """Compute every missing matchup, on a process pool, saving as it goes"""
+        missing = self.missing()
+        pool = get_pool(workers)
+        futures = {pool.submit(class_matchup, HAND_CLASSES[i], HAND_CLASSES[j], self.samples): (i, j)
+                   for i, j in missing}
+        for done, future in enumerate(futures, 1):
+            i, j = futures[future]
+            self.store(i, j, future.result())
+            if done % 500 == 0 or done == len(futures):
+                self.save()
+                if progress:
+                    progress(done, len(futures))
+        return len(missing)
+
+    def calculate(self, hands):
+        """Results of two hands before the flop, like calculate() returns, or None if not in the table"""
+        entry = self.lookup(hand_class(*hands[0]), hand_class(*hands[1]))
+        if entry is None:
+            return None
+        win, tie = entry
+        loss = 1 - win - tie
+        return [{'win': win, 'tie': tie, 'equity': win + tie / 2},
+                {'win': loss, 'tie': tie, 'equity': loss + tie / 2}]
@@ -0,0 +1,71 @@
+"""Streaming encoders for exports.
+
+Rows come in as an iterator of dicts and leave as an iterator of chunks, so an
+export of any size is produced with a small, constant amount of memory: the
+rows are pulled in chunks from the source as the output is consumed.
+"""
+import csv
+import io
+import json
+import zlib
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson'
+}
+
+CHUNK_ROWS = 500  # Rows encoded per output chunk
+
+
+def encode_csv(rows, columns):
+    """CSV text with a header row, in chunks of CHUNK_ROWS rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode_jsonl(rows, columns):
+    """One JSON object per line, in chunks of CHUNK_ROWS rows"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({column: row.get(column) for column in columns}, separators=(',', ':')))
+        if len(lines) == CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'jsonl': encode_jsonl
+}
+
+
+def gzip_chunks(chunks):
+    """Compress a stream of text chunks into a stream of gzip bytes"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(rows, columns, fmt, compress=False):
+    """Encode rows in the given format, as bytes, optionally gzip-compressed"""
+    chunks = ENCODERS[fmt](rows, columns)
+    if compress:
+        return gzip_chunks(chunks)
+    return (chunk.encode('utf-8') for chunk in chunks)
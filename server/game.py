@@ -1,43 +1,120 @@
-from datetime import datetime
+"""The table engine: seats, betting, pots, undo and the log of a game.
+
+It knows nothing about Flask or the database. A table that outlives the
+process gets a store, which load() fills the game from and save() hands
+every change to, along with the log entries and chip snapshot it produced;
+the store gives each log entry its id. Tables without a store, like the
+tables of a tournament, are kept in memory only.
+"""
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import evaluator
+
+# Number of most recent log entries kept in memory and sent with each state update.
+# Older entries are paged from the store by the client when scrolled into view.
+LOG_TAIL_SIZE = 50
+
+# Number of actions of the current hand that can be undone
+UNDO_DEPTH = 100
 
 class Game:
-    def __init__(self):
+    def __init__(self, store=None):
+        self.store = store  # Loads and saves the table, None for a table kept in memory only
         self.players = {}  # map of username -> Player
         self.player_order = []  # list of usernames in order
         self.active = False
         self.pot = 0
-        self.game_log = []
+        self.game_log = []  # Most recent LOG_TAIL_SIZE entries of the current game
+        self.unsaved_log = []  # Entries handed to the store by the next save
+        self.unsaved_chips = None  # (usernames, chips) between two hands, handed to the store by the next save
+        self.log_count = 0  # Total number of entries in the current game
+        self.log_start_id = 0  # Database id of the first entry of the current game
         self.current_round = "preflop"
         self.small_blind = 5
         self.big_blind = 10
         self.dealer_position = 0  # Index in player_order
+        self.small_blind_player = None  # Username of the small blind of the current hand
+        self.big_blind_player = None
+        self.to_act = None  # Username of the player whose turn it is
+        self.turn = 0  # Incremented whenever the action moves, tells a stale action clock apart
+        self.acted = set()  # Players who acted in the betting round since the last raise
+        self.action_clock = 0  # Seconds each player has to act, 0 when there is no clock
+        self.action_ends_at = None  # Wall clock time the current player's clock runs out
+        self.undo_stack = deque(maxlen=UNDO_DEPTH)  # Actions of the current hand, most recent last
+        self.redo_stack = deque(maxlen=UNDO_DEPTH)  # Undone actions, most recently undone last
+        self.version = 0  # Incremented on every saved change, lets clients skip stale state
+        self._snapshot = None  # Cached to_dict() for the current version
+        self.modified_at = datetime.now(timezone.utc)  # When the version last moved on
+        self.initialized = False
+    
+    def initialize(self):
+        """Load the table from the store if not already loaded"""
+        if self.initialized:
+            return
+        
+        try:
+            if self.store:
+                self.store.load(self)
+            self.initialized = True
+        except Exception as e:
+            print(f"Error initializing game: {e}")
+    
+    def save(self):
+        """End a change: the version moves on and the store writes the state and its log entries"""
+        # Every change goes through here, so this is where the version moves on
+        self.version += 1
+        self._snapshot = None
+        self.modified_at = datetime.now(timezone.utc)
+        
+        # Log entries of the change go in the same transaction as the state they lead to
+        if self.store:
+            self.store.save(self, self.unsaved_log, self.unsaved_chips)
+        self.unsaved_log = []
+        self.unsaved_chips = None
     
     def add_player(self, player):
         """Add a player to the game"""
+        self.initialize()  # Ensure game is initialized
+        
         if player.username not in self.players:
             self.players[player.username] = player
             self.player_order.append(player.username)
             player.position = len(self.player_order) - 1
             player.is_active = True
             self.add_to_log({
-                'type': 'system',
-                'message': f'Player {player.username} joined the game'
+                'type': 'playerJoined',
+                'username': player.username
             })
+            self._clear_history()
+            self.save()
             return True
         return False
     
     def remove_player(self, username):
         """Remove a player from the game"""
+        self.initialize()  # Ensure game is initialized
+        
         if username in self.players:
-            player = self.players[username]
+            index = self.player_order.index(username)
             self.player_order.remove(username)
             del self.players[username]
+            
             self.add_to_log({
-                'type': 'system',
-                'message': f'Player {username} left the game'
+                'type': 'playerLeft',
+                'username': username
             })
+            
             # Update positions for remaining players
             self._update_positions()
+            
+            if self.to_act == username:
+                self._set_to_act(self._next_to_act(index - 1))
+            
+            # Recorded actions may refer to the player who left
+            self._clear_history()
+            self.save()
             return True
         return False
     
@@ -49,53 +126,121 @@ class Game:
     
     def reorder_players(self, new_order):
         """Reorder players based on the new order list"""
+        self.initialize()  # Ensure game is initialized
+        
         if set(new_order) != set(self.player_order):
             return False  # New order must contain the same players
         
         self.player_order = new_order.copy()
         self._update_positions()
+        self.save()
         return True
     
-    def start_game(self, small_blind=5, big_blind=10):
+    def start_game(self, small_blind=5, big_blind=10, action_clock=0):
         """Start a new game"""
-        if len(self.players) < 2:
+        self.initialize()  # Ensure game is initialized
+        
+        if len(self._dealt_in()) < 2:
             return False
         
         self.active = True
-        self.pot = 0
-        self.current_round = "preflop"
         self.small_blind = small_blind
         self.big_blind = big_blind
+        self.action_clock = action_clock
         self.game_log = []
+        self.log_count = 0
         
-        # Reset players for new game
-        for username in self.players:
-            player = self.players[username]
-            player.new_hand()
+        game_start = self.add_to_log({
+            'type': 'gameStart'
+        })
+        self._take_chip_snapshot()
+        self._deal_hand(self._dealer_from(self.dealer_position))
+        self.save()
+        self.log_start_id = game_start.get('id', 0)
+        
+        return True
+    
+    def next_hand(self):
+        """Close the current hand and deal the next one: the button moves on and the blinds are posted"""
+        self.initialize()  # Ensure game is initialized
+        
+        # Chips left in the pot would be lost, they have to be paid out first
+        if not self.active or self.pot or len(self._dealt_in()) < 2:
+            return False
+        
+        # The log of the game goes on, the hand only adds an entry to it
+        self._take_chip_snapshot()
+        self._deal_hand(self._dealer_from(self.dealer_position + 1))
+        self.save()
+        return True
+    
+    def sit_out(self, username, sitting_out):
+        """Deal a player out of the hands to come, or back in"""
+        self.initialize()  # Ensure game is initialized
+        
+        if username not in self.players:
+            return False
+        
+        self.players[username].sitting_out = sitting_out
+        self._clear_history()
+        self.save()
+        return True
+    
+    def _take_chip_snapshot(self):
+        """Record everyone's stack between two hands, one row for the whole table"""
+        self.unsaved_chips = (list(self.player_order), [self.players[username].chips for username in self.player_order])
+    
+    def _dealt_in(self):
+        """Players who get cards in a new hand, in seat order"""
+        return [username for username in self.player_order
+                if not self.players[username].sitting_out and self.players[username].chips > 0]
+    
+    def _dealer_from(self, index):
+        """Seat of the first player dealt in from the given seat on"""
+        dealt_in = set(self._dealt_in())
+        for offset in range(len(self.player_order)):
+            seat = (index + offset) % len(self.player_order)
+            if self.player_order[seat] in dealt_in:
+                return seat
+        return 0
+    
+    def _deal_hand(self, dealer_position):
+        """Reset the table for a new hand, post the blinds and give the action to the first player"""
+        dealt_in = self._dealt_in()
+        self.dealer_position = dealer_position
+        self.pot = 0
+        self.current_round = "preflop"
+        self.acted = set()
+        self._clear_history()
+        
+        for username in self.player_order:
+            if username in dealt_in:
+                self.players[username].new_hand()
+            else:
+                self.players[username].skip_hand()
+        
+        # Blinds go to the next players dealt in after the button, busted and sitting out seats are skipped
+        dealer = dealt_in.index(self.player_order[dealer_position])
+        self.small_blind_player = dealt_in[(dealer + 1) % len(dealt_in)]
+        self.big_blind_player = dealt_in[(dealer + 2) % len(dealt_in)]
         
         self.add_to_log({
-            'type': 'gameStart',
-            'message': 'Game started'
+            'type': 'handStart',
+            'username': self.player_order[dealer_position]
         })
         
-        # Post blinds
+        # Post blinds, the action starts with the player after the big blind
         self.post_blinds()
-        
-        return True
+        self._set_to_act(self._next_to_act(self.player_order.index(self.big_blind_player)))
     
     def post_blinds(self):
         """Post small and big blinds"""
-        if len(self.player_order) < 2:
+        if not self.small_blind_player or not self.big_blind_player:
             return False
         
-        # Small blind is next player after dealer
-        sb_pos = (self.dealer_position + 1) % len(self.player_order)
-        small_blind_username = self.player_order[sb_pos]
+        small_blind_username = self.small_blind_player
         small_blind_player = self.players[small_blind_username]
-        
-        # Big blind is next player after small blind
-        bb_pos = (self.dealer_position + 2) % len(self.player_order)
-        big_blind_username = self.player_order[bb_pos]
+        big_blind_username = self.big_blind_player
         big_blind_player = self.players[big_blind_username]
         
         # Post small blind
@@ -105,10 +250,10 @@ class Game:
             self.pot += small_blind_amount
             
             self.add_to_log({
-                'type': 'blinds',
+                'type': 'smallBlind',
                 'username': small_blind_username,
                 'amount': small_blind_amount,
-                'message': f'{small_blind_username} posted small blind: ${small_blind_amount}'
+                'pot': self.pot
             })
         
         # Post big blind
@@ -118,16 +263,18 @@ class Game:
             self.pot += big_blind_amount
             
             self.add_to_log({
-                'type': 'blinds',
+                'type': 'bigBlind',
                 'username': big_blind_username,
                 'amount': big_blind_amount,
-                'message': f'{big_blind_username} posted big blind: ${big_blind_amount}'
+                'pot': self.pot
             })
         
         return True
     
     def place_bet(self, username, amount):
         """Place a bet for a player"""
+        self.initialize()  # Ensure game is initialized
+        
         if not self.active or username not in self.players:
             return False
         
@@ -136,42 +283,89 @@ class Game:
         if player.folded:
             return False
         
+        highest = self._highest_bet()
+        acted = set(self.acted)
         if player.place_bet(amount):
             self.pot += amount
+            # A raise reopens the action for everyone else
+            if player.current_bet > highest:
+                self.acted = set()
+            self.acted.add(username)
             
             self.add_to_log({
                 'type': 'bet',
                 'username': username,
                 'amount': amount,
                 'round': self.current_round,
-                'message': f'{username} bet ${amount} in {self.get_round_name()}. Total pot: ${self.pot}.'
+                'pot': self.pot
             })
             
+            to_act = self.to_act
+            self._set_to_act(self._next_to_act(self.player_order.index(username)))
+            self._record({'type': 'bet', 'username': username, 'amount': amount}, to_act, acted)
+            self.save()
             return True
         
         return False
     
-    def fold_player(self, username):
-        """Fold a player's hand"""
+    def fold_player(self, username, record=True):
+        """Fold a player's hand, kept out of the undo history without record"""
+        self.initialize()  # Ensure game is initialized
+        
         if not self.active or username not in self.players:
             return False
         
         player = self.players[username]
         
+        if player.folded:
+            return False
+        
         if player.fold():
             self.add_to_log({
                 'type': 'fold',
-                'username': username,
-                'folded': True,
-                'message': f'{username} folded'
+                'username': username
             })
             
+            to_act = self.to_act
+            self._set_to_act(self._next_to_act(self.player_order.index(username)))
+            if record:
+                self._record({'type': 'fold', 'username': username}, to_act, self.acted)
+            self.save()
             return True
         
         return False
     
+    def check_player(self, username, record=True):
+        """Check for a player who has nothing to call, kept out of the undo history without record"""
+        self.initialize()  # Ensure game is initialized
+        
+        if not self.active or username not in self.players:
+            return False
+        
+        player = self.players[username]
+        
+        if player.folded or player.current_bet < self._highest_bet():
+            return False
+        
+        self.add_to_log({
+            'type': 'check',
+            'username': username,
+            'round': self.current_round
+        })
+        
+        to_act = self.to_act
+        acted = set(self.acted)
+        self.acted.add(username)
+        self._set_to_act(self._next_to_act(self.player_order.index(username)))
+        if record:
+            self._record({'type': 'check', 'username': username}, to_act, acted)
+        self.save()
+        return True
+    
     def unfold_player(self, username):
         """Unfold a player (for the next hand)"""
+        self.initialize()  # Ensure game is initialized
+        
         if not self.active or username not in self.players:
             return False
         
@@ -179,64 +373,131 @@ class Game:
         
         if player.unfold():
             self.add_to_log({
-                'type': 'fold',
-                'username': username,
-                'folded': False,
-                'message': f'{username} returned to game'
+                'type': 'unfold',
+                'username': username
             })
             
+            self._record({'type': 'unfold', 'username': username}, self.to_act, self.acted)
+            self.save()
             return True
         
         return False
     
     def next_round(self):
         """Move to the next round"""
+        self.initialize()  # Ensure game is initialized
+        
         rounds = ['preflop', 'flop', 'turn', 'river']
         current_index = rounds.index(self.current_round)
         
         if current_index < len(rounds) - 1:
             self.current_round = rounds[current_index + 1]
             
-            # Reset current bets for new round
+            # Reset current bets for new round, remembering them in case the change is undone
+            bets = {username: player.current_bet for username, player in self.players.items()}
             for username in self.players:
                 self.players[username].reset_bets()
             
             self.add_to_log({
                 'type': 'roundChange',
-                'round': self.current_round,
-                'message': f'Round changed to {self.get_round_name()}'
+                'round': self.current_round
             })
             
+            # After the flop the first player left of the dealer acts first
+            to_act = self.to_act
+            acted = self.acted
+            self.acted = set()
+            self._set_to_act(self._next_to_act(self.dealer_position))
+            self._record({'type': 'roundChange', 'from_round': rounds[current_index],
+                          'to_round': self.current_round, 'bets': bets}, to_act, acted)
+            self.save()
             return True
         
         return False
     
     def distribute_pot(self, username, amount):
         """Distribute pot to a player"""
+        self.initialize()  # Ensure game is initialized
+        
         if not self.active or username not in self.players:
             return False
         
         if amount <= 0 or amount > self.pot:
             return False
         
-        player = self.players[username]
-        
-        if player.collect_winnings(amount):
-            self.pot -= amount
-            
-            self.add_to_log({
-                'type': 'distribution',
-                'username': username,
-                'amount': amount,
-                'message': f'{username} received ${amount} from the pot. Remaining pot: ${self.pot}'
-            })
-            
+        if self._pay(username, amount):
+            self.save()
             return True
         
         return False
     
+    def showdown(self, board, hole_cards):
+        """Settle the pot from the cards: the board and the hole cards shown by players still in the hand.
+        
+        Main and side pots go to the best hands among the players who put enough
+        chips in to contest them. Returns each shown hand with its value and what
+        it won, or None if the pot cannot be settled this way.
+        """
+        self.initialize()  # Ensure game is initialized
+        
+        if not self.active or not self.pot or not hole_cards:
+            return None
+        
+        # Only a pot nothing has been paid out of yet matches the bets it came from
+        contributions = {username: player.total_bet for username, player in self.players.items()}
+        if sum(contributions.values()) != self.pot:
+            return None
+        
+        if any(username not in self.players or self.players[username].folded for username in hole_cards):
+            return None
+        
+        values = {username: evaluator.evaluate(board + cards) for username, cards in hole_cards.items()}
+        
+        # Odd chips go to the first winners after the button
+        start = self.dealer_position + 1
+        seat_order = self.player_order[start:] + self.player_order[:start]
+        payouts = evaluator.settle_pots(contributions, values, seat_order)
+        
+        for username in seat_order:
+            if payouts.get(username):
+                self._pay(username, payouts[username])
+        self.save()
+        
+        return {
+            username: {
+                'cards': [evaluator.card_name(card) for card in hole_cards[username]],
+                'hand': evaluator.describe(value),
+                'value': value,
+                'won': payouts.get(username, 0)
+            }
+            for username, value in values.items()
+        }
+    
+    def _pay(self, username, amount):
+        """Move chips from the pot to a player, logged and undoable"""
+        if not self.players[username].collect_winnings(amount):
+            return False
+        
+        self.pot -= amount
+        
+        self.add_to_log({
+            'type': 'distribution',
+            'username': username,
+            'amount': amount,
+            'pot': self.pot
+        })
+        
+        # Betting is over once the pot is being paid out
+        to_act = self.to_act
+        if to_act:
+            self._set_to_act(None)
+        self._record({'type': 'distribution', 'username': username, 'amount': amount}, to_act, self.acted)
+        return True
+    
     def end_game(self):
         """End the current game"""
+        self.initialize()  # Ensure game is initialized
+        
         if not self.active:
             return False
         
@@ -244,14 +505,215 @@ class Game:
         
         self.add_to_log({
             'type': 'gameEnd',
-            'message': f'Game ended with pot: ${self.pot}'
+            'pot': self.pot
         })
+        self._take_chip_snapshot()
         
         # Advance dealer position for next game
-        self.dealer_position = (self.dealer_position + 1) % len(self.player_order)
+        if len(self.player_order) > 0:
+            self.dealer_position = (self.dealer_position + 1) % len(self.player_order)
+        
+        self._set_to_act(None)
+        self._clear_history()
+        self.save()
+        return True
+    
+    def undo(self, count=1):
+        """Revert up to count of the most recent actions of the hand.
+        
+        Each action is reverted by applying its inverse, which is logged as a
+        compensating entry. Returns the delta to send to clients, the full state
+        if the delta would not carry all of its log entries, or None if there
+        was nothing to undo.
+        """
+        return self._step(self.undo_stack, self.redo_stack, count, undo=True)
+    
+    def redo(self, count=1):
+        """Apply up to count of the most recently undone actions again"""
+        return self._step(self.redo_stack, self.undo_stack, count, undo=False)
+    
+    def _step(self, source, target, count, undo):
+        self.initialize()  # Ensure game is initialized
+        
+        try:
+            count = int(count)
+        except (TypeError, ValueError):
+            return None
+        
+        if not self.active or not source or count < 1:
+            return None
+        
+        changed = set()
+        steps = 0
+        while source and steps < count:
+            op = source.pop()
+            changed.update(self._apply(op, undo))
+            target.append(op)
+            steps += 1
+        
+        # The action returns to whoever had it before the last reverted action, or after the last redone one
+        side = 0 if undo else 1
+        self.acted = set(op['acted'][side])
+        self._set_to_act(op['to_act'][side])
+        self.save()
+        
+        # Entries older than the tail are gone, clients would miscount the log without them
+        if steps > LOG_TAIL_SIZE:
+            return self.snapshot()
         
+        return {
+            'version': self.version,
+            'pot': self.pot,
+            'current_round': self.current_round,
+            'round_name': self.get_round_name(),
+            'to_act': self.to_act,
+            'action_ends_at': self.action_ends_at,
+            'players': [self.players[username].to_dict() for username in changed],
+            'log_entries': self.game_log[-steps:],
+            'can_undo': bool(self.undo_stack),
+            'can_redo': bool(self.redo_stack)
+        }
+    
+    def _apply(self, op, undo):
+        """Apply an action, or its inverse when undoing, and return the usernames it touched"""
+        sign = -1 if undo else 1
+        kind = op['type']
+        
+        if kind == 'roundChange':
+            if undo:
+                self.current_round = op['from_round']
+                for username, bet in op['bets'].items():
+                    self.players[username].current_bet = bet
+            else:
+                self.current_round = op['to_round']
+                for username in op['bets']:
+                    self.players[username].reset_bets()
+            self.add_to_log({'type': 'roundRevert' if undo else 'roundChange', 'round': self.current_round})
+            return set(op['bets'])
+        
+        username = op['username']
+        player = self.players[username]
+        
+        if kind == 'bet':
+            # Bet <-> refund
+            amount = sign * op['amount']
+            player.chips -= amount
+            player.current_bet += amount
+            player.total_bet += amount
+            player.total_lost += amount
+            self.pot += amount
+            self.add_to_log({'type': 'refund' if undo else 'bet', 'username': username, 'amount': op['amount'],
+                             'round': self.current_round, 'pot': self.pot})
+        elif kind == 'distribution':
+            # Distribution <-> reclaim
+            amount = sign * op['amount']
+            player.chips += amount
+            player.total_won += amount
+            player.hands_won += sign
+            self.pot -= amount
+            self.add_to_log({'type': 'reclaim' if undo else 'distribution', 'username': username,
+                             'amount': op['amount'], 'pot': self.pot})
+        elif kind in ('fold', 'unfold'):
+            # Fold <-> unfold
+            player.folded = (kind == 'fold') != undo
+            self.add_to_log({'type': 'fold' if player.folded else 'unfold', 'username': username})
+        else:
+            # A check moves no chips, only the action
+            self.add_to_log({'type': 'checkRevert' if undo else 'check', 'username': username,
+                             'round': self.current_round})
+        
+        return {username}
+    
+    def _record(self, op, to_act, acted):
+        """Remember how to revert an action, a new action discards everything that was undone"""
+        op['to_act'] = (to_act, self.to_act)
+        op['acted'] = (frozenset(acted), frozenset(self.acted))
+        self.undo_stack.append(op)
+        self.redo_stack.clear()
+    
+    def _clear_history(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+    
+    def expire_action(self, turn):
+        """Act for the player whose clock ran out: check when nothing is owed, fold otherwise.
+        
+        Returns the action taken, or None if the action already moved on. The
+        action is not undoable, so a clock running out never discards what was undone.
+        """
+        if not self.active or not self.to_act or turn != self.turn:
+            return None
+        
+        username = self.to_act
+        if self.players[username].current_bet >= self._highest_bet():
+            self.check_player(username, record=False)
+            return 'check'
+        
+        self.fold_player(username, record=False)
+        return 'fold'
+    
+    def _highest_bet(self):
+        return max((player.current_bet for player in self.players.values()), default=0)
+    
+    def _next_to_act(self, index):
+        """First player after the given seat who can still act.
+        
+        None once the hand is down to one player, the pot is empty or the betting
+        round is closed: everyone in the hand with chips left has acted since the
+        last raise (or is the only one left to act) and matched the highest bet.
+        """
+        in_hand = [username for username in self.player_order if not self.players[username].folded]
+        if len(in_hand) < 2 or not self.pot:
+            return None
+        
+        highest = self._highest_bet()
+        able = [username for username in in_hand if self.players[username].chips > 0]
+        if (all(self.players[username].current_bet == highest for username in able)
+                and (len(able) < 2 or self.acted.issuperset(able))):
+            return None
+        
+        for offset in range(1, len(self.player_order) + 1):
+            username = self.player_order[(index + offset) % len(self.player_order)]
+            player = self.players[username]
+            if not player.folded and player.chips > 0:
+                return username
+        return None
+    
+    def _set_to_act(self, username):
+        """Pass the action to a player and restart their clock"""
+        self.to_act = username
+        self.turn += 1
+        self.action_ends_at = time.time() + self.action_clock if username and self.action_clock else None
+    
+    def adjust_chips(self, username, amount):
+        """Manually add or remove chips for a player"""
+        self.initialize()  # Ensure game is initialized
+        
+        if username not in self.players:
+            return False
+        
+        self.players[username].adjust_chips(amount)
+        # Recorded actions would move chips the stack no longer has
+        self._clear_history()
+        self.save()
         return True
     
+    def refresh_chips(self, chips):
+        """Set the chips of seated players from a bulk change, saved once. Returns how many changed."""
+        self.initialize()  # Ensure game is initialized
+        
+        changed = 0
+        for username, amount in chips.items():
+            player = self.players.get(username)
+            if player and player.chips != amount:
+                player.chips = amount
+                changed += 1
+        
+        if changed:
+            self._clear_history()
+            self.save()
+        return changed
+    
     def add_to_log(self, entry):
         """Add an entry to the game log"""
         log_entry = {
@@ -259,6 +721,22 @@ class Game:
             'timestamp': datetime.now().isoformat()
         }
         self.game_log.append(log_entry)
+        self.log_count += 1
+        if len(self.game_log) > LOG_TAIL_SIZE:
+            del self.game_log[0]
+        
+        # Handed to the store, which gives it its id, by the save that ends every change
+        self.unsaved_log.append(log_entry)
+        return log_entry
+    
+    def close(self):
+        """Release the table once it is no longer played, nothing to do for a table in this process"""
+    
+    def get_log_page(self, before, limit):
+        """Get entries of the current game's log older than the given id"""
+        if not self.store:
+            return []
+        return self.store.log_page(self.log_start_id, before, limit)
     
     def get_round_name(self):
         """Get the display name for the current round"""
@@ -272,20 +750,40 @@ class Game:
     
     def to_dict(self):
         """Convert game object to dictionary for JSON serialization"""
+        self.initialize()  # Ensure game is initialized
+        
         player_data = []
         for username in self.player_order:
             if username in self.players:
                 player_data.append(self.players[username].to_dict())
         
         return {
+            'version': self.version,
             'players': player_data,
-            'player_order': self.player_order,
+            'player_order': list(self.player_order),
             'active': self.active,
             'pot': self.pot,
-            'game_log': self.game_log,
+            'game_log': list(self.game_log),
+            'log_count': self.log_count,
+            'log_start_id': self.log_start_id,
             'current_round': self.current_round,
             'round_name': self.get_round_name(),
             'small_blind': self.small_blind,
             'big_blind': self.big_blind,
-            'dealer_position': self.dealer_position
-        }
\ No newline at end of file
+            'dealer_position': self.dealer_position,
+            'small_blind_player': self.small_blind_player,
+            'big_blind_player': self.big_blind_player,
+            'to_act': self.to_act,
+            'action_clock': self.action_clock,
+            'action_ends_at': self.action_ends_at,
+            'can_undo': bool(self.undo_stack),
+            'can_redo': bool(self.redo_stack)
+        }
+    
+    def snapshot(self):
+        """Get the state of the current version, serialized once and shared by all readers"""
+        self.initialize()  # Ensure game is initialized
+        
+        if self._snapshot is None:
+            self._snapshot = self.to_dict()
+        return self._snapshot
@@ -0,0 +1,74 @@
+"""Housekeeping for the SQLite database.
+
+Everything here works in small steps with a pause between them, so it can run
+in a background task while the server keeps answering requests: each step
+holds the database write lock only briefly.
+"""
+
+INCREMENTAL = 2  # PRAGMA auto_vacuum value for incremental mode
+
+
+def delete_in_batches(engine, table, where, params, batch_size, pause):
+    """Delete matching rows a batch at a time, each batch in its own transaction.
+
+    Returns the number of rows deleted.
+    """
+    deleted = 0
+    statement = (f'DELETE FROM {table} WHERE rowid IN '
+                 f'(SELECT rowid FROM {table} WHERE {where} LIMIT {int(batch_size)})')
+    while True:
+        with engine.begin() as conn:
+            count = conn.exec_driver_sql(statement, params).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+        pause()
+
+
+def auto_vacuum_mode(engine):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql('PRAGMA auto_vacuum').scalar()
+
+
+def enable_incremental_vacuum(engine):
+    """Switch the database to incremental auto vacuum.
+
+    A new, empty database switches right away. An existing one needs a full
+    VACUUM, which locks the whole file while it runs, so it is left to the
+    maintenance command rather than the background task.
+    """
+    with engine.connect() as conn:
+        conn.exec_driver_sql('PRAGMA auto_vacuum = INCREMENTAL')
+        if conn.exec_driver_sql('PRAGMA auto_vacuum').scalar() != INCREMENTAL:
+            conn.exec_driver_sql('VACUUM')
+    return auto_vacuum_mode(engine) == INCREMENTAL
+
+
+def incremental_vacuum(engine, pages, pause):
+    """Return free pages to the file system a few at a time.
+
+    Returns the number of pages released, 0 unless incremental auto vacuum is on.
+    """
+    if auto_vacuum_mode(engine) != INCREMENTAL:
+        return 0
+
+    released = 0
+    while True:
+        with engine.connect() as conn:
+            free = conn.exec_driver_sql('PRAGMA freelist_count').scalar()
+            if not free:
+                return released
+            # The pragma frees one page per step and the driver only takes the first step of a
+            # statement without result columns, a script runs it to completion
+            conn.connection.driver_connection.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+            remaining = conn.exec_driver_sql('PRAGMA freelist_count').scalar()
+        if remaining >= free:
+            return released  # Nothing could be released this time, try again on the next run
+        released += free - remaining
+        pause()
+
+
+def analyze(engine):
+    """Refresh the statistics the query planner uses to pick indexes"""
+    with engine.connect() as conn:
+        conn.exec_driver_sql('ANALYZE')
@@ -11,6 +11,7 @@ class Player:
         self.hands_won = 0
         self.position = -1  # Position at the table
         self.is_active = False  # Player is actively in the current game
+        self.sitting_out = False  # Dealt out of hands until they sit back in
     
     def place_bet(self, amount):
         """Place a bet of the specified amount"""
@@ -54,17 +55,27 @@ class Player:
         self.folded = False
         self.hands_played += 1
     
+    def skip_hand(self):
+        """Leave the player out of a new hand"""
+        self.current_bet = 0
+        self.total_bet = 0
+        self.folded = True
+    
     def adjust_chips(self, amount):
         """Manually adjust player chips (add or remove)"""
         if self.chips + amount < 0:
             amount = -self.chips  # Don't allow negative chip count
         
+        # A correction is not a win or a loss, so the totals are left alone
         self.chips += amount
-        
-        if amount > 0:
-            self.total_won += amount
-        else:
-            self.total_lost -= amount
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Player of a dictionary made by to_dict, e.g. sent to another process"""
+        player = cls(data['username'], data['chips'])
+        for name, value in data.items():
+            setattr(player, name, value)
+        return player
     
     def to_dict(self):
         """Convert player object to dictionary for JSON serialization"""
@@ -79,5 +90,6 @@ class Player:
             'hands_played': self.hands_played,
             'hands_won': self.hands_won,
             'position': self.position,
-            'is_active': self.is_active
-        }
\ No newline at end of file
+            'is_active': self.is_active,
+            'sitting_out': self.sitting_out
+        }
@@ -0,0 +1,91 @@
+"""Limits on the socket events a session may send.
+
+Every write event costs a database commit and a broadcast to every client,
+so each session gets a token bucket per event type: it holds up to burst
+tokens, refills at rate tokens per second, and an event that finds it empty
+is refused. Events may also carry an idempotency key; a key the same
+session already used within the window is a resubmission (a double tap,
+a retry after a reconnect) and the event is dropped.
+"""
+import threading
+import time
+from collections import Counter, deque
+
+DEFAULT = 'default'  # Limit of events without one of their own
+
+
+class TokenBucket:
+    """Tokens available to one session for one event type"""
+
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, burst, now):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, rate, burst, now):
+        """Take a token if there is one, refilling for the time since the last call"""
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class EventGuard:
+    """Token buckets and recent idempotency keys of every session"""
+
+    def __init__(self, limits, window, clock=time.monotonic):
+        self.limits = limits  # Map of event -> (events per second, burst), DEFAULT for the others
+        self.window = window
+        self.clock = clock
+        self.buckets = {}  # Map of (session, event) -> TokenBucket
+        self.keys = {}  # Map of session -> (set of keys, deque of (time, key)) seen within the window
+        self.accepted = Counter()
+        self.limited = Counter()  # Events refused for an empty bucket, by event
+        self.duplicates = Counter()  # Events dropped for a repeated key, by event
+        self._lock = threading.Lock()
+
+    def check(self, session, event, key=None):
+        """'duplicate' or 'limited' if the event must be dropped, None to handle it"""
+        now = self.clock()
+        with self._lock:
+            seen, recent = self.keys.setdefault(session, (set(), deque()))
+            while recent and recent[0][0] <= now - self.window:
+                seen.discard(recent.popleft()[1])
+            if key is not None and (event, key) in seen:
+                self.duplicates[event] += 1
+                return 'duplicate'
+
+            rate, burst = self.limits.get(event, self.limits[DEFAULT])
+            bucket = self.buckets.get((session, event))
+            if bucket is None:
+                bucket = self.buckets[session, event] = TokenBucket(burst, now)
+            if not bucket.take(rate, burst, now):
+                self.limited[event] += 1
+                return 'limited'
+
+            # Only an event that is handled claims its key, a refused one may be sent again
+            if key is not None:
+                seen.add((event, key))
+                recent.append((now, (event, key)))
+            self.accepted[event] += 1
+            return None
+
+    def forget(self, session):
+        """Drop the state of a session that went away"""
+        with self._lock:
+            self.keys.pop(session, None)
+            for bucket_key in [bucket_key for bucket_key in self.buckets if bucket_key[0] == session]:
+                del self.buckets[bucket_key]
+
+    def stats(self):
+        """Counters for instrumentation"""
+        with self._lock:
+            return {
+                'sessions': len(self.keys),
+                'accepted': sum(self.accepted.values()),
+                'limited': dict(self.limited),
+                'duplicates': dict(self.duplicates)
+            }
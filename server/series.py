@@ -0,0 +1,71 @@
+"""Chip count time series.
+
+A snapshot stores the stacks of a whole table as one packed array of 64-bit
+little-endian ints, so a hand costs one small row however many players are
+seated. Snapshots taken before held 32-bit ints in machine byte order, which
+are told apart by their length. Long
+series are thinned out on the server with Largest-Triangle-Three-Buckets,
+which keeps the peaks and dips a chart needs with a fraction of the points.
+"""
+import sys
+from array import array
+
+
+def pack(values):
+    """Bytes of a list of ints, as stored in a snapshot"""
+    values = array('q', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack(data, count):
+    """The count ints packed in a snapshot"""
+    if len(data) == 4 * count:
+        # Written by an older version
+        values = array('i')
+        values.frombytes(data)
+        return values
+
+    values = array('q')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def lttb(points, threshold):
+    """Downsample (x, y) points, sorted by x, to at most threshold points.
+
+    The first and last points are kept. The points in between are split into
+    equal buckets and each bucket keeps the point that forms the largest
+    triangle with the point kept before it and the average of the next bucket.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0  # Index of the point kept last
+    for i in range(threshold - 2):
+        # Average of the next bucket, the last point for the last bucket
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        next_points = points[next_start:next_end] or points[-1:]
+        avg_x = sum(x for x, _ in next_points) / len(next_points)
+        avg_y = sum(y for _, y in next_points) / len(next_points)
+
+        ax, ay = points[a]
+        best_area = -1
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
@@ -0,0 +1,96 @@
+"""Club partitions: one database file per club, found through a shared catalog.
+
+Every club keeps its tables in its own SQLite file, written by its own server
+process, so clubs never wait for each other's write lock and adding a club
+adds write throughput. A small catalog database, shared by all of them, maps
+each club to its file and each player to the clubs they play in. Queries over
+every club, like the global leaderboard, run on all partitions in parallel
+and merge the results.
+"""
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+
+DEFAULT_CLUB = 'main'
+CLUB_NAME = re.compile(r'^[A-Za-z0-9_-]{1,40}$')
+
+
+def club_dir(clubs_dir, club):
+    """Directory holding a club's database and archive"""
+    if not CLUB_NAME.match(club):
+        raise ValueError(f'Invalid club name {club!r}')
+    return os.path.join(clubs_dir, club)
+
+
+class Catalog:
+    """Clubs, their database files and their members, in a database of its own"""
+
+    def __init__(self, path):
+        self.engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': 30})
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql('CREATE TABLE IF NOT EXISTS clubs '
+                                 '(name TEXT PRIMARY KEY, path TEXT NOT NULL)')
+            conn.exec_driver_sql('CREATE TABLE IF NOT EXISTS members '
+                                 '(username TEXT NOT NULL, club TEXT NOT NULL, PRIMARY KEY (username, club))')
+            conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_members_club ON members (club)')
+
+    def register_club(self, name, path):
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql('INSERT INTO clubs (name, path) VALUES (?, ?) '
+                                 'ON CONFLICT(name) DO UPDATE SET path = excluded.path', (name, path))
+
+    def clubs(self):
+        """Map of club name -> database file"""
+        with self.engine.connect() as conn:
+            return dict(conn.exec_driver_sql('SELECT name, path FROM clubs ORDER BY name').fetchall())
+
+    def add_member(self, username, club):
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql('INSERT OR IGNORE INTO members (username, club) VALUES (?, ?)', (username, club))
+
+    def add_members(self, usernames, club):
+        """Register many players at once, e.g. a bulk import, in one transaction"""
+        rows = [(username, club) for username in usernames]
+        if not rows:
+            return
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql('INSERT OR IGNORE INTO members (username, club) VALUES (?, ?)', rows)
+
+    def clubs_of(self, username):
+        with self.engine.connect() as conn:
+            rows = conn.exec_driver_sql('SELECT club FROM members WHERE username = ? ORDER BY club', (username,))
+            return [club for (club,) in rows]
+
+    def member_counts(self):
+        with self.engine.connect() as conn:
+            return dict(conn.exec_driver_sql('SELECT club, COUNT(*) FROM members GROUP BY club').fetchall())
+
+
+def fan_out(function, clubs, workers):
+    """Run function(club) on every club at once, returns a map of club -> result"""
+    clubs = list(clubs)
+    if not clubs:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(clubs))) as pool:
+        return dict(zip(clubs, pool.map(function, clubs)))
+
+
+def merge_totals(results):
+    """One leaderboard out of the per-club (username, games, bet, won, net) rows.
+
+    Each player gets their totals over every club and the net won in each club.
+    """
+    players = {}
+    for club, rows in results.items():
+        for username, games, bet, won, net in rows:
+            player = players.setdefault(username, {
+                'username': username, 'games': 0, 'bet': 0, 'won': 0, 'net': 0, 'clubs': {}
+            })
+            player['games'] += games
+            player['bet'] += bet or 0
+            player['won'] += won or 0
+            player['net'] += net or 0
+            player['clubs'][club] = net or 0
+    return sorted(players.values(), key=lambda player: player['net'], reverse=True)
@@ -0,0 +1,330 @@
+"""Headless hand simulator: drive the Game engine through random legal hands.
+
+No Flask and no sockets, the engine is called directly, with the table kept
+nowhere (--store none), in memory (--store memory) or in an SQLite file laid
+out like the server's tables (--store sqlite). Every hand has blinds, bets,
+calls, raises, checks and folds until the river or a single player is left,
+then the pot is settled from random cards or paid out by hand. Between hands
+players join and leave, stacks are corrected and busted players buy in again.
+
+After every operation the simulator checks that no chips appeared or
+vanished, that the pot and every stack are never negative and that the
+action is with a player still in the hand, and only while the betting round
+is open. It reports hands per second and the time taken by each kind of
+operation.
+
+    python simulate.py --hands 1000000 --players 6 --store sqlite --db /tmp/sim.db
+"""
+import json
+import random
+import sqlite3
+import time
+
+import click
+
+import series
+from game import Game
+from player import Player
+
+STARTING_CHIPS = 1000
+HANDS_PER_GAME = 200  # Hands dealt before the game is ended and a new one started
+
+
+class MemoryStore:
+    """Keeps what the server would write in lists and dicts, the log of the current game only"""
+
+    def __init__(self):
+        self.state = None
+        self.players = {}
+        self.logs = []  # Entries of the current game
+        self.log_rows = 0  # Entries saved over all games, the id of the last one
+        self.chip_snapshots = []
+
+    def load(self, game):
+        pass
+
+    def save(self, game, log_entries, chips):
+        self.state = (game.active, game.pot, game.current_round, game.dealer_position,
+                      list(game.player_order), game.version)
+        for username, player in game.players.items():
+            self.players[username] = player.to_dict()
+        for entry in log_entries:
+            self.log_rows += 1
+            entry['id'] = self.log_rows
+            if entry['type'] == 'gameStart':
+                self.logs = []
+            self.logs.append(entry)
+        if chips:
+            self.chip_snapshots.append(chips)
+
+    def log_page(self, start_id, before, limit):
+        return [entry for entry in self.logs if start_id <= entry['id'] < before][-limit:]
+
+    def rows(self):
+        return self.log_rows
+
+
+class SqliteStore:
+    """Writes every change to an SQLite file in one transaction, like the server's DatabaseStore"""
+
+    def __init__(self, path, synchronous='NORMAL'):
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute(f'PRAGMA synchronous = {synchronous}')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS game_state (id INTEGER PRIMARY KEY, active BOOLEAN, pot INTEGER,
+                current_round TEXT, small_blind INTEGER, big_blind INTEGER, dealer_position INTEGER,
+                player_order TEXT, version INTEGER);
+            CREATE TABLE IF NOT EXISTS players (username TEXT PRIMARY KEY, chips INTEGER, current_bet INTEGER,
+                total_bet INTEGER, folded BOOLEAN, total_won INTEGER, total_lost INTEGER, hands_played INTEGER,
+                hands_won INTEGER, position INTEGER, is_active BOOLEAN, sitting_out BOOLEAN);
+            CREATE TABLE IF NOT EXISTS game_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, type TEXT,
+                username TEXT, amount INTEGER, round TEXT, pot INTEGER);
+            CREATE TABLE IF NOT EXISTS chip_snapshots (id INTEGER PRIMARY KEY, taken_at TEXT,
+                usernames TEXT, chips BLOB);
+        ''')
+
+    def load(self, game):
+        pass
+
+    def save(self, game, log_entries, chips):
+        cursor = self.conn.cursor()
+        cursor.execute('BEGIN')
+        cursor.execute('INSERT OR REPLACE INTO game_state VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?)', (
+            game.active, game.pot, game.current_round, game.small_blind, game.big_blind,
+            game.dealer_position, json.dumps(game.player_order), game.version
+        ))
+        cursor.executemany('INSERT OR REPLACE INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+            (player.username, player.chips, player.current_bet, player.total_bet, player.folded,
+             player.total_won, player.total_lost, player.hands_played, player.hands_won,
+             player.position, player.is_active, player.sitting_out)
+            for player in game.players.values()
+        ])
+        for entry in log_entries:
+            cursor.execute('INSERT INTO game_logs (timestamp, type, username, amount, round, pot) '
+                           'VALUES (?, ?, ?, ?, ?, ?)', (entry['timestamp'], entry.get('type'), entry.get('username'),
+                                                         entry.get('amount'), entry.get('round'), entry.get('pot')))
+            entry['id'] = cursor.lastrowid
+        if chips:
+            usernames, stacks = chips
+            cursor.execute('INSERT INTO chip_snapshots (taken_at, usernames, chips) VALUES (datetime(), ?, ?)',
+                           (json.dumps(usernames), series.pack(stacks)))
+        cursor.execute('COMMIT')
+
+    def log_page(self, start_id, before, limit):
+        rows = self.conn.execute(
+            'SELECT id, timestamp, type, username, amount, round, pot FROM game_logs '
+            'WHERE id >= ? AND id < ? ORDER BY id DESC LIMIT ?', (start_id, before, limit)
+        ).fetchall()
+        columns = ('id', 'timestamp', 'type', 'username', 'amount', 'round', 'pot')
+        return [dict(zip(columns, row)) for row in reversed(rows)]
+
+    def rows(self):
+        return self.conn.execute('SELECT COUNT(*) FROM game_logs').fetchone()[0]
+
+
+class InvariantError(Exception):
+    pass
+
+
+class Simulator:
+    """Plays random hands at one table, timing and checking every engine call"""
+
+    def __init__(self, store, players, seed):
+        self.rng = random.Random(seed)
+        self.game = Game(store)
+        self.timings = {}  # Map of operation -> [count, total seconds, slowest]
+        self.expected_chips = 0  # Chips that should be on the table, stacks plus pot
+        self.next_player = 1
+        self.hands = 0
+        for _ in range(players):
+            self.join()
+
+    def call(self, operation, *args):
+        """Run an engine method, time it and check the table afterwards"""
+        started = time.perf_counter()
+        result = getattr(self.game, operation)(*args)
+        elapsed = time.perf_counter() - started
+
+        timing = self.timings.setdefault(operation, [0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] = max(timing[2], elapsed)
+        self.check(operation)
+        return result
+
+    def check(self, operation):
+        game = self.game
+        if game.pot < 0:
+            raise InvariantError(f'Pot went negative ({game.pot}) after {operation}')
+        stacks = 0
+        for player in game.players.values():
+            if player.chips < 0:
+                raise InvariantError(f'{player.username} has {player.chips} chips after {operation}')
+            stacks += player.chips
+        if stacks + game.pot != self.expected_chips:
+            raise InvariantError(f'{stacks + game.pot} chips on the table after {operation}, '
+                                 f'expected {self.expected_chips}')
+        if game.to_act is not None and (game.to_act not in game.players or game.players[game.to_act].folded):
+            raise InvariantError(f'Action with {game.to_act}, who is not in the hand, after {operation}')
+        if game.to_act is not None and not game.pot:
+            raise InvariantError(f'Action with {game.to_act} and nothing in the pot after {operation}')
+
+    def join(self):
+        username = f'player{self.next_player}'
+        self.next_player += 1
+        self.expected_chips += STARTING_CHIPS
+        self.call('add_player', Player(username, STARTING_CHIPS))
+
+    def leave(self, username):
+        self.expected_chips -= self.game.players[username].chips
+        self.call('remove_player', username)
+
+    def adjust(self, username, amount):
+        # Stacks never go below zero, a larger correction takes what is there
+        self.expected_chips += max(amount, -self.game.players[username].chips)
+        self.call('adjust_chips', username, amount)
+
+    def between_hands(self):
+        """Seat changes and corrections while no chips are in play"""
+        rng = self.rng
+        game = self.game
+        for username in list(game.player_order):
+            if game.players[username].chips <= 0:
+                # Busted players leave or buy in again
+                if rng.random() < 0.3 and len(game.players) > 2:
+                    self.leave(username)
+                else:
+                    self.adjust(username, STARTING_CHIPS)
+        if rng.random() < 0.02 and len(game.players) < 9:
+            self.join()
+        if rng.random() < 0.05:
+            self.adjust(rng.choice(game.player_order), rng.randint(-100, 200))
+
+    def play(self, hands):
+        while self.hands < hands:
+            if not self.game.active:
+                self.between_hands()
+                if not self.call('start_game', 5, 10):
+                    continue
+            elif self.hands % HANDS_PER_GAME == 0:
+                self.call('end_game')
+                continue
+            else:
+                self.between_hands()
+                if not self.call('next_hand'):
+                    continue
+            self.play_hand()
+            self.hands += 1
+
+    def play_hand(self):
+        rng = self.rng
+        game = self.game
+        rounds = ['preflop', 'flop', 'turn', 'river']
+        while True:
+            acted = set()
+            while game.to_act is not None:
+                username = game.to_act
+                highest = max(player.current_bet for player in game.players.values())
+                player = game.players[username]
+                owed = highest - player.current_bet
+                in_hand = [name for name in game.player_order if not game.players[name].folded]
+                able = [name for name in in_hand if game.players[name].chips > 0]
+
+                # The round is over once everyone able to act has acted and matched the highest bet
+                if acted >= set(able) and all(game.players[name].current_bet == highest for name in able):
+                    raise InvariantError(f'Action with {username} after the betting round closed')
+
+                roll = rng.random()
+                if owed == 0:
+                    if roll < 0.7:
+                        self.call('check_player', username)
+                    else:
+                        self.call('place_bet', username, min(player.chips, rng.randint(1, max(game.pot, 10))))
+                elif roll < 0.25:
+                    self.call('fold_player', username)
+                elif roll < 0.85 or player.chips <= owed:
+                    self.call('place_bet', username, min(owed, player.chips))
+                else:
+                    self.call('place_bet', username, min(player.chips, owed + rng.randint(1, max(game.pot, 10))))
+                acted.add(username)
+
+                if rng.random() < 0.02:
+                    # Take the last action back and play it again
+                    if self.call('undo', 1):
+                        self.call('redo', 1)
+
+            # A closed round stays closed, an action clock running out has nobody to act for
+            if self.call('expire_action', game.turn) is not None:
+                raise InvariantError('Action clock acted after the betting round closed')
+
+            in_hand = [name for name in game.player_order if not game.players[name].folded]
+            if len(in_hand) < 2 or game.current_round == rounds[-1]:
+                break
+            self.call('next_round')
+            if game.to_act is None:
+                # Everyone left is all in, the board is dealt out without more betting
+                while game.current_round != rounds[-1]:
+                    self.call('next_round')
+                break
+
+        self.settle()
+
+    def settle(self):
+        rng = self.rng
+        game = self.game
+        in_hand = [name for name in game.player_order if not game.players[name].folded]
+        if len(in_hand) >= 2 and rng.random() < 0.7:
+            deck = rng.sample(range(52), 5 + 2 * len(in_hand))
+            board = deck[:5]
+            hole_cards = {name: deck[5 + 2 * i:7 + 2 * i] for i, name in enumerate(in_hand)}
+            if self.call('showdown', board, hole_cards) is not None:
+                return
+
+        # Paid out by hand, in one or two parts
+        while game.pot > 0:
+            amount = game.pot if rng.random() < 0.6 else rng.randint(1, game.pot)
+            self.call('distribute_pot', rng.choice(in_hand), amount)
+
+    def report(self, elapsed, store):
+        operations = sum(count for count, _, _ in self.timings.values())
+        lines = [
+            f'{self.hands} hands in {elapsed:.2f}s: {self.hands / elapsed:,.0f} hands/s, '
+            f'{operations / elapsed:,.0f} operations/s',
+            f'{"operation":<16}{"count":>12}{"mean us":>10}{"max us":>10}{"time":>8}'
+        ]
+        total = sum(seconds for _, seconds, _ in self.timings.values())
+        for operation, (count, seconds, slowest) in sorted(self.timings.items(), key=lambda item: -item[1][1]):
+            lines.append(f'{operation:<16}{count:>12,}{seconds / count * 1e6:>10.1f}{slowest * 1e6:>10.0f}'
+                         f'{seconds / total:>8.1%}')
+        if store is not None:
+            lines.append(f'{store.rows():,} log entries stored')
+        return '\n'.join(lines)
+
+
+@click.command()
+@click.option('--hands', default=10000, help='Hands to play')
+@click.option('--players', default=6, help='Players seated at the start')
+@click.option('--store', 'store_kind', type=click.Choice(['none', 'memory', 'sqlite']), default='none',
+              help='Where the table is kept')
+@click.option('--db', default='simulation.db', help='SQLite file of --store sqlite')
+@click.option('--synchronous', type=click.Choice(['OFF', 'NORMAL', 'FULL']), default='NORMAL',
+              help='SQLite synchronous setting of --store sqlite')
+@click.option('--seed', type=int, default=None, help='Seed of the random hands, to replay a run')
+def main(hands, players, store_kind, db, synchronous, seed):
+    """Play random hands against the engine and report its speed"""
+    seed = seed if seed is not None else random.randrange(2 ** 32)
+    store = {'none': lambda: None, 'memory': MemoryStore,
+             'sqlite': lambda: SqliteStore(db, synchronous)}[store_kind]()
+    simulator = Simulator(store, players, seed)
+
+    started = time.perf_counter()
+    try:
+        simulator.play(hands)
+    except InvariantError as e:
+        raise click.ClickException(f'Hand {simulator.hands + 1} (seed {seed}): {e}')
+    print(simulator.report(time.perf_counter() - started, store))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import math
+import threading
+import time
+
+
+class Timer:
+    """Handle of a scheduled callback, used to cancel it"""
+
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled')
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline  # Tick at which the timer fires
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class TimerWheel:
+    """All pending timers of the process in a hierarchical timing wheel.
+
+    Time advances in ticks. The first wheel has one slot per tick and every
+    wheel above it has slots that span a full turn of the wheel below, so
+    scheduling, cancelling and advancing one tick are O(1) however many
+    timers are pending. A slot of an upper wheel is spread over the wheel
+    below when time reaches it. A single background task advances the wheel,
+    instead of one thread or greenlet per timer.
+    """
+
+    def __init__(self, tick=0.1, slot_bits=6, levels=4, clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self.slot_bits = slot_bits
+        self.mask = (1 << slot_bits) - 1
+        self.levels = levels
+        self.span = 1 << (slot_bits * levels)  # Ticks covered by all wheels, ~19 days by default
+        self.wheels = [[[] for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self.current = 0  # Ticks processed since start
+        self.start = clock()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._pending
+
+    def schedule(self, delay, callback, *args):
+        """Run callback(*args) after delay seconds and return its Timer"""
+        with self._lock:
+            # Round up, a timer never fires early
+            deadline = max(self.current + 1, math.ceil((self.clock() - self.start + delay) / self.tick))
+            timer = Timer(deadline, callback, args)
+            self._insert(timer)
+            self._pending += 1
+        return timer
+
+    def cancel(self, timer):
+        """Cancel a timer that has not run yet, it is dropped when its slot comes up"""
+        with self._lock:
+            if not timer.cancelled:
+                timer.cancelled = True
+                self._pending -= 1
+
+    def time_until_next(self, limit):
+        """Seconds until the next tick is due, or limit when nothing is pending"""
+        if not self._pending:
+            return limit
+        next_tick = self.start + (self.current + 1) * self.tick
+        return min(limit, max(0.0, next_tick - self.clock()))
+
+    def run_due(self):
+        """Advance the wheel to the current time, running every timer due, and return how many ran"""
+        now = int((self.clock() - self.start) / self.tick)
+        due = []
+        with self._lock:
+            if not self._pending:
+                # Nothing to find in the slots, skip straight to the present
+                self.current = max(self.current, now)
+
+            while self.current < now:
+                self.current += 1
+                self._cascade()
+
+                slot = self.wheels[0][self.current & self.mask]
+                for timer in slot:
+                    if not timer.cancelled:
+                        timer.cancelled = True  # Spent, a late cancel() is a no-op
+                        self._pending -= 1
+                        due.append(timer)
+                slot.clear()
+
+        # Callbacks run outside the lock, so they can schedule further timers
+        for timer in due:
+            timer.callback(*timer.args)
+        return len(due)
+
+    def _insert(self, timer):
+        # Must be called with the lock held
+        delta = timer.deadline - self.current
+        # Timers beyond the last wheel wait in its farthest slot and are placed again from there
+        deadline = timer.deadline if delta < self.span else self.current + self.span - 1
+
+        level = 0
+        while level < self.levels - 1 and deadline - self.current >= 1 << (self.slot_bits * (level + 1)):
+            level += 1
+        self.wheels[level][(deadline >> (self.slot_bits * level)) & self.mask].append(timer)
+
+    def _cascade(self):
+        # Must be called with the lock held. Upper wheels first, so timers can fall through several levels.
+        for level in range(self.levels - 1, 0, -1):
+            shift = self.slot_bits * level
+            if self.current & ((1 << shift) - 1):
+                continue
+
+            slot = self.wheels[level][(self.current >> shift) & self.mask]
+            timers = [timer for timer in slot if not timer.cancelled]
+            slot.clear()
+            for timer in timers:
+                self._insert(timer)
@@ -0,0 +1,257 @@
+import random
+import time
+
+from game import Game
+from player import Player
+
+# Blind levels used when a tournament is created without its own schedule
+DEFAULT_LEVELS = [
+    {'small_blind': 5, 'big_blind': 10, 'duration': 15 * 60},
+    {'small_blind': 10, 'big_blind': 20, 'duration': 15 * 60},
+    {'small_blind': 15, 'big_blind': 30, 'duration': 15 * 60},
+    {'small_blind': 25, 'big_blind': 50, 'duration': 15 * 60},
+    {'small_blind': 50, 'big_blind': 100, 'duration': 15 * 60},
+    {'small_blind': 75, 'big_blind': 150, 'duration': 15 * 60},
+    {'small_blind': 100, 'big_blind': 200, 'duration': 15 * 60},
+    {'small_blind': 200, 'big_blind': 400, 'duration': 15 * 60}
+]
+
+
+class Tournament:
+    """A multi-table tournament with a blind schedule.
+
+    Every table is a plain Game, or a stand-in with the same interface made
+    by new_table, e.g. for a table run in another process. Level changes are scheduled on the shared
+    timer wheel and take effect from the next hand dealt at each table. Players
+    left without chips at the end of a hand are eliminated, and tables are
+    balanced or broken up between hands as the field shrinks.
+    """
+
+    def __init__(self, tournament_id, name, usernames, timers, notify,
+                 starting_chips=1000, table_size=9, levels=None, new_table=Game):
+        self.id = tournament_id
+        self.name = name
+        self.timers = timers
+        self.notify = notify  # Called with (event, data) on level ups and when the tournament ends
+        self.starting_chips = starting_chips
+        self.table_size = table_size
+        self.levels = levels or DEFAULT_LEVELS
+        self.new_table = new_table  # Makes an empty table
+        self.level = 0
+        self.level_ends_at = None  # Wall clock time of the next level up, for client countdowns
+        self.started = False
+        self.finished = False
+        self.tables = {}  # Map of table id -> Game
+        self.seats = {}  # Map of username -> table id
+        self.eliminated = []  # Usernames in order of elimination
+        self.version = 0  # Incremented on every change to the tournament summary
+        self._timer = None
+        self._seat_players(usernames)
+
+    @property
+    def small_blind(self):
+        return self.levels[self.level]['small_blind']
+
+    @property
+    def big_blind(self):
+        return self.levels[self.level]['big_blind']
+
+    def _seat_players(self, usernames):
+        """Draw random seats, spreading the players evenly over as few tables as possible"""
+        usernames = list(usernames)
+        random.shuffle(usernames)
+        table_count = max(1, -(-len(usernames) // self.table_size))
+
+        for table_id in range(1, table_count + 1):
+            self.tables[table_id] = self.new_table()
+
+        for i, username in enumerate(usernames):
+            table_id = i % table_count + 1
+            self.tables[table_id].add_player(Player(username, self.starting_chips))
+            self.seats[username] = table_id
+
+    def start(self):
+        """Start the blind clock"""
+        if self.started:
+            return False
+
+        self.started = True
+        self._schedule_level_up()
+        self.version += 1
+        return True
+
+    def _schedule_level_up(self):
+        if self.level >= len(self.levels) - 1:
+            # The last level lasts until the tournament ends
+            self.level_ends_at = None
+            return
+
+        duration = self.levels[self.level]['duration']
+        self.level_ends_at = time.time() + duration
+        self._timer = self.timers.schedule(duration, self._level_up)
+
+    def _level_up(self):
+        self._timer = None
+        if self.finished:
+            return
+
+        self.level += 1
+        self._schedule_level_up()
+        self.version += 1
+        self.notify('tournament_level_up', {
+            'tournament_id': self.id,
+            'level': self.level + 1,
+            'small_blind': self.small_blind,
+            'big_blind': self.big_blind,
+            'level_ends_at': self.level_ends_at
+        })
+
+    def start_hand(self, table_id):
+        """Deal a new hand at a table with the blinds of the current level"""
+        table = self.tables.get(table_id)
+        if not self.started or self.finished or not table or table.active:
+            return False
+        return table.start_game(self.small_blind, self.big_blind)
+
+    def finish_hand(self, table_id):
+        """End the hand at a table, eliminate busted players and rebalance the tables.
+
+        Returns the list of seat moves made while balancing, or None if the hand
+        cannot end, e.g. while chips are left in the pot.
+        """
+        table = self.tables.get(table_id)
+        # The next hand starts with an empty pot, whatever is left in it would be lost
+        if not table or table.pot or not table.end_game():
+            return None
+
+        for username in list(table.player_order):
+            if table.players[username].chips <= 0:
+                self._eliminate(username)
+
+        return self._after_change()
+
+    def eliminate(self, username):
+        """Knock a player out by hand, e.g. when they leave the tournament"""
+        table = self.tables.get(self.seats.get(username))
+        if self.finished or not table or table.active:
+            return None
+
+        self._eliminate(username)
+        return self._after_change()
+
+    def _eliminate(self, username):
+        table_id = self.seats.pop(username)
+        self.tables[table_id].remove_player(username)
+        self.eliminated.append(username)
+
+    def _after_change(self):
+        moves = self.balance()
+        self.version += 1
+
+        if len(self.seats) <= 1:
+            self._finish()
+        return moves
+
+    def _finish(self):
+        self.finished = True
+        self.level_ends_at = None
+        if self._timer:
+            self.timers.cancel(self._timer)
+            self._timer = None
+
+        self.notify('tournament_finished', {
+            'tournament_id': self.id,
+            'winner': next(iter(self.seats), None)
+        })
+
+    def balance(self):
+        """Break tables that are no longer needed and even out the rest.
+
+        Only tables between hands give up or receive players, anything that
+        cannot be moved yet is picked up after the next finished hand.
+        """
+        moves = []
+
+        # Break the smallest idle table while the others can seat everyone
+        while len(self.tables) > 1 and len(self.seats) <= (len(self.tables) - 1) * self.table_size:
+            idle = [table_id for table_id, table in self.tables.items() if not table.active]
+            if not idle:
+                break
+
+            broken = min(idle, key=lambda table_id: len(self.tables[table_id].player_order))
+            for username in list(self.tables[broken].player_order):
+                target = self._smallest_table(exclude=broken)
+                if target is None:
+                    break
+                moves.append(self._move(username, broken, target))
+
+            if self.tables[broken].player_order:
+                break
+            self.tables.pop(broken).close()
+
+        # Even out the remaining tables one seat at a time
+        while True:
+            idle = [table_id for table_id, table in self.tables.items() if not table.active]
+            if len(idle) < 2:
+                break
+
+            largest = max(idle, key=lambda table_id: len(self.tables[table_id].player_order))
+            smallest = min(idle, key=lambda table_id: len(self.tables[table_id].player_order))
+            if len(self.tables[largest].player_order) - len(self.tables[smallest].player_order) <= 1:
+                break
+
+            table = self.tables[largest]
+            # The player due the big blind next moves, as in a live tournament
+            username = table.player_order[(table.dealer_position + 2) % len(table.player_order)]
+            moves.append(self._move(username, largest, smallest))
+
+        return moves
+
+    def _smallest_table(self, exclude):
+        candidates = [table_id for table_id, table in self.tables.items()
+                      if table_id != exclude and not table.active
+                      and len(table.player_order) < self.table_size]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda table_id: len(self.tables[table_id].player_order))
+
+    def _move(self, username, from_table, to_table):
+        player = self.tables[from_table].players[username]
+        self.tables[from_table].remove_player(username)
+        self.tables[to_table].add_player(player)
+        self.seats[username] = to_table
+        return {'username': username, 'from_table': from_table, 'to_table': to_table}
+
+    def table_to_dict(self, table_id):
+        """State of one table, sent to clients following that table"""
+        return {
+            'tournament_id': self.id,
+            'table_id': table_id,
+            **self.tables[table_id].to_dict()
+        }
+
+    def to_dict(self):
+        """Summary of the tournament without the per-table hand state"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'version': self.version,
+            'started': self.started,
+            'finished': self.finished,
+            'level': self.level + 1,
+            'small_blind': self.small_blind,
+            'big_blind': self.big_blind,
+            'level_ends_at': self.level_ends_at,
+            'levels': self.levels,
+            'remaining': len(self.seats),
+            'tables': {table_id: list(table.player_order) for table_id, table in self.tables.items()},
+            'results': self.results()
+        }
+
+    def results(self):
+        """Finishing places of the eliminated players, and of the winner once there is one"""
+        field = len(self.seats) + len(self.eliminated)
+        results = [{'username': username, 'place': field - i} for i, username in enumerate(self.eliminated)]
+        if self.finished:
+            results.extend({'username': username, 'place': 1} for username in self.seats)
+        return results
@@ -0,0 +1,164 @@
+"""Tournament tables run by a pool of worker processes.
+
+Every worker process holds a shard of the tables and runs their engine, the
+Socket.IO front end only keeps a proxy per table. A call on a proxy sends a
+compact (table id, method, arguments) message over the worker's pipe and
+gets (error, result, state) back, the state being the table's to_dict()
+after the call. The proxy keeps it to answer reads without another round
+trip. Tables are spread over the workers by id, so the engine work of
+different tables runs on different cores, apart from the websocket I/O.
+"""
+import itertools
+import multiprocessing
+import threading
+
+from game import Game
+from player import Player
+
+# Engine methods a proxy can call, all of them take and return plain data
+METHODS = {'start_game', 'end_game', 'next_hand', 'remove_player', 'next_round', 'place_bet',
+           'fold_player', 'check_player', 'unfold_player', 'distribute_pot', 'showdown',
+           'sit_out', 'adjust_chips', 'undo', 'redo', 'reorder_players'}
+
+
+def _serve(conn):
+    """Main loop of a worker process: run calls on its tables until the pipe closes"""
+    tables = {}  # Map of table id -> Game
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        table_id, method, args = message
+        try:
+            if method == 'create':
+                tables[table_id] = Game()
+                result = None
+            elif method == 'close':
+                tables.pop(table_id, None)
+                conn.send((None, None, None))
+                continue
+            elif method == 'add_player':
+                result = tables[table_id].add_player(Player.from_dict(args[0]))
+            elif method in METHODS:
+                result = getattr(tables[table_id], method)(*args)
+            else:
+                raise ValueError(f'Unknown method {method}')
+            conn.send((None, result, tables[table_id].to_dict()))
+        except Exception as e:
+            conn.send((repr(e), None, None))
+
+
+class Worker:
+    """A worker process and the pipe to it, one call in flight at a time"""
+
+    def __init__(self):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.lock = threading.Lock()
+
+    def call(self, message):
+        with self.lock:
+            self.conn.send(message)
+            return self.conn.recv()
+
+    def stop(self):
+        with self.lock:
+            self.conn.send(None)
+            self.conn.close()
+        self.process.join()
+
+
+class RemoteTable:
+    """Stand-in for a Game running in a worker, with the same methods and state attributes"""
+
+    def __init__(self, table_id, worker):
+        self.table_id = table_id
+        self.worker = worker
+        self.state = None  # Last to_dict() of the table
+        self._players = None  # Players of the last state, built when first asked for
+        self._call('create')
+
+    def _call(self, method, *args):
+        error, result, state = self.worker.call((self.table_id, method, args))
+        if error:
+            raise RuntimeError(f'Table {self.table_id} failed in {method}: {error}')
+        if state is not None:
+            self.state = state
+            self._players = None
+        return result
+
+    def add_player(self, player):
+        return self._call('add_player', player.to_dict())
+
+    def close(self):
+        self._call('close')
+
+    @property
+    def players(self):
+        if self._players is None:
+            self._players = {data['username']: Player.from_dict(data) for data in self.state['players']}
+        return self._players
+
+    @property
+    def player_order(self):
+        return self.state['player_order']
+
+    @property
+    def active(self):
+        return self.state['active']
+
+    @property
+    def dealer_position(self):
+        return self.state['dealer_position']
+
+    @property
+    def pot(self):
+        return self.state['pot']
+
+    @property
+    def to_act(self):
+        return self.state['to_act']
+
+    def to_dict(self):
+        return self.state
+
+
+def _remote_method(method):
+    def call(self, *args):
+        return self._call(method, *args)
+    call.__name__ = method
+    return call
+
+
+for _method in METHODS:
+    setattr(RemoteTable, _method, _remote_method(_method))
+
+
+class TablePool:
+    """Worker processes for tables, started when the first table is made"""
+
+    def __init__(self, size):
+        self.size = size
+        self.workers = []
+        self.table_ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def table(self):
+        """A new empty table on the worker its id falls to"""
+        with self.lock:
+            if not self.workers:
+                self.workers = [Worker() for _ in range(self.size)]
+            table_id = next(self.table_ids)
+        return RemoteTable(table_id, self.workers[table_id % self.size])
+
+    def stop(self):
+        with self.lock:
+            for worker in self.workers:
+                worker.stop()
+            self.workers = []
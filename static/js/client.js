@@ -1,11 +1,15 @@
 // Socket.IO client-side connection and event handling
 let socket;
-let gameState = {
+// Start from the state embedded in the page when available
+let gameState = window.initialState || {
+    version: 0,
     players: [],
     player_order: [],
     active: false,
     pot: 0,
     game_log: [],
+    log_count: 0,
+    log_start_id: 0,
     current_round: 'preflop',
     round_name: 'Pre-Flop',
     small_blind: 5,
@@ -13,8 +17,14 @@ let gameState = {
     dealer_position: 0
 };
 
+// Last state from the server, gameState is this plus the actions still waiting for it
+let confirmedState = gameState;
+let pendingActions = []; // Actions shown before the server applied them, oldest first
+let actionSeq = 0; // Sequence number of the last action sent
+
 let currentUser = null;
 let selectedPlayerId = null;
+let equities = {}; // Username -> win, tie and equity of the hands shown, until the hand is over
 let theme = 'casino';
 
 // Define a fallback updateUI function in case ui.js hasn't loaded yet
@@ -38,8 +48,17 @@ if (typeof window.updateUI !== 'function') {
 
 // Socket connection and event setup
 function setupSocket() {
-    // Connect to Socket.IO server
-    socket = io();
+    // Connect to Socket.IO server, spectators get a throttled read-only feed
+    socket = window.spectatorMode ? io({ query: { role: 'spectator' } }) : io();
+
+    // Acknowledge every frame on receipt, the server sends the next one only after
+    // the ack so a slow connection gets the latest state instead of a backlog
+    socket.onAny((event, ...args) => {
+        const ack = args[args.length - 1];
+        if (typeof ack === 'function') {
+            ack();
+        }
+    });
 
     // Socket event listeners
     socket.on('connect', () => {
@@ -49,8 +68,16 @@ function setupSocket() {
         currentUser = document.getElementById('current-user')?.querySelector('strong')?.textContent;
         console.log('Current user:', currentUser);
 
-        // Join the game
-        socket.emit('join_game');
+        // Actions sent on a previous connection are never answered, the state shows whether they went through
+        if (pendingActions.length) {
+            pendingActions = [];
+            refreshState();
+        }
+
+        // Join the game, the server only sends state newer than what we rendered
+        if (!window.spectatorMode) {
+            socket.emit('join_game', { version: confirmedState.version });
+        }
     });
 
     socket.on('disconnect', () => {
@@ -59,16 +86,45 @@ function setupSocket() {
 
     socket.on('game_state_update', (data) => {
         console.log('Game state update:', data);
-        gameState = data;
-
-        // Safe call to updateUI
-        if (typeof window.updateUI === 'function') {
-            try {
-                window.updateUI();
-            } catch (error) {
-                console.error('Error in updateUI:', error);
-            }
+
+        // A state sent in answer to our own action already includes it and the ones before it
+        if (data.seq !== undefined) {
+            pendingActions = pendingActions.filter(action => action.seq > data.seq);
+        }
+
+        // Ignore frames that are not newer than the state already shown
+        if (data.version <= confirmedState.version) {
+            if (data.seq !== undefined) refreshState();
+            return;
+        }
+        applyGameState(data);
+    });
+
+    // The server's answer to an action shown ahead of time: keep it until the state
+    // of the given version arrives, or take it back if it was refused
+    socket.on('action_processed', (data) => {
+        const action = pendingActions.find(pending => pending.seq === data.seq);
+        if (!action) return;
+
+        if (data.applied) {
+            action.version = data.version;
+        } else {
+            pendingActions = pendingActions.filter(pending => pending !== action);
+        }
+        refreshState();
+    });
+
+    // Undo and redo arrive as a delta against the state already shown
+    socket.on('game_state_delta', (delta) => {
+        console.log('Game state delta:', delta);
+
+        if (delta.version <= confirmedState.version) return;
+        if (delta.version !== confirmedState.version + 1) {
+            // A frame was missed, ask for the full state instead
+            socket.emit('join_game', { version: confirmedState.version });
+            return;
         }
+        applyGameDelta(delta);
     });
 
     socket.on('player_joined', (data) => {
@@ -107,10 +163,45 @@ function setupSocket() {
         console.log('Player folded:', data);
     });
 
+    socket.on('player_checked', (data) => {
+        console.log('Player checked:', data);
+    });
+
+    // Only the start of a clock is sent, the countdown is animated locally
+    socket.on('action_clock_started', (data) => {
+        console.log('Action clock started:', data);
+        confirmedState.to_act = data.username;
+        confirmedState.action_clock = data.seconds;
+        confirmedState.action_ends_at = data.ends_at;
+        refreshState();
+    });
+
+    socket.on('action_clock_expired', (data) => {
+        console.log('Action clock expired:', data);
+        // The automatic check or fold arrives with the next game_state_update
+    });
+
     socket.on('round_changed', (data) => {
         console.log('Round changed:', data);
     });
 
+    socket.on('equity_update', (data) => {
+        console.log('Equity:', data);
+        equities = data.players;
+        window.updateUI();
+    });
+
+    socket.on('showdown_result', (data) => {
+        console.log('Showdown:', data);
+        equities = {};
+
+        // The cards are spent once the pot is settled
+        document.getElementById('board-cards').value = '';
+        document.querySelectorAll('#showdown-hands input').forEach(input => {
+            input.value = '';
+        });
+    });
+
     socket.on('pot_distributed', (data) => {
         console.log('Pot distributed:', data);
     });
@@ -140,6 +231,144 @@ function setupSocket() {
     });
 }
 
+// Replace the current state and re-render
+function applyGameState(state) {
+    // Equities belong to one hand, a new hand moves the button
+    if (!state.active || state.dealer_position !== confirmedState.dealer_position) {
+        equities = {};
+    }
+    confirmedState = state;
+    refreshState();
+}
+
+// Show the server's state with the pending actions on top and re-render
+function refreshState() {
+    predictState();
+    syncScreen();
+
+    // Safe call to updateUI
+    if (typeof window.updateUI === 'function') {
+        try {
+            window.updateUI();
+        } catch (error) {
+            console.error('Error in updateUI:', error);
+        }
+    }
+}
+
+// Merge a delta into the current state and re-render
+function applyGameDelta(delta) {
+    const changed = new Map(delta.players.map(player => [player.username, player]));
+
+    applyGameState({
+        ...confirmedState,
+        version: delta.version,
+        pot: delta.pot,
+        current_round: delta.current_round,
+        round_name: delta.round_name,
+        to_act: delta.to_act,
+        action_ends_at: delta.action_ends_at,
+        can_undo: delta.can_undo,
+        can_redo: delta.can_redo,
+        players: confirmedState.players.map(player => changed.get(player.username) || player),
+        game_log: confirmedState.game_log.concat(delta.log_entries),
+        log_count: confirmedState.log_count + delta.log_entries.length
+    });
+}
+
+// Apply the pending actions to a copy of the server's state
+function predictState() {
+    // An action the server applied is part of every state from its version on
+    pendingActions = pendingActions.filter(action => !action.version || action.version > confirmedState.version);
+    if (pendingActions.length === 0) {
+        gameState = confirmedState;
+        return;
+    }
+
+    const state = { ...confirmedState, players: confirmedState.players.map(player => ({ ...player })) };
+    pendingActions.forEach(action => predictAction(state, action));
+    gameState = state;
+}
+
+// Whether the server would accept an action in the given state, only those are shown ahead of time
+function canPredict(state, action) {
+    const player = state.players.find(p => p.username === action.username);
+    if (!state.active || !player || player.folded) return false;
+
+    if (action.type === 'place_bet') {
+        return action.amount > 0 && action.amount <= player.chips;
+    }
+    if (action.type === 'check') {
+        return player.current_bet >= Math.max(...state.players.map(p => p.current_bet));
+    }
+    return true;
+}
+
+// The same changes the server makes for a bet, fold or check
+function predictAction(state, action) {
+    const player = state.players.find(p => p.username === action.username);
+    if (!player) return;
+
+    if (action.type === 'place_bet') {
+        player.chips -= action.amount;
+        player.current_bet += action.amount;
+        player.total_bet += action.amount;
+        player.total_lost += action.amount;
+        state.pot += action.amount;
+    } else if (action.type === 'fold') {
+        player.folded = true;
+    }
+    state.to_act = nextToAct(state, action.username);
+}
+
+// First player after the given one who can still act, none once the hand is down to one player
+function nextToAct(state, username) {
+    const players = new Map(state.players.map(player => [player.username, player]));
+    const order = state.player_order;
+    const inHand = order.filter(name => players.has(name) && !players.get(name).folded);
+    if (inHand.length < 2) return null;
+
+    const index = order.indexOf(username);
+    for (let offset = 1; offset <= order.length; offset++) {
+        const player = players.get(order[(index + offset) % order.length]);
+        if (player && !player.folded && player.chips > 0) {
+            return player.username;
+        }
+    }
+    return null;
+}
+
+// Send a bet, fold or check and show its outcome at once, tagged so the server's answer can confirm it
+function sendAction(action) {
+    const seq = ++actionSeq;
+    if (canPredict(gameState, action)) {
+        pendingActions.push({ ...action, seq: seq, version: null });
+        refreshState();
+    }
+
+    const { type, ...data } = action;
+    emitAction(type, { ...data, seq: seq });
+}
+
+// Send a change to the table with an idempotency key: the same change against the same
+// state is a double tap or a resend, and the server drops it
+function emitAction(event, data = {}) {
+    const { seq, ...change } = data;
+    const key = `${confirmedState.version}:${JSON.stringify(change)}`;
+    socket.emit(event, { ...data, key: key });
+}
+
+// Show the game screen while a game is running, player management otherwise
+function syncScreen() {
+    const playerManagement = document.getElementById('player-management');
+    const gameScreen = document.getElementById('game-screen');
+
+    if (playerManagement && gameScreen) {
+        playerManagement.classList.toggle('active', !gameState.active);
+        gameScreen.classList.toggle('active', gameState.active);
+    }
+}
+
 // Error display function
 function showError(message) {
     // Create error notification
@@ -174,12 +403,16 @@ function startGame() {
     const smallBlindInput = document.getElementById('small-blind');
     const bigBlindInput = document.getElementById('big-blind');
 
+    const actionClockInput = document.getElementById('action-clock');
+
     const smallBlind = smallBlindInput ? (parseInt(smallBlindInput.value) || 5) : 5;
     const bigBlind = bigBlindInput ? (parseInt(bigBlindInput.value) || 10) : 10;
+    const actionClock = actionClockInput ? Math.max(parseInt(actionClockInput.value) || 0, 0) : 0;
 
-    socket.emit('start_game', {
+    emitAction('start_game', {
         small_blind: smallBlind,
-        big_blind: bigBlind
+        big_blind: bigBlind,
+        action_clock: actionClock
     });
 }
 
@@ -204,7 +437,8 @@ function placeBet() {
         return;
     }
 
-    socket.emit('place_bet', {
+    sendAction({
+        type: 'place_bet',
         username: username,
         amount: amount
     });
@@ -226,13 +460,77 @@ function foldPlayer() {
         return;
     }
 
-    socket.emit('fold', {
+    sendAction({
+        type: 'fold',
+        username: username
+    });
+}
+
+function checkPlayer() {
+    const betPlayerSelect = document.getElementById('bet-player-select');
+
+    if (!betPlayerSelect) {
+        showError('Player selection not found');
+        return;
+    }
+
+    const username = betPlayerSelect.value;
+    if (!username) {
+        showError('Please select a player');
+        return;
+    }
+
+    sendAction({
+        type: 'check',
         username: username
     });
 }
 
 function nextRound() {
-    socket.emit('next_round');
+    emitAction('next_round');
+}
+
+function nextHand() {
+    emitAction('next_hand');
+}
+
+function sitOut(username, sittingOut) {
+    emitAction('sit_out', {
+        username: username,
+        sitting_out: sittingOut
+    });
+}
+
+function calculateEquity(board, hands) {
+    if (Object.keys(hands).length < 2) {
+        showError('Enter the cards of at least two players');
+        return;
+    }
+
+    socket.emit('calculate_equity', {
+        board: board,
+        hands: hands
+    });
+}
+
+function settleShowdown(board, hands) {
+    if (!board.trim() || Object.keys(hands).length === 0) {
+        showError('Enter the board and the cards of at least one player');
+        return;
+    }
+
+    emitAction('showdown', {
+        board: board,
+        hands: hands
+    });
+}
+
+function undoAction(count) {
+    emitAction('undo', { count: count });
+}
+
+function redoAction(count) {
+    emitAction('redo', { count: count });
 }
 
 function payWinnings() {
@@ -256,7 +554,7 @@ function payWinnings() {
         return;
     }
 
-    socket.emit('distribute_pot', {
+    emitAction('distribute_pot', {
         username: username,
         amount: amount
     });
@@ -266,7 +564,7 @@ function payWinnings() {
 
 function endGame() {
     if (!confirm('End this game and reset?')) return;
-    socket.emit('end_game');
+    emitAction('end_game');
 }
 
 function adjustPlayerChips(username, amount) {
@@ -275,14 +573,14 @@ function adjustPlayerChips(username, amount) {
         return;
     }
 
-    socket.emit('adjust_chips', {
+    emitAction('adjust_chips', {
         username: username,
         amount: amount
     });
 }
 
 function reorderPlayers(newOrder) {
-    socket.emit('reorder_players', {
+    emitAction('reorder_players', {
         player_order: newOrder
     });
 }
@@ -310,6 +608,17 @@ function removePlayer(username) {
         });
 }
 
+// Fetch a page of the current game's log older than the given entry id
+function fetchLogPage(beforeId, limit) {
+    return fetch(`/api/game/log?before=${beforeId}&limit=${limit}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Failed to load game log');
+            }
+            return response.json();
+        });
+}
+
 function movePlayerUp(username) {
     const playerIndex = gameState.player_order.indexOf(username);
     if (playerIndex <= 0) return;
@@ -369,6 +678,12 @@ document.addEventListener('DOMContentLoaded', () => {
     setupSocket();
     addErrorStyles();
 
+    // Show the right screen for the embedded state right away, ui.js paints it
+    if (window.initialState) {
+        currentUser = document.getElementById('current-user')?.querySelector('strong')?.textContent;
+        syncScreen();
+    }
+
     // Check if ui.js has loaded properly
     if (window.usingFallbackUI && typeof window.updateUI === 'function') {
         console.warn('Using fallback UI update function. Make sure ui.js is loaded properly.');
@@ -394,11 +709,19 @@ document.addEventListener('DOMContentLoaded', () => {
 window.startGame = startGame;
 window.placeBet = placeBet;
 window.foldPlayer = foldPlayer;
+window.checkPlayer = checkPlayer;
 window.nextRound = nextRound;
+window.nextHand = nextHand;
+window.sitOut = sitOut;
+window.undoAction = undoAction;
+window.redoAction = redoAction;
 window.payWinnings = payWinnings;
+window.settleShowdown = settleShowdown;
+window.calculateEquity = calculateEquity;
 window.endGame = endGame;
 window.adjustPlayerChips = adjustPlayerChips;
 window.reorderPlayers = reorderPlayers;
 window.removePlayer = removePlayer;
+window.fetchLogPage = fetchLogPage;
 window.movePlayerUp = movePlayerUp;
 window.movePlayerDown = movePlayerDown;
\ No newline at end of file
@@ -10,19 +10,39 @@ document.addEventListener('DOMContentLoaded', () => {
     let tablePositionY = 0;
     let tableInitialized = false;
 
-    // Store the real updateUI function so client.js can find it
+    // Rendered DOM nodes keyed by username, so updates only touch what changed
+    const playerListItems = new Map();
+    const seatElements = new Map();
+    let renderPending = false;
+    let draggedPosition = null;
+
+    // Store the real updateUI function so client.js can find it.
+    // Updates are coalesced so a burst of state frames costs a single render.
     window.realUpdateUI = function () {
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(() => {
+            renderPending = false;
+            render();
+        });
+    };
+
+    function render() {
+        // Read the table geometry before any DOM writes to avoid forced layouts
+        const tableLayout = gameState.active ? measureTable() : null;
+        const logWasAtBottom = isLogScrolledToBottom();
+
         updatePlayerList();
         updateStartGameButton();
 
         if (gameState.active) {
-            updatePlayerPositions();
+            updatePlayerPositions(tableLayout);
             updatePotDisplay();
             updateRoundIndicators();
             updateSelects();
             updateQuickBets();
             updateQuickWinnings();
-            updateGameLog();
+            updateGameLog(logWasAtBottom);
 
             // Add the standard bet options
             addStandardBetOptions();
@@ -33,7 +53,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 tableInitialized = true;
             }
         }
-    };
+    }
 
     // Replace the potential fallback with the real implementation
     window.updateUI = window.realUpdateUI;
@@ -49,14 +69,24 @@ document.addEventListener('DOMContentLoaded', () => {
     const betAmountInput = document.getElementById('bet-amount');
     const placeBetBtn = document.getElementById('place-bet-btn');
     const foldBtn = document.getElementById('fold-btn');
+    const checkBtn = document.getElementById('check-btn');
     const quickBetButtonsEl = document.getElementById('quick-bet-buttons');
     const winnerSelectEl = document.getElementById('winner-select');
     const winAmountInput = document.getElementById('win-amount');
     const payWinningsBtn = document.getElementById('pay-winnings-btn');
     const quickWinButtonsEl = document.getElementById('quick-win-buttons');
+    const boardCardsInput = document.getElementById('board-cards');
+    const showdownHandsEl = document.getElementById('showdown-hands');
+    const showdownBtn = document.getElementById('showdown-btn');
+    const equityBtn = document.getElementById('equity-btn');
     const nextRoundBtn = document.getElementById('next-round-btn');
+    const nextHandBtn = document.getElementById('next-hand-btn');
+    const undoBtn = document.getElementById('undo-btn');
+    const redoBtn = document.getElementById('redo-btn');
     const endGameBtn = document.getElementById('end-game-btn');
     const gameLogEl = document.getElementById('game-log');
+    const gameLogRowsEl = gameLogEl.querySelector('.game-log-rows');
+    const gameLogEmptyEl = gameLogEl.querySelector('.game-log-empty');
     const roundDots = document.querySelectorAll('.round-dots .dot');
     const settingsBtn = document.getElementById('settings-btn');
     const settingsModal = document.getElementById('settings-modal');
@@ -70,10 +100,96 @@ document.addEventListener('DOMContentLoaded', () => {
     startGameBtn.addEventListener('click', startGame);
     placeBetBtn.addEventListener('click', placeBet);
     foldBtn.addEventListener('click', foldPlayer);
+    checkBtn.addEventListener('click', checkPlayer);
     nextRoundBtn.addEventListener('click', nextRound);
+    nextHandBtn.addEventListener('click', nextHand);
+    undoBtn.addEventListener('click', () => undoAction(1));
+    redoBtn.addEventListener('click', () => redoAction(1));
     payWinningsBtn.addEventListener('click', payWinnings);
+    // Players who leave their cards empty muck and cannot win
+    function shownHands() {
+        const hands = {};
+        showdownHandsEl.querySelectorAll('input').forEach(input => {
+            if (input.value.trim()) {
+                hands[input.getAttribute('data-username')] = input.value;
+            }
+        });
+        return hands;
+    }
+
+    showdownBtn.addEventListener('click', () => settleShowdown(boardCardsInput.value, shownHands()));
+    equityBtn.addEventListener('click', () => calculateEquity(boardCardsInput.value, shownHands()));
     endGameBtn.addEventListener('click', endGame);
 
+    // Player list, seat and quick bet buttons are rendered incrementally,
+    // so their clicks are handled by delegation on the containers
+    playerListEl.addEventListener('click', (e) => {
+        const btn = e.target.closest('.action-btn');
+        const item = e.target.closest('.player-item');
+        if (!item) return;
+
+        const username = item.getAttribute('data-username');
+        if (!btn) {
+            selectedPlayerId = username;
+            updateUI();
+            return;
+        }
+
+        e.stopPropagation();
+        if (btn.classList.contains('add-btn')) {
+            const amount = prompt('Enter amount to add:');
+            if (amount && !isNaN(amount)) {
+                adjustPlayerChips(username, parseInt(amount));
+            }
+        } else if (btn.classList.contains('remove-btn')) {
+            const amount = prompt('Enter amount to remove:');
+            if (amount && !isNaN(amount)) {
+                adjustPlayerChips(username, -parseInt(amount));
+            }
+        } else if (btn.classList.contains('delete-btn')) {
+            if (confirm(`Are you sure you want to remove ${username} from the game?`)) {
+                removePlayer(username);
+            }
+        } else if (btn.classList.contains('sit-out-btn')) {
+            const player = gameState.players.find(p => p.username === username);
+            sitOut(username, !(player && player.sitting_out));
+        } else if (btn.classList.contains('move-up-btn')) {
+            movePlayerUp(username);
+        } else if (btn.classList.contains('move-down-btn')) {
+            movePlayerDown(username);
+        }
+    });
+
+    playerPositionsEl.addEventListener('click', (e) => {
+        const btn = e.target.closest('[data-action]');
+        if (!btn) return;
+
+        e.stopPropagation();
+        const username = btn.getAttribute('data-username');
+        if (btn.getAttribute('data-action') === 'fold') {
+            sendAction({ type: 'fold', username: username });
+        } else if (btn.getAttribute('data-action') === 'bet') {
+            selectedPlayerId = username;
+            betPlayerSelectEl.value = username;
+            betAmountInput.focus();
+            updateUI();
+        }
+    });
+
+    quickBetButtonsEl.addEventListener('click', (e) => {
+        const btn = e.target.closest('.quick-bet-btn');
+        if (btn) {
+            betAmountInput.value = btn.getAttribute('data-amount');
+        }
+    });
+
+    quickWinButtonsEl.addEventListener('click', (e) => {
+        const btn = e.target.closest('.quick-bet-btn');
+        if (btn) {
+            winAmountInput.value = btn.getAttribute('data-amount');
+        }
+    });
+
     // Add event listener for player selection which should update quick bets
     betPlayerSelectEl.addEventListener('change', () => {
         updateQuickBets();
@@ -135,32 +251,6 @@ document.addEventListener('DOMContentLoaded', () => {
         addChipsAmountInput.value = '';
     });
 
-    // Main UI update function
-    window.updateUI = function () {
-        updatePlayerList();
-        updateStartGameButton();
-
-        if (gameState.active) {
-            updatePlayerPositions();
-            updatePotDisplay();
-            updateRoundIndicators();
-            updateSelects();
-            // Ensure quick bets get updated whenever the UI updates
-            updateQuickBets();
-            updateQuickWinnings();
-            updateGameLog();
-
-            // Add the standard bet options
-            addStandardBetOptions();
-
-            // Setup resizable table (only needs to run once)
-            if (!tableInitialized) {
-                setupResizableTable();
-                tableInitialized = true;
-            }
-        }
-    };
-
     // Function to add standard bet options (separate from updateQuickBets to ensure they're always shown)
     function addStandardBetOptions() {
         // First clear any existing buttons
@@ -178,15 +268,7 @@ document.addEventListener('DOMContentLoaded', () => {
             ];
 
             standardBets.forEach(bet => {
-                const btn = document.createElement('button');
-                btn.className = 'quick-bet-btn';
-                btn.textContent = `$${bet.amount}${bet.label ? ` (${bet.label})` : ''}`;
-
-                btn.addEventListener('click', () => {
-                    betAmountInput.value = bet.amount;
-                });
-
-                standardBetsContainer.appendChild(btn);
+                standardBetsContainer.appendChild(createQuickBetButton(bet));
             });
 
             quickBetButtonsEl.appendChild(standardBetsContainer);
@@ -219,7 +301,7 @@ document.addEventListener('DOMContentLoaded', () => {
             e.stopPropagation();
             tableScale = Math.min(tableScale + 0.1, 1.5);
             applyTableTransform(pokerTable);
-            updatePlayerPositions(); // Recalculate player positions
+            updateUI(); // Recalculate player positions
         });
 
         // Add zoom out functionality
@@ -227,7 +309,7 @@ document.addEventListener('DOMContentLoaded', () => {
             e.stopPropagation();
             tableScale = Math.max(tableScale - 0.1, 0.5);
             applyTableTransform(pokerTable);
-            updatePlayerPositions(); // Recalculate player positions
+            updateUI(); // Recalculate player positions
         });
 
         // Add reset functionality
@@ -237,7 +319,7 @@ document.addEventListener('DOMContentLoaded', () => {
             tablePositionX = 0;
             tablePositionY = 0;
             applyTableTransform(pokerTable);
-            updatePlayerPositions(); // Recalculate player positions
+            updateUI(); // Recalculate player positions
         });
 
         // Make table draggable
@@ -263,7 +345,7 @@ document.addEventListener('DOMContentLoaded', () => {
             if (tableIsDragging) {
                 tableIsDragging = false;
                 pokerTable.classList.remove('dragging');
-                updatePlayerPositions(); // Recalculate player positions when drag ends
+                updateUI(); // Recalculate player positions when drag ends
             }
         });
 
@@ -293,7 +375,7 @@ document.addEventListener('DOMContentLoaded', () => {
             if (tableIsDragging) {
                 tableIsDragging = false;
                 pokerTable.classList.remove('dragging');
-                updatePlayerPositions(); // Recalculate player positions when drag ends
+                updateUI(); // Recalculate player positions when drag ends
             }
         });
     }
@@ -305,89 +387,65 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // Update functions for different UI elements
     function updatePlayerList() {
-        playerListEl.innerHTML = '';
+        const emptyEl = playerListEl.querySelector('.empty-message');
 
         if (gameState.players.length === 0) {
-            playerListEl.innerHTML = '<div class="text-center py-4 text-muted">No players in the game yet.</div>';
+            playerListItems.forEach(el => el.remove());
+            playerListItems.clear();
+            if (!emptyEl) {
+                playerListEl.innerHTML = '<div class="empty-message text-center py-4 text-muted">No players in the game yet.</div>';
+            }
             return;
         }
 
+        if (emptyEl) emptyEl.remove();
+
+        // Drop players that are no longer in the game
+        const usernames = new Set(gameState.players.map(p => p.username));
+        playerListItems.forEach((el, username) => {
+            if (!usernames.has(username)) {
+                el.remove();
+                playerListItems.delete(username);
+            }
+        });
+
         gameState.players.forEach((player, index) => {
-            const playerEl = document.createElement('div');
-            playerEl.className = `player-item ${selectedPlayerId === player.username ? 'selected' : ''}`;
-            playerEl.setAttribute('data-username', player.username);
+            let playerEl = playerListItems.get(player.username);
+            if (!playerEl) {
+                playerEl = document.createElement('div');
+                playerEl.setAttribute('data-username', player.username);
+                playerListItems.set(player.username, playerEl);
+            }
+
+            const isFirst = index === 0;
+            const isLast = index === gameState.players.length - 1;
+            const signature = [player.chips, player.sitting_out, selectedPlayerId === player.username, currentUser, isFirst, isLast].join('|');
 
-            playerEl.innerHTML = `
+            if (playerEl.dataset.signature !== signature) {
+                playerEl.dataset.signature = signature;
+                playerEl.className = `player-item ${selectedPlayerId === player.username ? 'selected' : ''} ${player.sitting_out ? 'sitting-out' : ''}`;
+                playerEl.innerHTML = `
                 <div class="player-info">
                     <div class="player-details">
                         <h3>${player.username}${player.username === currentUser ? ' (You)' : ''}</h3>
-                        <p class="player-chips">$${player.chips}</p>
+                        <p class="player-chips">$${player.chips}${player.sitting_out ? ' · sitting out' : ''}</p>
                     </div>
                 </div>
                 <div class="player-actions">
                     <button class="action-btn add-btn" data-username="${player.username}" title="Add chips">+$</button>
                     <button class="action-btn remove-btn" data-username="${player.username}" title="Remove chips">-$</button>
+                    <button class="action-btn sit-out-btn" data-username="${player.username}" title="${player.sitting_out ? 'Sit in' : 'Sit out'}">${player.sitting_out ? '▶' : '⏸'}</button>
                     <button class="action-btn delete-btn" data-username="${player.username}" title="Remove player">×</button>
-                    ${index > 0 ? `<button class="action-btn move-up-btn" data-username="${player.username}" title="Move up">↑</button>` : ''}
-                    ${index < gameState.players.length - 1 ? `<button class="action-btn move-down-btn" data-username="${player.username}" title="Move down">↓</button>` : ''}
+                    ${!isFirst ? `<button class="action-btn move-up-btn" data-username="${player.username}" title="Move up">↑</button>` : ''}
+                    ${!isLast ? `<button class="action-btn move-down-btn" data-username="${player.username}" title="Move down">↓</button>` : ''}
                 </div>
             `;
+            }
 
-            playerEl.addEventListener('click', () => {
-                selectedPlayerId = player.username;
-                updateUI();
-            });
-
-            playerListEl.appendChild(playerEl);
-        });
-
-        // Add event listeners for player action buttons
-        document.querySelectorAll('.player-actions .add-btn').forEach(btn => {
-            btn.addEventListener('click', (e) => {
-                e.stopPropagation();
-                const username = btn.getAttribute('data-username');
-                const amount = prompt('Enter amount to add:');
-                if (amount && !isNaN(amount)) {
-                    adjustPlayerChips(username, parseInt(amount));
-                }
-            });
-        });
-
-        document.querySelectorAll('.player-actions .remove-btn').forEach(btn => {
-            btn.addEventListener('click', (e) => {
-                e.stopPropagation();
-                const username = btn.getAttribute('data-username');
-                const amount = prompt('Enter amount to remove:');
-                if (amount && !isNaN(amount)) {
-                    adjustPlayerChips(username, -parseInt(amount));
-                }
-            });
-        });
-
-        document.querySelectorAll('.player-actions .delete-btn').forEach(btn => {
-            btn.addEventListener('click', (e) => {
-                e.stopPropagation();
-                const username = btn.getAttribute('data-username');
-                if (confirm(`Are you sure you want to remove ${username} from the game?`)) {
-                    removePlayer(username);
-                }
-            });
-        });
-
-        document.querySelectorAll('.player-actions .move-up-btn').forEach(btn => {
-            btn.addEventListener('click', (e) => {
-                e.stopPropagation();
-                const username = btn.getAttribute('data-username');
-                movePlayerUp(username);
-            });
-        });
-
-        document.querySelectorAll('.player-actions .move-down-btn').forEach(btn => {
-            btn.addEventListener('click', (e) => {
-                e.stopPropagation();
-                const username = btn.getAttribute('data-username');
-                movePlayerDown(username);
-            });
+            // Only move nodes whose order actually changed
+            if (playerListEl.children[index] !== playerEl) {
+                playerListEl.insertBefore(playerEl, playerListEl.children[index] || null);
+            }
         });
     }
 
@@ -395,13 +453,17 @@ document.addEventListener('DOMContentLoaded', () => {
         startGameBtn.disabled = gameState.players.length < 2;
     }
 
-    function updatePlayerPositions() {
-        playerPositionsEl.innerHTML = '';
-
-        // Get the poker table element
+    // Measure the table once per render, before anything is written to the DOM
+    function measureTable() {
         const pokerTable = document.querySelector('.poker-table');
-        const tableRect = pokerTable.getBoundingClientRect();
-        const containerRect = playerPositionsEl.getBoundingClientRect();
+        return {
+            tableRect: pokerTable.getBoundingClientRect(),
+            containerRect: playerPositionsEl.getBoundingClientRect()
+        };
+    }
+
+    function updatePlayerPositions(tableLayout) {
+        const { tableRect, containerRect } = tableLayout || measureTable();
 
         // Calculate the table center point accounting for transform
         const tableCenterX = (tableRect.left + tableRect.right) / 2;
@@ -411,6 +473,15 @@ document.addEventListener('DOMContentLoaded', () => {
         const tableRadius = (Math.min(tableRect.width, tableRect.height) / 2) * 0.95;
         const playerCount = gameState.players.length;
 
+        // Drop seats of players that left
+        const usernames = new Set(gameState.players.map(p => p.username));
+        seatElements.forEach((el, username) => {
+            if (!usernames.has(username)) {
+                el.remove();
+                seatElements.delete(username);
+            }
+        });
+
         // Calculate better player positioning with specific offsets based on position
         gameState.players.forEach((player, index) => {
             // Calculate position around the circle
@@ -439,19 +510,31 @@ document.addEventListener('DOMContentLoaded', () => {
             const playerY = tableCenterY + Math.sin(angle) * tableRadius * radiusMultiplier * tableScale;
 
             // Convert to percentage within the container
-            const left = ((playerX - containerRect.left) / containerRect.width) * 100;
-            const top = ((playerY - containerRect.top) / containerRect.height) * 100;
+            const left = `${((playerX - containerRect.left) / containerRect.width) * 100}%`;
+            const top = `${((playerY - containerRect.top) / containerRect.height) * 100}%`;
+
+            let positionEl = seatElements.get(player.username);
+            if (!positionEl) {
+                positionEl = document.createElement('div');
+                positionEl.className = 'player-position';
+                positionEl.setAttribute('data-username', player.username);
+                makeSeatDraggable(positionEl);
+                seatElements.set(player.username, positionEl);
+                playerPositionsEl.appendChild(positionEl);
+            }
 
-            const positionEl = document.createElement('div');
-            positionEl.className = 'player-position';
-            positionEl.style.left = `${left}%`;
-            positionEl.style.top = `${top}%`;
-            positionEl.setAttribute('data-username', player.username);
+            if (positionEl.style.left !== left) positionEl.style.left = left;
+            if (positionEl.style.top !== top) positionEl.style.top = top;
 
             // Calculate dealer, small blind and big blind positions
             const isDealer = index === gameState.dealer_position;
-            const isSmallBlind = index === (gameState.dealer_position + 1) % playerCount;
-            const isBigBlind = index === (gameState.dealer_position + 2) % playerCount;
+            // The server names the blinds when it skips busted or sitting out seats
+            const isSmallBlind = gameState.small_blind_player
+                ? player.username === gameState.small_blind_player
+                : index === (gameState.dealer_position + 1) % playerCount;
+            const isBigBlind = gameState.big_blind_player
+                ? player.username === gameState.big_blind_player
+                : index === (gameState.dealer_position + 2) % playerCount;
 
             let blindClass = '';
             let blindIndicator = '';
@@ -470,12 +553,34 @@ document.addEventListener('DOMContentLoaded', () => {
                 blindIndicator = `<div class="position-indicator bb-indicator" title="${player.username} - Big Blind">BB<span class="indicator-username">${player.username}</span></div>`;
             }
 
+            const isToAct = gameState.active && player.username === gameState.to_act;
+            const clockEndsAt = isToAct ? gameState.action_ends_at : null;
+
+            // Only rebuild the card when something shown on it changed
+            const playerEquity = equities[player.username];
+            const equityText = playerEquity
+                ? `${Math.round(playerEquity.win * 100)}% win${playerEquity.tie >= 0.005 ? ` · ${Math.round(playerEquity.tie * 100)}% tie` : ''}`
+                : '';
+
+            const signature = [player.chips, player.current_bet, player.total_bet, player.folded, currentUser, blindClass, isToAct, clockEndsAt, equityText].join('|');
+            if (positionEl.dataset.signature === signature) return;
+            positionEl.dataset.signature = signature;
+
+            // The countdown is a CSS animation, started part way through when the clock is already running
+            let actionClock = '';
+            if (clockEndsAt && gameState.action_clock) {
+                const remaining = Math.max(clockEndsAt - Date.now() / 1000, 0);
+                const elapsed = gameState.action_clock - remaining;
+                actionClock = `<div class="action-clock" style="animation-duration: ${gameState.action_clock}s; animation-delay: -${elapsed}s"></div>`;
+            }
+
             // Create a more compact player card
             positionEl.innerHTML = `
-            <div class="player-card ${player.folded ? 'folded' : ''} ${player.username === currentUser ? 'active' : ''} ${blindClass}">
+            <div class="player-card ${player.folded ? 'folded' : ''} ${player.username === currentUser ? 'active' : ''} ${isToAct ? 'to-act' : ''} ${blindClass}">
                 <div class="player-stats">
                     <div class="player-name-line">${player.username}${player.username === currentUser ? ' (You)' : ''}: <span class="player-chips">$${player.chips}</span></div>
                     <div class="player-bet-line"><span class="current-bet">$${player.current_bet}</span> | <span class="total-bet">$${player.total_bet}</span></div>
+                    ${equityText ? `<div class="player-equity">${equityText}</div>` : ''}
                 </div>
                 <div class="player-actions">
                     <button class="action-btn ${player.folded ? 'add-btn' : 'remove-btn'}" data-action="fold" data-username="${player.username}" title="${player.folded ? 'Unfold' : 'Fold'} - ${player.username}">
@@ -488,109 +593,132 @@ document.addEventListener('DOMContentLoaded', () => {
             </div>
             ${player.current_bet > 0 ? `<div class="player-bet">$${player.current_bet}</div>` : ''}
             ${blindIndicator}
+            ${actionClock}
         `;
-
-            playerPositionsEl.appendChild(positionEl);
         });
-
-        // Add event listeners for player actions
-        document.querySelectorAll('[data-action="fold"]').forEach(btn => {
-            btn.addEventListener('click', (e) => {
-                e.stopPropagation();
-                const username = btn.getAttribute('data-username');
-                socket.emit('fold', { username: username });
-            });
-        });
-
-        document.querySelectorAll('[data-action="bet"]').forEach(btn => {
-            btn.addEventListener('click', (e) => {
-                e.stopPropagation();
-                const username = btn.getAttribute('data-username');
-                selectedPlayerId = username;
-                betPlayerSelectEl.value = username;
-                betAmountInput.focus();
-                updateUI();
-            });
-        });
-
-        // Make player positions draggable
-        setupPlayerDragAndDrop();
     }
 
     function updatePotDisplay() {
-        potAmountEl.textContent = `$${gameState.pot}`;
+        const text = `$${gameState.pot}`;
+        if (potAmountEl.textContent !== text) {
+            potAmountEl.textContent = text;
+        }
     }
 
     function updateRoundIndicators() {
-        currentRoundEl.textContent = gameState.round_name;
+        if (currentRoundEl.textContent !== gameState.round_name) {
+            currentRoundEl.textContent = gameState.round_name;
+        }
 
         const rounds = ['preflop', 'flop', 'turn', 'river'];
         const currentIndex = rounds.indexOf(gameState.current_round);
 
         roundDots.forEach((dot, index) => {
-            if (index <= currentIndex) {
-                dot.classList.add('active');
-            } else {
-                dot.classList.remove('active');
-            }
+            dot.classList.toggle('active', index <= currentIndex);
         });
+
+        undoBtn.disabled = !gameState.can_undo;
+        redoBtn.disabled = !gameState.can_redo;
+    }
+
+    // Rebuild a select's options only when the option list changed
+    function syncSelectOptions(selectEl, players) {
+        const signature = players.map(p => `${p.username}:${p.chips}`).join('|');
+
+        if (selectEl.dataset.signature !== signature) {
+            selectEl.dataset.signature = signature;
+            selectEl.innerHTML = '<option value="">Select Player</option>';
+
+            players.forEach(player => {
+                const option = document.createElement('option');
+                option.value = player.username;
+                option.textContent = `${player.username} ($${player.chips})`;
+                selectEl.appendChild(option);
+            });
+        }
+
+        const selected = players.some(p => p.username === selectedPlayerId) ? selectedPlayerId : '';
+        if (selectEl.value !== selected) {
+            selectEl.value = selected;
+        }
     }
 
     function updateSelects() {
         // Update bet player select
-        betPlayerSelectEl.innerHTML = '<option value="">Select Player</option>';
+        syncSelectOptions(betPlayerSelectEl, gameState.players.filter(p => !p.folded));
 
-        const activePlayers = gameState.players.filter(p => !p.folded);
-        activePlayers.forEach(player => {
-            const option = document.createElement('option');
-            option.value = player.username;
-            option.textContent = `${player.username} ($${player.chips})`;
+        // Update winner select
+        syncSelectOptions(winnerSelectEl, gameState.players);
 
-            if (player.username === selectedPlayerId) {
-                option.selected = true;
-            }
+        syncShowdownInputs(gameState.players.filter(p => !p.folded));
+    }
 
-            betPlayerSelectEl.appendChild(option);
+    // One hole card input per player still in the hand, kept across updates so typed cards survive
+    function syncShowdownInputs(players) {
+        const usernames = players.map(p => p.username);
+        showdownHandsEl.querySelectorAll('input').forEach(input => {
+            if (!usernames.includes(input.getAttribute('data-username'))) {
+                input.remove();
+            }
         });
 
-        // Update winner select
-        winnerSelectEl.innerHTML = '<option value="">Select Player</option>';
+        usernames.forEach((username, index) => {
+            let input = showdownHandsEl.querySelector(`input[data-username="${CSS.escape(username)}"]`);
+            if (!input) {
+                input = document.createElement('input');
+                input.type = 'text';
+                input.setAttribute('data-username', username);
+                input.placeholder = `${username}, e.g. Qh Qs`;
+            }
+            if (showdownHandsEl.children[index] !== input) {
+                showdownHandsEl.insertBefore(input, showdownHandsEl.children[index] || null);
+            }
+        });
+    }
 
-        gameState.players.forEach(player => {
-            const option = document.createElement('option');
-            option.value = player.username;
-            option.textContent = `${player.username} ($${player.chips})`;
+    function createQuickBetButton(bet) {
+        const btn = document.createElement('button');
+        btn.className = 'quick-bet-btn';
+        btn.setAttribute('data-amount', bet.amount);
+        btn.textContent = `$${bet.amount}${bet.label ? ` (${bet.label})` : ''}`;
+        return btn;
+    }
 
-            if (player.username === selectedPlayerId) {
-                option.selected = true;
+    // Update a row of quick bet buttons in place, reusing existing buttons
+    function syncQuickBetButtons(containerEl, bets) {
+        bets.forEach((bet, index) => {
+            const text = `$${bet.amount}${bet.label ? ` (${bet.label})` : ''}`;
+            const btn = containerEl.children[index];
+
+            if (!btn) {
+                containerEl.appendChild(createQuickBetButton(bet));
+            } else if (btn.textContent !== text) {
+                btn.setAttribute('data-amount', bet.amount);
+                btn.textContent = text;
             }
-
-            winnerSelectEl.appendChild(option);
         });
+
+        while (containerEl.children.length > bets.length) {
+            containerEl.lastChild.remove();
+        }
     }
 
     function updateQuickBets() {
-        // Clear any existing dynamic quick bets (but leave standard bets)
         let dynamicBetsContainer = quickBetButtonsEl.querySelector('.dynamic-bets');
-        if (dynamicBetsContainer) {
-            dynamicBetsContainer.remove();
+        if (!dynamicBetsContainer) {
+            dynamicBetsContainer = document.createElement('div');
+            dynamicBetsContainer.className = 'dynamic-bets';
+            quickBetButtonsEl.appendChild(dynamicBetsContainer);
         }
 
-        const selectedUsername = betPlayerSelectEl.value;
-        if (!selectedUsername) return;
-
-        const player = gameState.players.find(p => p.username === selectedUsername);
-        if (!player) return;
-
-        // Create container for dynamic bets
-        dynamicBetsContainer = document.createElement('div');
-        dynamicBetsContainer.className = 'dynamic-bets';
-
         // Generate pot-based quick bet amounts
         const potBets = [];
 
+        const selectedUsername = betPlayerSelectEl.value;
+        const player = selectedUsername ? gameState.players.find(p => p.username === selectedUsername) : null;
+
         // Add pot-based bets
-        if (gameState.pot > 0) {
+        if (player && gameState.pot > 0) {
             // 1/4 pot
             const quarterPot = Math.floor(gameState.pot / 4);
             if (quarterPot <= player.chips && quarterPot > 0) {
@@ -619,96 +747,233 @@ document.addEventListener('DOMContentLoaded', () => {
             if (doublePot <= player.chips) {
                 potBets.push({ amount: doublePot, label: '2× Pot' });
             }
+        }
 
-            // Create buttons for pot-based bets
-            potBets.forEach(bet => {
-                const btn = document.createElement('button');
-                btn.className = 'quick-bet-btn';
-                btn.textContent = `$${bet.amount}${bet.label ? ` (${bet.label})` : ''}`;
+        syncQuickBetButtons(dynamicBetsContainer, potBets);
+    }
 
-                btn.addEventListener('click', () => {
-                    betAmountInput.value = bet.amount;
-                });
+    function updateQuickWinnings() {
+        // Generate quick win amounts
+        const quickWins = [];
 
-                dynamicBetsContainer.appendChild(btn);
-            });
+        if (gameState.pot > 0) {
+            // Add pot-based payouts
+            quickWins.push({ amount: gameState.pot, label: 'All' });
 
-            quickBetButtonsEl.appendChild(dynamicBetsContainer);
+            // 3/4 pot
+            const threeQuarterPot = Math.floor(gameState.pot * 0.75);
+            if (threeQuarterPot > 0 && threeQuarterPot !== gameState.pot) {
+                quickWins.push({ amount: threeQuarterPot, label: '¾ Pot' });
+            }
+
+            // 1/2 pot
+            const halfPot = Math.floor(gameState.pot / 2);
+            if (halfPot > 0 && halfPot !== threeQuarterPot) {
+                quickWins.push({ amount: halfPot, label: '½ Pot' });
+            }
+
+            // 1/4 pot
+            const quarterPot = Math.floor(gameState.pot / 4);
+            if (quarterPot > 0 && quarterPot !== halfPot) {
+                quickWins.push({ amount: quarterPot, label: '¼ Pot' });
+            }
         }
+
+        syncQuickBetButtons(quickWinButtonsEl, quickWins);
     }
 
-    function updateQuickWinnings() {
-        quickWinButtonsEl.innerHTML = '';
+    // Log entries arrive as structured fields, the text is rendered here
+    const ROUND_NAMES = {
+        preflop: 'Pre-Flop',
+        flop: 'Flop',
+        turn: 'Turn',
+        river: 'River'
+    };
 
-        if (gameState.pot <= 0) return;
+    const LOG_TEMPLATES = {
+        playerJoined: e => `Player ${e.username} joined the game`,
+        playerLeft: e => `Player ${e.username} left the game`,
+        gameStart: () => 'Game started',
+        handStart: e => `New hand, ${e.username} has the button`,
+        smallBlind: e => `${e.username} posted small blind: $${e.amount}`,
+        bigBlind: e => `${e.username} posted big blind: $${e.amount}`,
+        bet: e => `${e.username} bet $${e.amount} in ${ROUND_NAMES[e.round] || e.round}.` +
+            (e.pot !== undefined ? ` Total pot: $${e.pot}.` : ''),
+        fold: e => `${e.username} folded`,
+        check: e => `${e.username} checked in ${ROUND_NAMES[e.round] || e.round}`,
+        checkRevert: e => `${e.username}'s check was undone`,
+        refund: e => `${e.username} was refunded $${e.amount}.` +
+            (e.pot !== undefined ? ` Total pot: $${e.pot}.` : ''),
+        reclaim: e => `$${e.amount} was taken back from ${e.username}.` +
+            (e.pot !== undefined ? ` Pot: $${e.pot}` : ''),
+        roundRevert: e => `Round reverted to ${ROUND_NAMES[e.round] || e.round}`,
+        unfold: e => `${e.username} returned to game`,
+        roundChange: e => `Round changed to ${ROUND_NAMES[e.round] || e.round}`,
+        distribution: e => `${e.username} received $${e.amount} from the pot.` +
+            (e.pot !== undefined ? ` Remaining pot: $${e.pot}` : ''),
+        gameEnd: e => e.pot !== undefined ? `Game ended with pot: $${e.pot}` : 'Game ended'
+    };
 
-        // Generate quick win amounts
-        const quickWins = [];
+    function formatLogEntry(entry) {
+        const template = LOG_TEMPLATES[entry.type];
+        return template ? template(entry) : entry.type;
+    }
 
-        // Add pot-based payouts
-        quickWins.push({ amount: gameState.pot, label: 'All' });
+    // The game log is virtualized: only the rows in view plus a small buffer exist
+    // in the DOM. State updates carry the tail of the log and older entries are
+    // fetched page by page as they are scrolled into view.
+    const LOG_ROW_HEIGHT = 28;
+    const LOG_ROW_BUFFER = 10;
+    const LOG_PAGE_SIZE = 100;
+
+    let logEntries = []; // Sparse, indexed by position in the current game's log
+    let logStartId = null;
+    let logCount = 0;
+    let logOldestIndex = 0; // Entries from here to the end are loaded
+    let logLoadingOlder = false;
+    let logScrollPending = false;
+    const logRows = new Map(); // Row index -> element
+
+    gameLogEl.addEventListener('scroll', () => {
+        if (logScrollPending) return;
+        logScrollPending = true;
+        requestAnimationFrame(() => {
+            logScrollPending = false;
+            renderLogWindow();
+        });
+    });
 
-        // 3/4 pot
-        const threeQuarterPot = Math.floor(gameState.pot * 0.75);
-        if (threeQuarterPot > 0 && threeQuarterPot !== gameState.pot) {
-            quickWins.push({ amount: threeQuarterPot, label: '¾ Pot' });
-        }
+    function isLogScrolledToBottom() {
+        return gameLogEl.scrollTop + gameLogEl.clientHeight >= gameLogEl.scrollHeight - LOG_ROW_HEIGHT;
+    }
 
-        // 1/2 pot
-        const halfPot = Math.floor(gameState.pot / 2);
-        if (halfPot > 0 && halfPot !== threeQuarterPot) {
-            quickWins.push({ amount: halfPot, label: '½ Pot' });
+    function fillLogRow(rowEl, entry) {
+        rowEl.className = 'log-entry';
+        rowEl.setAttribute('data-id', entry.id);
+
+        // Add different styling based on entry type
+        if (entry.type === 'bet') {
+            rowEl.style.color = '#3b82f6'; // Blue for bets
+        } else if (entry.type === 'distribution') {
+            rowEl.style.color = '#10b981'; // Green for winnings
+        } else if (entry.type === 'fold' || entry.type === 'unfold') {
+            rowEl.style.color = '#ef4444'; // Red for fold
+        } else {
+            rowEl.style.color = '';
         }
 
-        // 1/4 pot
-        const quarterPot = Math.floor(gameState.pot / 4);
-        if (quarterPot > 0 && quarterPot !== halfPot) {
-            quickWins.push({ amount: quarterPot, label: '¼ Pot' });
+        const time = new Date(entry.timestamp).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+        rowEl.textContent = `[${time}] ${formatLogEntry(entry)}`;
+        rowEl.title = rowEl.textContent;
+    }
+
+    function resetLog() {
+        logEntries = [];
+        logOldestIndex = 0;
+        logRows.forEach(rowEl => rowEl.remove());
+        logRows.clear();
+    }
+
+    function updateGameLog(wasAtBottom) {
+        if (gameState.log_start_id !== logStartId) {
+            resetLog();
+            logStartId = gameState.log_start_id;
         }
 
-        // Create buttons
-        quickWins.forEach(win => {
-            const btn = document.createElement('button');
-            btn.className = 'quick-bet-btn';
-            btn.textContent = `$${win.amount}${win.label ? ` (${win.label})` : ''}`;
+        const tail = gameState.game_log;
+        const offset = gameState.log_count - tail.length;
 
-            btn.addEventListener('click', () => {
-                winAmountInput.value = win.amount;
-            });
+        // Keep the loaded range contiguous: if entries were missed between two
+        // updates, drop the cached older ones and page them in again.
+        if (offset > logCount || logEntries.length === 0) {
+            resetLog();
+            logOldestIndex = offset;
+        }
 
-            quickWinButtonsEl.appendChild(btn);
+        logCount = gameState.log_count;
+        tail.forEach((entry, i) => {
+            logEntries[offset + i] = entry;
         });
-    }
 
-    function updateGameLog() {
-        gameLogEl.innerHTML = '';
+        gameLogEmptyEl.hidden = logCount > 0;
+        gameLogRowsEl.style.height = `${logCount * LOG_ROW_HEIGHT}px`;
 
-        if (gameState.game_log.length === 0) {
-            gameLogEl.innerHTML = '<div class="text-center py-4 text-muted">No actions yet. Game log will appear here.</div>';
-            return;
+        // Follow new entries unless the user scrolled up to read older ones
+        if (wasAtBottom) {
+            gameLogEl.scrollTop = gameLogEl.scrollHeight;
         }
 
-        gameState.game_log.forEach(entry => {
-            const logEntryEl = document.createElement('div');
-            logEntryEl.className = 'log-entry';
+        renderLogWindow();
+    }
+
+    function renderLogWindow() {
+        const first = Math.max(0, Math.floor(gameLogEl.scrollTop / LOG_ROW_HEIGHT) - LOG_ROW_BUFFER);
+        const last = Math.min(logCount, Math.ceil((gameLogEl.scrollTop + gameLogEl.clientHeight) / LOG_ROW_HEIGHT) + LOG_ROW_BUFFER);
 
-            // Add different styling based on entry type
-            if (entry.type === 'bet') {
-                logEntryEl.style.color = '#3b82f6'; // Blue for bets
-            } else if (entry.type === 'distribution') {
-                logEntryEl.style.color = '#10b981'; // Green for winnings
-            } else if (entry.type === 'fold') {
-                logEntryEl.style.color = '#ef4444'; // Red for fold
+        // Recycle rows that scrolled out of the window
+        logRows.forEach((rowEl, index) => {
+            if (index < first || index >= last) {
+                rowEl.remove();
+                logRows.delete(index);
             }
+        });
 
-            const time = new Date(entry.timestamp).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
-            logEntryEl.textContent = `[${time}] ${entry.message}`;
+        let missingEntries = false;
+        for (let index = first; index < last; index++) {
+            let rowEl = logRows.get(index);
+            if (!rowEl) {
+                rowEl = document.createElement('div');
+                rowEl.style.top = `${index * LOG_ROW_HEIGHT}px`;
+                logRows.set(index, rowEl);
+                gameLogRowsEl.appendChild(rowEl);
+            }
 
-            gameLogEl.appendChild(logEntryEl);
-        });
+            const entry = logEntries[index];
+            if (entry) {
+                if (rowEl.getAttribute('data-id') !== String(entry.id)) {
+                    fillLogRow(rowEl, entry);
+                }
+            } else if (!rowEl.classList.contains('loading')) {
+                rowEl.className = 'log-entry loading';
+                rowEl.removeAttribute('data-id');
+                rowEl.textContent = 'Loading…';
+                missingEntries = true;
+            } else {
+                missingEntries = true;
+            }
+        }
 
-        // Scroll to bottom
-        gameLogEl.scrollTop = gameLogEl.scrollHeight;
+        if (missingEntries) {
+            loadOlderLogEntries();
+        }
+    }
+
+    function loadOlderLogEntries() {
+        const oldest = logEntries[logOldestIndex];
+        if (logLoadingOlder || logOldestIndex === 0 || !oldest) return;
+
+        logLoadingOlder = true;
+        const requestedStartId = logStartId;
+
+        fetchLogPage(oldest.id, LOG_PAGE_SIZE)
+            .then(entries => {
+                // Ignore pages that belong to a game that has since been reset
+                if (requestedStartId !== logStartId) return;
+
+                const start = logOldestIndex - entries.length;
+                entries.forEach((entry, i) => {
+                    logEntries[start + i] = entry;
+                });
+                // An empty page means the rest of the log is gone, stop asking for it
+                logOldestIndex = entries.length > 0 ? start : 0;
+            })
+            .catch(error => {
+                console.error('Error loading game log:', error);
+            })
+            .finally(() => {
+                logLoadingOlder = false;
+                renderLogWindow();
+            });
     }
 
     // Theme management
@@ -771,60 +1036,58 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    // Drag and drop for player positions on the table
-    function setupPlayerDragAndDrop() {
-        const positions = document.querySelectorAll('.player-position');
-        let draggedPosition = null;
-
-        positions.forEach(position => {
-            position.setAttribute('draggable', 'true');
+    // Drag and drop for player positions on the table, attached once per seat
+    function makeSeatDraggable(position) {
+        position.setAttribute('draggable', 'true');
 
-            // Drag start
-            position.addEventListener('dragstart', function (e) {
-                draggedPosition = this;
-                setTimeout(() => {
-                    this.querySelector('.player-card').classList.add('dragging');
-                }, 0);
-            });
+        // Drag start
+        position.addEventListener('dragstart', function (e) {
+            draggedPosition = this;
+            setTimeout(() => {
+                this.querySelector('.player-card').classList.add('dragging');
+            }, 0);
+        });
 
-            // Drag end
-            position.addEventListener('dragend', function () {
-                this.querySelector('.player-card').classList.remove('dragging');
-                draggedPosition = null;
-            });
+        // Drag end
+        position.addEventListener('dragend', function () {
+            this.querySelector('.player-card').classList.remove('dragging');
+            draggedPosition = null;
+        });
 
-            // Drag over - prevent default to allow drop
-            position.addEventListener('dragover', function (e) {
-                e.preventDefault();
-            });
+        // Drag over - prevent default to allow drop
+        position.addEventListener('dragover', function (e) {
+            e.preventDefault();
+        });
 
-            // Drop event
-            position.addEventListener('drop', function (e) {
-                e.preventDefault();
+        // Drop event
+        position.addEventListener('drop', function (e) {
+            e.preventDefault();
 
-                if (draggedPosition) {
-                    // Get position data
-                    const draggedUsername = draggedPosition.getAttribute('data-username');
-                    const targetUsername = this.getAttribute('data-username');
+            if (draggedPosition) {
+                // Get position data
+                const draggedUsername = draggedPosition.getAttribute('data-username');
+                const targetUsername = this.getAttribute('data-username');
 
-                    if (draggedUsername !== targetUsername) {
-                        // Create a new player order array
-                        const newOrder = [...gameState.player_order];
-                        const draggedIndex = newOrder.indexOf(draggedUsername);
-                        const targetIndex = newOrder.indexOf(targetUsername);
+                if (draggedUsername !== targetUsername) {
+                    // Create a new player order array
+                    const newOrder = [...gameState.player_order];
+                    const draggedIndex = newOrder.indexOf(draggedUsername);
+                    const targetIndex = newOrder.indexOf(targetUsername);
 
-                        // Remove dragged item and insert at new position
-                        newOrder.splice(draggedIndex, 1);
-                        newOrder.splice(targetIndex, 0, draggedUsername);
+                    // Remove dragged item and insert at new position
+                    newOrder.splice(draggedIndex, 1);
+                    newOrder.splice(targetIndex, 0, draggedUsername);
 
-                        // Send reorder event to server
-                        reorderPlayers(newOrder);
-                    }
+                    // Send reorder event to server
+                    reorderPlayers(newOrder);
                 }
-            });
+            }
         });
     }
 
     // Ensure standard bet options are added on initial load
     addStandardBetOptions();
+
+    // Paint the state embedded in the page without waiting for the socket
+    updateUI();
 });
\ No newline at end of file